@@ -1,9 +1,7 @@
 from __future__ import print_function, division
 
 import keras.backend as K
-import matplotlib.pyplot as plt
 import numpy as np
-from keras.datasets import mnist
 from keras.layers import Input, Dense, Reshape, Flatten
 from keras.layers import merge
 from keras.layers.advanced_activations import LeakyReLU
@@ -102,61 +100,40 @@ class AdversarialAutoencoder(GANBase):
 
         return Model(encoded_repr, validity)
 
-    def load_data(self, batch_size):
-        # Load the dataset
-        (X_train, _), (_, _) = mnist.load_data()
-
-        # Rescale -1 to 1
-        X_train = (X_train.astype(np.float32) - 127.5) / 127.5
-        X_train = np.expand_dims(X_train, axis=3)
+    def setup_training(self, batch_size):
+        # Load the dataset (rescaled -1 to 1)
+        self.X_train, _ = self.load_dataset()
 
         # Adversarial ground truths
-        valid = np.ones((batch_size, 1))
-        fake = np.zeros((batch_size, 1))
-        return X_train, valid, fake
+        self.valid = self.get_labels((batch_size, 1), 1)
+        self.fake = self.get_labels((batch_size, 1), 0)
+
+    def train_step(self, data, batch_size):
+        # Select the next batch of images
+        imgs = self.next_batch(batch_size, self.X_train)
 
-    def train_discriminator(self, X_train, batch_size, imgs, valid, fake):
+        d_loss = self.train_discriminator(batch_size, imgs)
+        g_loss = self.train_generator(imgs)
+        return {"d_loss": d_loss, "g_loss": g_loss}
+
+    def train_discriminator(self, batch_size, imgs):
         latent_fake = self.encoder.predict(imgs)
         latent_real = np.random.normal(size=(batch_size, self.latent_dim))
 
         # Train the discriminator
-        d_loss_real = self.discriminator.train_on_batch(latent_real, valid)
-        d_loss_fake = self.discriminator.train_on_batch(latent_fake, fake)
+        d_loss_real = self.discriminator.train_on_batch(latent_real, self.valid)
+        d_loss_fake = self.discriminator.train_on_batch(latent_fake, self.fake)
         d_loss = 0.5 * np.add(d_loss_real, d_loss_fake)
         return d_loss
 
-    def train_generator(self, imgs, valid):
-        g_loss = self.adversarial_autoencoder.train_on_batch(imgs, [imgs, valid])
+    def train_generator(self, imgs):
+        g_loss = self.adversarial_autoencoder.train_on_batch(imgs, [imgs, self.valid])
         return g_loss
 
-    def train(self, epochs, batch_size=128, sample_interval=50):
-
-        X_train, valid, fake = self.load_data(batch_size)
-
-        for epoch in range(epochs):
-            # Select a random batch of images
-            idx = np.random.randint(0, X_train.shape[0], batch_size)
-            imgs = X_train[idx]
-
-            d_loss = self.train_discriminator(
-                X_train,
-                batch_size,
-                imgs,
-                valid,
-                fake,
-            )
-            g_loss = self.train_generator(
-                imgs,
-                valid
-            )
-
-            # Plot the progress
-            print("%d [D loss: %f, acc: %.2f%%] [G loss: %f, mse: %f]" % (
-            epoch, d_loss[0], 100 * d_loss[1], g_loss[0], g_loss[1]))
-
-            # If at save interval => save generated image samples
-            if epoch % sample_interval == 0:
-                self.sample_images(epoch)
+    def format_progress(self, epoch, batch, logs):
+        d_loss, g_loss = logs["d_loss"], logs["g_loss"]
+        return "%d [D loss: %f, acc: %.2f%%] [G loss: %f, mse: %f]" % (
+            epoch, d_loss[0], 100 * d_loss[1], g_loss[0], g_loss[1])
 
     def sample_images(self, epoch):
         r, c = 5, 5
@@ -166,15 +143,7 @@ class AdversarialAutoencoder(GANBase):
 
         gen_imgs = 0.5 * gen_imgs + 0.5
 
-        fig, axs = plt.subplots(r, c)
-        cnt = 0
-        for i in range(r):
-            for j in range(c):
-                axs[i, j].imshow(gen_imgs[cnt, :, :, 0], cmap='gray')
-                axs[i, j].axis('off')
-                cnt += 1
-        fig.savefig("images/mnist_%d.png" % epoch)
-        plt.close()
+        self.save_grid("images/mnist_%d.png" % epoch, gen_imgs, r, c)
 
     def save_model(self):
 
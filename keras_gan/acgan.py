@@ -1,8 +1,6 @@
 from __future__ import print_function, division
 
-import matplotlib.pyplot as plt
 import numpy as np
-from keras.datasets import mnist
 from keras.layers import BatchNormalization, Activation, Embedding, ZeroPadding2D
 from keras.layers import Input, Dense, Reshape, Flatten, Dropout, multiply
 from keras.layers.advanced_activations import LeakyReLU
@@ -117,72 +115,55 @@ class ACGAN(GANBase):
 
         return Model(img, [validity, label])
 
-    def load_dataset(self, batch_size):
-        # Load the dataset
-        (X_train, y_train), (_, _) = mnist.load_data()
-
-        # Configure inputs
-        X_train = (X_train.astype(np.float32) - 127.5) / 127.5
-        X_train = np.expand_dims(X_train, axis=3)
-        y_train = y_train.reshape(-1, 1)
+    def setup_training(self, batch_size):
+        # Load the dataset (rescaled -1 to 1)
+        self.X_train, y_train = self.load_dataset()
+        self.y_train = y_train.reshape(-1, 1)
 
         # Adversarial ground truths
-        valid = np.ones((batch_size, 1))
-        fake = np.zeros((batch_size, 1))
-        return X_train, y_train, valid, fake
+        self.valid = self.get_labels((batch_size, 1), 1)
+        self.fake = self.get_labels((batch_size, 1), 0)
 
-    def train_discriminator(self, X_train, y_train, valid, fake, batch_size):
+    def train_step(self, data, batch_size):
+        # Sample noise as generator input
+        noise = np.random.normal(0, 1, (batch_size, 100))
 
         # The labels of the digits that the generator tries to create an
         # image representation of
         sampled_labels = np.random.randint(0, 10, (batch_size, 1))
 
+        d_loss = self.train_discriminator(noise, sampled_labels, batch_size)
+        g_loss = self.train_generator(noise, sampled_labels)
+        return {"d_loss": d_loss, "g_loss": g_loss}
+
+    def train_discriminator(self, noise, sampled_labels, batch_size):
+        # Select the next batch of images and their labels.
+        # Image labels are 0-9 if the image is valid or 10 if it is generated (fake)
+        imgs, img_labels = self.next_batch(batch_size, self.X_train, self.y_train)
+        fake_labels = self.get_labels(img_labels.shape, 10)
+
         # Generate a half batch of new images
         gen_imgs = self.generator.predict([noise, sampled_labels])
 
-
         # Train the discriminator
-        d_loss_real = self.discriminator.train_on_batch(imgs, [valid, img_labels])
-        d_loss_fake = self.discriminator.train_on_batch(gen_imgs, [fake, fake_labels])
+        d_loss_real = self.discriminator.train_on_batch(imgs, [self.valid, img_labels])
+        d_loss_fake = self.discriminator.train_on_batch(gen_imgs, [self.fake, fake_labels])
         d_loss = 0.5 * np.add(d_loss_real, d_loss_fake)
         return d_loss
 
-    def train_generator(self):
-        pass
-
-    def train(self, epochs, batch_size=128, sample_interval=50):
-
-        X_train, y_train, valid, fake = self.load_dataset(batch_size)
-
-        for epoch in range(epochs):
-            # Select a random batch of images
-            idx = np.random.randint(0, X_train.shape[0], batch_size)
-            imgs = X_train[idx]
-
-            # Sample noise as generator input
-            noise = np.random.normal(0, 1, (batch_size, 100))
-
-            # Image labels. 0-9 if image is valid or 10 if it is generated (fake)
-            img_labels = y_train[idx]
-            fake_labels = 10 * np.ones(img_labels.shape)
-
-            d_loss = self.train_discriminator(X_train, y_train, valid, fake, batch_size)
-
-            # ---------------------
-            #  Train Generator
-            # ---------------------
-
-            # Train the generator
-            g_loss = self.combined.train_on_batch([noise, sampled_labels], [valid, sampled_labels])
+    def train_generator(self, noise, sampled_labels):
+        # Train the generator
+        g_loss = self.combined.train_on_batch([noise, sampled_labels], [self.valid, sampled_labels])
+        return g_loss
 
-            # Plot the progress
-            print("%d [D loss: %f, acc.: %.2f%%, op_acc: %.2f%%] [G loss: %f]" % (
-            epoch, d_loss[0], 100 * d_loss[3], 100 * d_loss[4], g_loss[0]))
+    def format_progress(self, epoch, batch, logs):
+        d_loss, g_loss = logs["d_loss"], logs["g_loss"]
+        return "%d [D loss: %f, acc.: %.2f%%, op_acc: %.2f%%] [G loss: %f]" % (
+            epoch, d_loss[0], 100 * d_loss[3], 100 * d_loss[4], g_loss[0])
 
-            # If at save interval => save generated image samples
-            if epoch % sample_interval == 0:
-                self.save_model()
-                self.sample_images(epoch)
+    def save_samples(self, epoch, batch):
+        self.save_model()
+        self.sample_images(epoch)
 
     def sample_images(self, epoch):
         r, c = 10, 10
@@ -192,15 +173,7 @@ class ACGAN(GANBase):
         # Rescale images 0 - 1
         gen_imgs = 0.5 * gen_imgs + 0.5
 
-        fig, axs = plt.subplots(r, c)
-        cnt = 0
-        for i in range(r):
-            for j in range(c):
-                axs[i, j].imshow(gen_imgs[cnt, :, :, 0], cmap='gray')
-                axs[i, j].axis('off')
-                cnt += 1
-        fig.savefig("images/%d.png" % epoch)
-        plt.close()
+        self.save_grid("images/%d.png" % epoch, gen_imgs, r, c)
 
     def save_model(self):
 
@@ -1,8 +1,6 @@
 from __future__ import print_function, division
 
-import matplotlib.pyplot as plt
 import numpy as np
-from keras.datasets import mnist
 from keras.layers import BatchNormalization
 from keras.layers import Input, Dense, Reshape, Flatten, Dropout
 from keras.layers import concatenate
@@ -112,52 +110,45 @@ class BIGAN(GANBase):
 
         return Model([z, img], validity)
 
-    def train(self, epochs, batch_size=128, sample_interval=50):
-
-        # Load the dataset
-        (X_train, _), (_, _) = mnist.load_data()
-
-        # Rescale -1 to 1
-        X_train = (X_train.astype(np.float32) - 127.5) / 127.5
-        X_train = np.expand_dims(X_train, axis=3)
+    def setup_training(self, batch_size):
+        # Load the dataset (rescaled -1 to 1)
+        self.X_train, _ = self.load_dataset()
 
         # Adversarial ground truths
-        valid = np.ones((batch_size, 1))
-        fake = np.zeros((batch_size, 1))
-
-        for epoch in range(epochs):
-
-            # ---------------------
-            #  Train Discriminator
-            # ---------------------
+        self.valid = self.get_labels((batch_size, 1), 1)
+        self.fake = self.get_labels((batch_size, 1), 0)
 
-            # Sample noise and generate img
-            z = np.random.normal(size=(batch_size, self.latent_dim))
-            imgs_ = self.generator.predict(z)
+    def train_step(self, data, batch_size):
+        # Sample noise and select the next batch of images, shared by both steps
+        z = np.random.normal(size=(batch_size, self.latent_dim))
+        imgs = self.next_batch(batch_size, self.X_train)
 
-            # Select a random batch of images and encode
-            idx = np.random.randint(0, X_train.shape[0], batch_size)
-            imgs = X_train[idx]
-            z_ = self.encoder.predict(imgs)
+        d_loss = self.train_discriminator(z, imgs)
+        g_loss = self.train_generator(z, imgs)
+        return {"d_loss": d_loss, "g_loss": g_loss}
 
-            # Train the discriminator (img -> z is valid, z -> img is fake)
-            d_loss_real = self.discriminator.train_on_batch([z_, imgs], valid)
-            d_loss_fake = self.discriminator.train_on_batch([z, imgs_], fake)
-            d_loss = 0.5 * np.add(d_loss_real, d_loss_fake)
+    def train_discriminator(self, z, imgs):
+        # Generate img and encode the real images
+        imgs_ = self.generator.predict(z)
+        z_ = self.encoder.predict(imgs)
 
-            # ---------------------
-            #  Train Generator
-            # ---------------------
+        # Train the discriminator (img -> z is valid, z -> img is fake)
+        d_loss_real = self.discriminator.train_on_batch([z_, imgs], self.valid)
+        d_loss_fake = self.discriminator.train_on_batch([z, imgs_], self.fake)
+        d_loss = 0.5 * np.add(d_loss_real, d_loss_fake)
+        return d_loss
 
-            # Train the generator (z -> img is valid and img -> z is is invalid)
-            g_loss = self.bigan_generator.train_on_batch([z, imgs], [valid, fake])
+    def train_generator(self, z, imgs):
+        # Train the generator (z -> img is valid and img -> z is is invalid)
+        g_loss = self.bigan_generator.train_on_batch([z, imgs], [self.valid, self.fake])
+        return g_loss
 
-            # Plot the progress
-            print("%d [D loss: %f, acc: %.2f%%] [G loss: %f]" % (epoch, d_loss[0], 100 * d_loss[1], g_loss[0]))
+    def format_progress(self, epoch, batch, logs):
+        d_loss, g_loss = logs["d_loss"], logs["g_loss"]
+        return "%d [D loss: %f, acc: %.2f%%] [G loss: %f]" % (epoch, d_loss[0], 100 * d_loss[1], g_loss[0])
 
-            # If at save interval => save generated image samples
-            if epoch % sample_interval == 0:
-                self.sample_interval(epoch)
+    def save_samples(self, epoch, batch):
+        self.sample_interval(epoch)
 
     def sample_interval(self, epoch):
         r, c = 5, 5
@@ -166,15 +157,7 @@ class BIGAN(GANBase):
 
         gen_imgs = 0.5 * gen_imgs + 0.5
 
-        fig, axs = plt.subplots(r, c)
-        cnt = 0
-        for i in range(r):
-            for j in range(c):
-                axs[i, j].imshow(gen_imgs[cnt, :, :, 0], cmap='gray')
-                axs[i, j].axis('off')
-                cnt += 1
-        fig.savefig("images/mnist_%d.png" % epoch)
-        plt.close()
+        self.save_grid("images/mnist_%d.png" % epoch, gen_imgs, r, c)
 
 
 if __name__ == '__main__':
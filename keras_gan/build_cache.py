@@ -0,0 +1,113 @@
+from __future__ import print_function, division
+
+import hashlib
+import inspect
+import json
+import os
+import tempfile
+
+import keras
+from keras.models import model_from_json
+
+DEFAULT_BUILD_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.keras', 'keras_gan', 'builds')
+# Part of every key, bumped when the cached files or the key change
+CACHE_VERSION = 2
+
+
+def get_builder_source(build_fn):
+    """
+    Source code an architecture built by build_fn depends on, None when it is not available.
+
+    A bound method may call any other method of its object, e.g. ModelBuilder.build calls
+    build_layers, so it is represented by the source of every class of the object.
+
+    :param build_fn: function or bound method
+    :return source:
+    """
+    owner = getattr(build_fn, '__self__', None)
+    try:
+        if owner is None:
+            return inspect.getsource(build_fn)
+        return "".join(inspect.getsource(cls) for cls in type(owner).__mro__ if cls is not object)
+    except (OSError, TypeError):
+        return None
+
+
+class BuildCache(object):
+    """Reuses the architecture and initial weights of models built by earlier runs.
+
+    A model is identified by a name, the parameters its builder depends on and the
+    source code of the builder.  On the first build its JSON architecture and freshly
+    initialized (or pre-trained) weights are saved; later builds with the same key load
+    them instead of running the builder, which e.g. saves SRGAN the VGG19 ImageNet
+    weights download and load.  Only uncompiled models are cached, compiling them stays
+    with the caller.  Builders whose source cannot be read, e.g. ones defined in an
+    interactive session, are never cached.
+
+    The params must hold every value the architecture depends on that is not written in
+    the builder's source, such as shapes and layer widths read from attributes, or a
+    changed value silently loads the previous architecture.
+
+    Note that every run using the cache starts from the same initial weights.
+
+    Example usage:
+        gan = CycleGAN(build_cache=BuildCache())
+
+    :param cache_dir: folder of the cached models, defaults to $KERAS_GAN_BUILD_CACHE
+        or ~/.keras/keras_gan/builds
+    """
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir or os.environ.get('KERAS_GAN_BUILD_CACHE', DEFAULT_BUILD_CACHE_DIR)
+        self.hits = 0
+        self.misses = 0
+
+    def get_paths(self, name, params, source=None):
+        """Architecture and weights paths of a model, keyed by a hash of its name, params, builder source and keras version"""
+        description = json.dumps({"name": name, "params": params, "source": source, "keras": keras.__version__,
+                                  "version": CACHE_VERSION}, sort_keys=True, default=str)
+        key = hashlib.sha1(description.encode('utf-8')).hexdigest()[:16]
+        path = os.path.join(self.cache_dir, "{}_{}".format(name.replace('/', '_'), key))
+        return path + ".json", path + ".h5"
+
+    def build(self, name, params, build_fn, custom_objects=None):
+        """
+        Load a cached model, or build and cache it on a miss.
+
+        :param name: identifies the model, e.g. 'CycleGAN/g_AB'
+        :param params: JSON-serializable dict of every architecture input not in the builder's source
+        :param build_fn: callable returning the model
+        :param custom_objects: custom layers of the model, passed to model_from_json
+        :return model:
+        """
+        source = get_builder_source(build_fn)
+        if source is None:
+            self.misses += 1
+            return build_fn()
+        json_path, weights_path = self.get_paths(name, params, source)
+        if os.path.exists(json_path) and os.path.exists(weights_path):
+            self.hits += 1
+            with open(json_path, "r") as json_file:
+                model = model_from_json(json_file.read(), custom_objects=custom_objects)
+            model.load_weights(weights_path)
+            return model
+
+        self.misses += 1
+        model = build_fn()
+        self.save(model, json_path, weights_path)
+        return model
+
+    def save(self, model, json_path, weights_path):
+        # Both files are renamed into place, the weights first, so that a model is only
+        # loaded from a complete pair of files
+        if not os.path.isdir(self.cache_dir):
+            os.makedirs(self.cache_dir)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".h5")
+        os.close(fd)
+        model.save_weights(tmp_path)
+        os.replace(tmp_path, weights_path)
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".json")
+        with os.fdopen(fd, "w") as json_file:
+            json_file.write(model.to_json())
+        os.replace(tmp_path, json_path)
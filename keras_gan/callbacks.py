@@ -0,0 +1,185 @@
+from __future__ import print_function, division
+
+import numpy as np
+
+from .checkpoint import AsyncCheckpointWriter
+
+
+class Callback(object):
+    """Base class of the hooks run by GANBase.train.
+
+    `logs` is the dict of losses returned by the model's train_step.
+
+    Example usage:
+        class PrintGeneratorLoss(Callback):
+            def on_epoch_end(self, epoch, logs):
+                print(epoch, logs['g_loss'])
+
+        gan.train(epochs=100, batch_size=32, callbacks=[PrintGeneratorLoss()])
+    """
+
+    def __init__(self):
+        self.model = None
+
+    def set_model(self, model):
+        self.model = model
+
+    def on_train_begin(self):
+        pass
+
+    def on_train_end(self):
+        pass
+
+    def on_epoch_begin(self, epoch):
+        pass
+
+    def on_epoch_end(self, epoch, logs):
+        pass
+
+    def on_step_begin(self, epoch, batch):
+        pass
+
+    def on_step_end(self, epoch, batch, logs):
+        pass
+
+
+class CallbackList(object):
+    """Runs every hook of a list of callbacks, in order"""
+
+    def __init__(self, callbacks, model):
+        self.callbacks = list(callbacks)
+        for callback in self.callbacks:
+            callback.set_model(model)
+
+    def on_train_begin(self):
+        for callback in self.callbacks:
+            callback.on_train_begin()
+
+    def on_train_end(self):
+        for callback in self.callbacks:
+            callback.on_train_end()
+
+    def on_epoch_begin(self, epoch):
+        for callback in self.callbacks:
+            callback.on_epoch_begin(epoch)
+
+    def on_epoch_end(self, epoch, logs):
+        for callback in self.callbacks:
+            callback.on_epoch_end(epoch, logs)
+
+    def on_step_begin(self, epoch, batch):
+        for callback in self.callbacks:
+            callback.on_step_begin(epoch, batch)
+
+    def on_step_end(self, epoch, batch, logs):
+        for callback in self.callbacks:
+            callback.on_step_end(epoch, batch, logs)
+
+
+def get_interval_index(model, epoch, batch):
+    # Models training a single step per epoch are scheduled by epoch, the others by batch
+    return epoch if model.steps_per_epoch == 1 else batch
+
+
+class ProgressLogger(Callback):
+    """Print the model's progress line after every step"""
+
+    def on_step_end(self, epoch, batch, logs):
+        if self.model.verbose:
+            print(self.model.format_progress(epoch, batch, logs))
+
+
+class SampleImages(Callback):
+    """Save generated image samples every `interval` steps"""
+
+    def __init__(self, interval):
+        super(SampleImages, self).__init__()
+        self.interval = interval
+
+    def on_step_end(self, epoch, batch, logs):
+        if self.interval and get_interval_index(self.model, epoch, batch) % self.interval == 0:
+            with self.model.timed("sample"):
+                self.model.save_samples(epoch, batch)
+
+    def on_train_end(self):
+        # Wait for the grids still being written in the background
+        self.model.sample_writer.flush()
+
+
+class ModelCheckpoint(Callback):
+    """Call the model's save_model every `interval` steps"""
+
+    def __init__(self, interval):
+        super(ModelCheckpoint, self).__init__()
+        self.interval = interval
+
+    def on_step_end(self, epoch, batch, logs):
+        if self.interval and get_interval_index(self.model, epoch, batch) % self.interval == 0:
+            with self.model.timed("checkpoint"):
+                self.model.save_model()
+
+
+class AsyncCheckpoint(Callback):
+    """Save a checkpoint of the training state every `interval` steps, in the background.
+
+    The state is copied to host arrays at the end of the step and written by an
+    AsyncCheckpointWriter, so training continues while the file is written.  The last
+    `keep` checkpoints are kept; resume with model.load_checkpoint(callback.writer.latest()).
+
+    :param directory: folder of the checkpoint files
+    :param interval: number of steps between checkpoints
+    :param keep: number of checkpoints kept, None keeps all of them
+    :param prefix: start of the file names, defaults to the model's class name
+    """
+
+    def __init__(self, directory="checkpoints", interval=500, keep=3, prefix=None):
+        super(AsyncCheckpoint, self).__init__()
+        self.interval = interval
+        self.writer = AsyncCheckpointWriter(directory, prefix=prefix, keep=keep)
+
+    def set_model(self, model):
+        super(AsyncCheckpoint, self).set_model(model)
+        if self.writer.prefix is None:
+            self.writer.prefix = type(model).__name__.lower()
+
+    def on_step_end(self, epoch, batch, logs):
+        if self.interval and self.model.global_step % self.interval == 0:
+            with self.model.timed("checkpoint"):
+                header, arrays = self.model.get_checkpoint_state()
+                self.writer.write(self.model.global_step, header, arrays)
+
+    def on_train_end(self):
+        # Wait for the last checkpoint and release the writer thread
+        self.writer.close()
+
+
+class EarlyStopping(Callback):
+    """Stop training once a loss has not improved for `patience` epochs.
+
+    :param monitor: key of the loss in the train_step logs, e.g. 'd_loss' or 'g_loss'.
+        For losses with several outputs the first (total) loss is used.
+    :param patience: number of epochs without improvement before stopping
+    :param min_delta: minimum decrease that counts as an improvement
+    """
+
+    def __init__(self, monitor='g_loss', patience=10, min_delta=0.):
+        super(EarlyStopping, self).__init__()
+        self.monitor = monitor
+        self.patience = patience
+        self.min_delta = min_delta
+        self.best = np.inf
+        self.wait = 0
+
+    def on_train_begin(self):
+        self.best = np.inf
+        self.wait = 0
+
+    def on_epoch_end(self, epoch, logs):
+        current = float(np.ravel(logs[self.monitor])[0])
+        if current < self.best - self.min_delta:
+            self.best = current
+            self.wait = 0
+        else:
+            self.wait += 1
+            if self.wait >= self.patience:
+                self.model.stop_training = True
@@ -1,9 +1,7 @@
 from __future__ import print_function, division
 
-import matplotlib.pyplot as plt
 import numpy as np
 import scipy
-from keras.datasets import mnist
 from keras.layers import BatchNormalization
 from keras.layers import Concatenate
 from keras.layers import Input, Dense, Flatten, Dropout
@@ -14,6 +12,8 @@ from keras.optimizers import Adam
 from keras.utils import to_categorical
 from keras_contrib.layers.normalization import InstanceNormalization
 
+from .dataset_store import to_tanh
+from .masking import mask_boxes, random_boxes
 from .gan_base import GANBase
 
 
@@ -123,80 +123,65 @@ class CCGAN(GANBase):
 
         return Model(img, [validity, label])
 
-    def mask_randomly(self, imgs):
-        y1 = np.random.randint(0, self.img_rows - self.mask_height, imgs.shape[0])
-        y2 = y1 + self.mask_height
-        x1 = np.random.randint(0, self.img_rows - self.mask_width, imgs.shape[0])
-        x2 = x1 + self.mask_width
-
-        masked_imgs = np.empty_like(imgs)
-        for i, img in enumerate(imgs):
-            masked_img = img.copy()
-            _y1, _y2, _x1, _x2 = y1[i], y2[i], x1[i], x2[i],
-            masked_img[_y1:_y2, _x1:_x2, :] = 0
-            masked_imgs[i] = masked_img
-
-        return masked_imgs
-
-    def train(self, epochs, batch_size=128, sample_interval=50):
-
-        # Load the dataset
-        (X_train, y_train), (_, _) = mnist.load_data()
+    def resize_images(self, imgs):
+        # Rescale MNIST to 32x32 and -1 to 1
+        imgs = np.array([scipy.misc.imresize(x, [self.img_rows, self.img_cols]) for x in imgs])
+        return to_tanh(imgs)
 
-        # Rescale MNIST to 32x32
-        X_train = np.array([scipy.misc.imresize(x, [self.img_rows, self.img_cols]) for x in X_train])
+    def mask_randomly(self, imgs):
+        y1, y2, x1, x2 = random_boxes(len(imgs), imgs.shape[1:3], (self.mask_height, self.mask_width))
+        return mask_boxes(imgs, y1, y2, x1, x2)
 
-        # Rescale -1 to 1
-        X_train = (X_train.astype(np.float32) - 127.5) / 127.5
-        X_train = np.expand_dims(X_train, axis=3)
-        y_train = y_train.reshape(-1, 1)
+    def setup_training(self, batch_size):
+        # Load the dataset (rescaled to 32x32 and -1 to 1)
+        self.X_train, y_train = self.load_dataset(
+            transform=self.resize_images,
+            key="tanh_{}x{}".format(self.img_rows, self.img_cols))
+        self.y_train = y_train.reshape(-1, 1)
 
         # Adversarial ground truths
-        valid = np.ones((batch_size, 4, 4, 1))
-        fake = np.zeros((batch_size, 4, 4, 1))
-
-        for epoch in range(epochs):
-
-            # ---------------------
-            #  Train Discriminator
-            # ---------------------
+        self.valid = self.get_labels((batch_size, 4, 4, 1), 1)
+        self.fake = self.get_labels((batch_size, 4, 4, 1), 0)
 
-            # Sample half batch of images
-            idx = np.random.randint(0, X_train.shape[0], batch_size)
-            imgs = X_train[idx]
-            labels = y_train[idx]
+    def train_step(self, data, batch_size):
+        # Select the next batch of images
+        imgs, labels = self.next_batch(batch_size, self.X_train, self.y_train)
 
-            masked_imgs = self.mask_randomly(imgs)
+        masked_imgs = self.mask_randomly(imgs)
 
-            # Generate a half batch of new images
-            gen_imgs = self.generator.predict(masked_imgs)
+        d_loss = self.train_discriminator(imgs, labels, masked_imgs, batch_size)
+        g_loss = self.train_generator(masked_imgs)
+        return {"d_loss": d_loss, "g_loss": g_loss}
 
-            # One-hot encoding of labels
-            labels = to_categorical(labels, num_classes=self.num_classes + 1)
-            fake_labels = to_categorical(np.full((batch_size, 1), self.num_classes), num_classes=self.num_classes + 1)
+    def train_discriminator(self, imgs, labels, masked_imgs, batch_size):
+        # Generate a half batch of new images
+        gen_imgs = self.generator.predict(masked_imgs)
 
-            # Train the discriminator
-            d_loss_real = self.discriminator.train_on_batch(imgs, [valid, labels])
-            d_loss_fake = self.discriminator.train_on_batch(gen_imgs, [fake, fake_labels])
-            d_loss = 0.5 * np.add(d_loss_real, d_loss_fake)
+        # One-hot encoding of labels
+        labels = to_categorical(labels, num_classes=self.num_classes + 1)
+        fake_labels = self.get_one_hot_labels(batch_size, self.num_classes, self.num_classes + 1)
 
-            # ---------------------
-            #  Train Generator
-            # ---------------------
+        # Train the discriminator
+        d_loss_real = self.discriminator.train_on_batch(imgs, [self.valid, labels])
+        d_loss_fake = self.discriminator.train_on_batch(gen_imgs, [self.fake, fake_labels])
+        d_loss = 0.5 * np.add(d_loss_real, d_loss_fake)
+        return d_loss
 
-            # Train the generator
-            g_loss = self.combined.train_on_batch(masked_imgs, valid)
+    def train_generator(self, masked_imgs):
+        # Train the generator
+        g_loss = self.combined.train_on_batch(masked_imgs, self.valid)
+        return g_loss
 
-            # Plot the progress
-            print("%d [D loss: %f, op_acc: %.2f%%] [G loss: %f]" % (epoch, d_loss[0], 100 * d_loss[4], g_loss))
+    def format_progress(self, epoch, batch, logs):
+        d_loss, g_loss = logs["d_loss"], logs["g_loss"]
+        return "%d [D loss: %f, op_acc: %.2f%%] [G loss: %f]" % (epoch, d_loss[0], 100 * d_loss[4], g_loss)
 
-            # If at save interval => save generated image samples
-            if epoch % sample_interval == 0:
-                # Select a random half batch of images
-                idx = np.random.randint(0, X_train.shape[0], 6)
-                imgs = X_train[idx]
-                self.sample_images(epoch, imgs)
-                self.save_model()
+    def save_samples(self, epoch, batch):
+        # Select a random half batch of images
+        idx = np.random.randint(0, self.X_train.shape[0], 6)
+        imgs = self.X_train[idx]
+        self.sample_images(epoch, imgs)
+        self.save_model()
 
     def sample_images(self, epoch, imgs):
         r, c = 3, 6
@@ -210,16 +195,7 @@ class CCGAN(GANBase):
 
         gen_imgs = np.where(gen_imgs < 0, 0, gen_imgs)
 
-        fig, axs = plt.subplots(r, c)
-        for i in range(c):
-            axs[0, i].imshow(imgs[i, :, :, 0], cmap='gray')
-            axs[0, i].axis('off')
-            axs[1, i].imshow(masked_imgs[i, :, :, 0], cmap='gray')
-            axs[1, i].axis('off')
-            axs[2, i].imshow(gen_imgs[i, :, :, 0], cmap='gray')
-            axs[2, i].axis('off')
-        fig.savefig("images/%d.png" % epoch)
-        plt.close()
+        self.save_grid("images/%d.png" % epoch, np.concatenate([imgs[:c], masked_imgs[:c], gen_imgs[:c]]), r, c)
 
     def save_model(self):
 
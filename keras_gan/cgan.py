@@ -1,8 +1,6 @@
 from __future__ import print_function, division
 
-import matplotlib.pyplot as plt
 import numpy as np
-from keras.datasets import mnist
 from keras.layers import BatchNormalization, Embedding
 from keras.layers import Input, Dense, Reshape, Flatten, Dropout, multiply
 from keras.layers.advanced_activations import LeakyReLU
@@ -105,67 +103,47 @@ class CGAN(GANBase):
 
         return Model([img, label], validity)
 
-    def train_discriminator(self, X_train, y_train, batch_size, noise, valid, fake):
-        # Select a random half batch of images
-        idx = np.random.randint(0, X_train.shape[0], batch_size)
-        imgs, labels = X_train[idx], y_train[idx]
+    def setup_training(self, batch_size):
+        # Load the dataset (rescaled -1 to 1)
+        self.X_train, y_train = self.load_dataset()
+        self.y_train = y_train.reshape(-1, 1)
+
+        # Adversarial ground truths
+        self.valid = self.get_labels((batch_size, 1), 1)
+        self.fake = self.get_labels((batch_size, 1), 0)
+
+    def train_step(self, data, batch_size):
+        # Sample noise as generator input
+        noise = np.random.normal(0, 1, (batch_size, 100))
+
+        d_loss = self.train_discriminator(batch_size, noise)
+        g_loss = self.train_generator(noise, batch_size)
+        return {"d_loss": d_loss, "g_loss": g_loss}
+
+    def train_discriminator(self, batch_size, noise):
+        # Select the next half batch of images
+        imgs, labels = self.next_batch(batch_size, self.X_train, self.y_train)
 
         # Generate a half batch of new images
         gen_imgs = self.generator.predict([noise, labels])
 
         # Train the discriminator
-        d_loss_real = self.discriminator.train_on_batch([imgs, labels], valid)
-        d_loss_fake = self.discriminator.train_on_batch([gen_imgs, labels], fake)
+        d_loss_real = self.discriminator.train_on_batch([imgs, labels], self.valid)
+        d_loss_fake = self.discriminator.train_on_batch([gen_imgs, labels], self.fake)
         d_loss = 0.5 * np.add(d_loss_real, d_loss_fake)
         return d_loss
 
-    def train_generator(self, noise, batch_size, valid):
+    def train_generator(self, noise, batch_size):
         # Condition on labels
         sampled_labels = np.random.randint(0, 10, batch_size).reshape(-1, 1)
 
         # Train the generator
-        g_loss = self.combined.train_on_batch([noise, sampled_labels], valid)
+        g_loss = self.combined.train_on_batch([noise, sampled_labels], self.valid)
         return g_loss
 
-    def train(self, epochs, batch_size=128, sample_interval=50):
-        # Load the dataset
-        (X_train, y_train), (_, _) = mnist.load_data()
-
-        # Configure input
-        X_train = (X_train.astype(np.float32) - 127.5) / 127.5
-        X_train = np.expand_dims(X_train, axis=3)
-        y_train = y_train.reshape(-1, 1)
-
-        # Adversarial ground truths
-        valid = np.ones((batch_size, 1))
-        fake = np.zeros((batch_size, 1))
-
-        for epoch in range(epochs):
-
-            # Sample noise as generator input
-            noise = np.random.normal(0, 1, (batch_size, 100))
-
-            d_loss = self.train_discriminator(
-                X_train,
-                y_train,
-                batch_size,
-                noise,
-                valid,
-                fake
-            )
-
-            g_loss = self.train_generator(
-                noise,
-                batch_size,
-                valid
-            )
-
-            # Plot the progress
-            print("%d [D loss: %f, acc.: %.2f%%] [G loss: %f]" % (epoch, d_loss[0], 100 * d_loss[1], g_loss))
-
-            # If at save interval => save generated image samples
-            if epoch % sample_interval == 0:
-                self.sample_images(epoch)
+    def format_progress(self, epoch, batch, logs):
+        d_loss, g_loss = logs["d_loss"], logs["g_loss"]
+        return "%d [D loss: %f, acc.: %.2f%%] [G loss: %f]" % (epoch, d_loss[0], 100 * d_loss[1], g_loss)
 
     def sample_images(self, epoch):
         r, c = 2, 5
@@ -177,16 +155,8 @@ class CGAN(GANBase):
         # Rescale images 0 - 1
         gen_imgs = 0.5 * gen_imgs + 0.5
 
-        fig, axs = plt.subplots(r, c)
-        cnt = 0
-        for i in range(r):
-            for j in range(c):
-                axs[i, j].imshow(gen_imgs[cnt, :, :, 0], cmap='gray')
-                axs[i, j].set_title("Digit: %d" % sampled_labels[cnt])
-                axs[i, j].axis('off')
-                cnt += 1
-        fig.savefig("images/%d.png" % epoch)
-        plt.close()
+        titles = ["Digit: %d" % label for label in sampled_labels[:, 0]]
+        self.save_grid("images/%d.png" % epoch, gen_imgs, r, c, titles)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,218 @@
+from __future__ import print_function, division
+
+import json
+import os
+import re
+import struct
+import tempfile
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+MAGIC = b"KGANCKPT"
+FORMAT_VERSION = 1
+# Every array starts at a multiple of ALIGNMENT bytes, so mapped arrays are aligned
+ALIGNMENT = 64
+# Magic, format version and header length
+PREAMBLE = struct.Struct("<8sIQ")
+
+
+def align(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def write_checkpoint(path, header, arrays):
+    """
+    Write a checkpoint file: a JSON header followed by the raw bytes of every array.
+
+    The layout is computed first, so the file is written front to back in one pass, to
+    a temporary file that then replaces path.
+
+    :param path: file to write
+    :param header: JSON-serializable dict, stored with the array layout under "arrays"
+    :param arrays: ordered dict of name -> array
+    :return path:
+    """
+    arrays = OrderedDict((name, np.asarray(array)) for name, array in arrays.items())
+    layout = []
+    offset = 0
+    for name, array in arrays.items():
+        layout.append({"name": name, "dtype": array.dtype.str, "shape": list(array.shape), "offset": offset})
+        offset = align(offset + array.nbytes)
+    header = dict(header, arrays=layout)
+    header_bytes = json.dumps(header).encode("utf-8")
+    data_start = align(PREAMBLE.size + len(header_bytes))
+
+    folder = os.path.dirname(os.path.abspath(path))
+    if not os.path.isdir(folder):
+        os.makedirs(folder)
+    fd, tmp_path = tempfile.mkstemp(dir=folder, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header_bytes)))
+            f.write(header_bytes)
+            position = PREAMBLE.size + len(header_bytes)
+            for entry, array in zip(layout, arrays.values()):
+                start = data_start + entry["offset"]
+                f.write(b"\0" * (start - position))
+                # Writes the bytes of the array without copying them, unless it is strided
+                f.write(memoryview(np.ascontiguousarray(array).reshape(-1)))
+                position = start + array.nbytes
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return path
+
+
+def read_checkpoint(path):
+    """
+    Map a checkpoint file written by write_checkpoint.
+
+    :param path:
+    :return (header, arrays): the header dict and an ordered dict of name -> read-only
+        array backed by the single memory map of the file
+    """
+    with open(path, "rb") as f:
+        magic, version, header_length = PREAMBLE.unpack(f.read(PREAMBLE.size))
+        if magic != MAGIC:
+            raise ValueError("%s is not a keras_gan checkpoint" % path)
+        if version > FORMAT_VERSION:
+            raise ValueError("%s has checkpoint format version %d, newer than %d" % (path, version, FORMAT_VERSION))
+        header = json.loads(f.read(header_length).decode("utf-8"))
+
+    data_start = align(PREAMBLE.size + header_length)
+    mapped = np.memmap(path, dtype=np.uint8, mode="r")
+    arrays = OrderedDict()
+    for entry in header["arrays"]:
+        arrays[entry["name"]] = np.ndarray(tuple(entry["shape"]), dtype=np.dtype(entry["dtype"]),
+                                           buffer=mapped, offset=data_start + entry["offset"])
+    return header, arrays
+
+
+def get_rng_state():
+    """numpy's global random state, as a JSON-serializable dict and its key array"""
+    name, keys, position, has_gauss, cached_gaussian = np.random.get_state()
+    return {"name": name, "position": int(position), "has_gauss": int(has_gauss),
+            "cached_gaussian": float(cached_gaussian)}, keys
+
+
+def set_rng_state(state, keys):
+    np.random.set_state((state["name"], np.array(keys), state["position"], state["has_gauss"],
+                         state["cached_gaussian"]))
+
+
+def collect_variables(models):
+    """
+    Named variables of the weights and optimizer slots of models, each variable once.
+
+    Sub-models share their weights with the graphs they are part of, so every variable
+    is named after the first model it is found in.  The order only depends on the
+    models, so saving and restoring the same kind of GAN pairs up the same variables.
+
+    :param models: ordered dict of name -> keras model
+    :return variables: ordered dict of name -> variable
+    """
+    variables = OrderedDict()
+    seen = set()
+
+    def add(prefix, weights):
+        for i, variable in enumerate(weights):
+            if id(variable) not in seen:
+                seen.add(id(variable))
+                variables["%s/%d" % (prefix, i)] = variable
+
+    for name, model in models.items():
+        add(name, model.weights)
+    for name, model in models.items():
+        optimizer = getattr(model, "optimizer", None)
+        if optimizer is not None:
+            add(name + "/optimizer", optimizer.weights)
+    return variables
+
+
+class AsyncCheckpointWriter(object):
+    """Writes checkpoints on a background thread and keeps the last `keep` of them.
+
+    The caller snapshots the training state into host arrays at a step boundary, e.g.
+    with GANBase.get_checkpoint_state, and write() returns as soon as the write is
+    queued.  Files are named after the step, written to a temporary file and renamed,
+    so a crash never leaves a partial checkpoint, and the oldest ones are deleted once
+    a newer one is complete.  At most `max_pending` snapshots wait to be written; after
+    that write blocks until the oldest one is done, which bounds the memory they hold.
+
+    Example usage:
+        writer = AsyncCheckpointWriter('checkpoints', keep=3)
+        header, arrays = gan.get_checkpoint_state()
+        writer.write(gan.global_step, header, arrays)
+        ...
+        writer.close()
+        gan.load_checkpoint(writer.latest())
+
+    :param directory: folder of the checkpoint files
+    :param prefix: start of the checkpoint file names
+    :param keep: number of checkpoints kept, None keeps all of them
+    :param max_pending: number of snapshots that may be waiting to be written
+    """
+
+    def __init__(self, directory, prefix="checkpoint", keep=3, max_pending=1):
+        if keep is not None and keep < 1:
+            raise ValueError("At least one checkpoint has to be kept")
+        self.directory = directory
+        self.prefix = prefix
+        # Anchored on the step, so that e.g. "wgan" does not match the files of "wgan_gp"
+        self.pattern = re.compile(r"^%s_(\d+)\.ckpt$" % re.escape(prefix))
+        self.keep = keep
+        self.max_pending = max_pending
+        self.executor = None
+        self.pending = deque()
+
+    def get_path(self, step):
+        return os.path.join(self.directory, "%s_%09d.ckpt" % (self.prefix, step))
+
+    def list_checkpoints(self):
+        """Paths of the complete checkpoints, oldest first"""
+        if not os.path.isdir(self.directory):
+            return []
+        matches = [self.pattern.match(name) for name in os.listdir(self.directory)]
+        steps = sorted((int(match.group(1)), match.group(0)) for match in matches if match)
+        return [os.path.join(self.directory, name) for _, name in steps]
+
+    def latest(self):
+        paths = self.list_checkpoints()
+        return paths[-1] if paths else None
+
+    def write(self, step, header, arrays):
+        """
+        Queue a checkpoint of step.  The arrays must not be modified afterwards, which
+        holds for the fresh copies returned by keras.backend.batch_get_value.
+
+        :param step: global step, which names the file
+        :param header: see write_checkpoint
+        :param arrays: see write_checkpoint
+        """
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=1)
+        self.pending.append(self.executor.submit(self.write_and_rotate, self.get_path(step), header, arrays))
+        while len(self.pending) > self.max_pending:
+            self.pending.popleft().result()
+
+    def write_and_rotate(self, path, header, arrays):
+        write_checkpoint(path, header, arrays)
+        if self.keep is not None:
+            for old_path in self.list_checkpoints()[:-self.keep]:
+                os.unlink(old_path)
+        return path
+
+    def flush(self):
+        """Wait until every queued checkpoint is written, raising the first error of a write"""
+        while self.pending:
+            self.pending.popleft().result()
+
+    def close(self):
+        self.flush()
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
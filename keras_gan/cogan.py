@@ -1,9 +1,7 @@
 from __future__ import print_function, division
 
-import matplotlib.pyplot as plt
 import numpy as np
 import scipy
-from keras.datasets import mnist
 from keras.layers import BatchNormalization
 from keras.layers import Input, Dense, Reshape, Flatten
 from keras.layers.advanced_activations import LeakyReLU
@@ -110,63 +108,52 @@ class COGAN(GANBase):
 
         return Model(img1, validity1), Model(img2, validity2)
 
-    def train(self, epochs, batch_size=128, sample_interval=50):
-
-        # Load the dataset
-        (X_train, _), (_, _) = mnist.load_data()
-
-        # Rescale -1 to 1
-        X_train = (X_train.astype(np.float32) - 127.5) / 127.5
-        X_train = np.expand_dims(X_train, axis=3)
+    def setup_training(self, batch_size):
+        # Load the dataset (rescaled -1 to 1)
+        X_train, _ = self.load_dataset()
 
         # Images in domain A and B (rotated)
-        X1 = X_train[:int(X_train.shape[0] / 2)]
+        self.X1 = X_train[:int(X_train.shape[0] / 2)]
         X2 = X_train[int(X_train.shape[0] / 2):]
-        X2 = scipy.ndimage.interpolation.rotate(X2, 90, axes=(1, 2))
+        self.X2 = scipy.ndimage.interpolation.rotate(X2, 90, axes=(1, 2))
 
         # Adversarial ground truths
-        valid = np.ones((batch_size, 1))
-        fake = np.zeros((batch_size, 1))
-
-        for epoch in range(epochs):
-
-            # ----------------------
-            #  Train Discriminators
-            # ----------------------
+        self.valid = self.get_labels((batch_size, 1), 1)
+        self.fake = self.get_labels((batch_size, 1), 0)
 
-            # Select a random batch of images
-            idx = np.random.randint(0, X1.shape[0], batch_size)
-            imgs1 = X1[idx]
-            imgs2 = X2[idx]
+    def train_step(self, data, batch_size):
+        # Sample noise as generator input, shared by the discriminator and generator steps
+        noise = np.random.normal(0, 1, (batch_size, 100))
 
-            # Sample noise as generator input
-            noise = np.random.normal(0, 1, (batch_size, 100))
+        d1_loss, d2_loss = self.train_discriminator(noise, batch_size)
+        g_loss = self.train_generator(noise)
+        return {"d_loss": d1_loss, "d2_loss": d2_loss, "g_loss": g_loss}
 
-            # Generate a batch of new images
-            gen_imgs1 = self.g1.predict(noise)
-            gen_imgs2 = self.g2.predict(noise)
+    def train_discriminator(self, noise, batch_size):
+        # Select the next batch of images
+        imgs1, imgs2 = self.next_batch(batch_size, self.X1, self.X2)
 
-            # Train the discriminators
-            d1_loss_real = self.d1.train_on_batch(imgs1, valid)
-            d2_loss_real = self.d2.train_on_batch(imgs2, valid)
-            d1_loss_fake = self.d1.train_on_batch(gen_imgs1, fake)
-            d2_loss_fake = self.d2.train_on_batch(gen_imgs2, fake)
-            d1_loss = 0.5 * np.add(d1_loss_real, d1_loss_fake)
-            d2_loss = 0.5 * np.add(d2_loss_real, d2_loss_fake)
-
-            # ------------------
-            #  Train Generators
-            # ------------------
+        # Generate a batch of new images
+        gen_imgs1 = self.g1.predict(noise)
+        gen_imgs2 = self.g2.predict(noise)
 
-            g_loss = self.combined.train_on_batch(noise, [valid, valid])
+        # Train the discriminators
+        d1_loss_real = self.d1.train_on_batch(imgs1, self.valid)
+        d2_loss_real = self.d2.train_on_batch(imgs2, self.valid)
+        d1_loss_fake = self.d1.train_on_batch(gen_imgs1, self.fake)
+        d2_loss_fake = self.d2.train_on_batch(gen_imgs2, self.fake)
+        d1_loss = 0.5 * np.add(d1_loss_real, d1_loss_fake)
+        d2_loss = 0.5 * np.add(d2_loss_real, d2_loss_fake)
+        return d1_loss, d2_loss
 
-            # Plot the progress
-            print("%d [D1 loss: %f, acc.: %.2f%%] [D2 loss: %f, acc.: %.2f%%] [G loss: %f]" \
-                  % (epoch, d1_loss[0], 100 * d1_loss[1], d2_loss[0], 100 * d2_loss[1], g_loss[0]))
+    def train_generator(self, noise):
+        g_loss = self.combined.train_on_batch(noise, [self.valid, self.valid])
+        return g_loss
 
-            # If at save interval => save generated image samples
-            if epoch % sample_interval == 0:
-                self.sample_images(epoch)
+    def format_progress(self, epoch, batch, logs):
+        d1_loss, d2_loss, g_loss = logs["d_loss"], logs["d2_loss"], logs["g_loss"]
+        return "%d [D1 loss: %f, acc.: %.2f%%] [D2 loss: %f, acc.: %.2f%%] [G loss: %f]" \
+               % (epoch, d1_loss[0], 100 * d1_loss[1], d2_loss[0], 100 * d2_loss[1], g_loss[0])
 
     def sample_images(self, epoch):
         r, c = 4, 4
@@ -179,15 +166,7 @@ class COGAN(GANBase):
         # Rescale images 0 - 1
         gen_imgs = 0.5 * gen_imgs + 0.5
 
-        fig, axs = plt.subplots(r, c)
-        cnt = 0
-        for i in range(r):
-            for j in range(c):
-                axs[i, j].imshow(gen_imgs[cnt, :, :, 0], cmap='gray')
-                axs[i, j].axis('off')
-                cnt += 1
-        fig.savefig("images/mnist_%d.png" % epoch)
-        plt.close()
+        self.save_grid("images/mnist_%d.png" % epoch, gen_imgs, r, c)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,33 @@
+from __future__ import print_function, division
+
+import keras.backend as K
+from keras.constraints import Constraint
+
+
+class WeightClip(Constraint):
+    """Clips weights to [-clip_value, clip_value], as in the WGAN critic.
+
+    Keras applies constraints inside the optimizer's update op, so the weights are
+    clipped on the device right after every train_on_batch step, without copying them
+    to the host.
+
+    Example usage:
+        clip = WeightClip(0.01)
+        model.add(Dense(256, **clip.layer_kwargs()))
+        model.add(BatchNormalization(**clip.layer_kwargs(batch_normalization=True)))
+    """
+
+    def __init__(self, clip_value=0.01):
+        self.clip_value = clip_value
+
+    def __call__(self, w):
+        return K.clip(w, -self.clip_value, self.clip_value)
+
+    def layer_kwargs(self, batch_normalization=False):
+        """Keyword arguments constraining every trainable weight of a layer"""
+        if batch_normalization:
+            return {'gamma_constraint': self, 'beta_constraint': self}
+        return {'kernel_constraint': self, 'bias_constraint': self}
+
+    def get_config(self):
+        return {'clip_value': self.clip_value}
@@ -1,6 +1,5 @@
 from __future__ import print_function, division
 
-import matplotlib.pyplot as plt
 import numpy as np
 from keras.datasets import cifar10
 from keras.layers import BatchNormalization, Activation
@@ -10,6 +9,8 @@ from keras.layers.convolutional import UpSampling2D, Conv2D
 from keras.models import Sequential, Model
 from keras.optimizers import Adam
 
+from .dataset_store import to_tanh
+from .masking import mask_randomly
 from .gan_base import GANBase
 
 
@@ -113,76 +114,58 @@ class ContextEncoder(GANBase):
 
         return Model(img, validity)
 
-    def mask_randomly(self, imgs):
-        y1 = np.random.randint(0, self.img_rows - self.mask_height, imgs.shape[0])
-        y2 = y1 + self.mask_height
-        x1 = np.random.randint(0, self.img_rows - self.mask_width, imgs.shape[0])
-        x2 = x1 + self.mask_width
-
-        masked_imgs = np.empty_like(imgs)
-        missing_parts = np.empty((imgs.shape[0], self.mask_height, self.mask_width, self.channels))
-        for i, img in enumerate(imgs):
-            masked_img = img.copy()
-            _y1, _y2, _x1, _x2 = y1[i], y2[i], x1[i], x2[i]
-            missing_parts[i] = masked_img[_y1:_y2, _x1:_x2, :].copy()
-            masked_img[_y1:_y2, _x1:_x2, :] = 0
-            masked_imgs[i] = masked_img
-
-        return masked_imgs, missing_parts, (y1, y2, x1, x2)
-
-    def train(self, epochs, batch_size=128, sample_interval=50):
-
-        # Load the dataset
+    def load_cats_and_dogs(self):
         (X_train, y_train), (_, _) = cifar10.load_data()
 
         # Extract dogs and cats
         X_cats = X_train[(y_train == 3).flatten()]
         X_dogs = X_train[(y_train == 5).flatten()]
-        X_train = np.vstack((X_cats, X_dogs))
+        return to_tanh(np.vstack((X_cats, X_dogs)))
 
-        # Rescale -1 to 1
-        X_train = X_train / 175.5 - 1.
-        y_train = y_train.reshape(-1, 1)
-
-        # Adversarial ground truths
-        valid = np.ones((batch_size, 1))
-        fake = np.zeros((batch_size, 1))
+    def mask_randomly(self, imgs):
+        return mask_randomly(imgs, (self.mask_height, self.mask_width))
 
-        for epoch in range(epochs):
+    def setup_training(self, batch_size):
+        # Load the dogs and cats (rescaled -1 to 1)
+        self.X_train = self.dataset_store.cached('cifar10', 'x_tanh_cats_dogs', self.load_cats_and_dogs)
 
-            # ---------------------
-            #  Train Discriminator
-            # ---------------------
+        # Adversarial ground truths
+        self.valid = self.get_labels((batch_size, 1), 1)
+        self.fake = self.get_labels((batch_size, 1), 0)
 
-            # Select a random batch of images
-            idx = np.random.randint(0, X_train.shape[0], batch_size)
-            imgs = X_train[idx]
+    def train_step(self, data, batch_size):
+        # Select the next batch of images
+        imgs = self.next_batch(batch_size, self.X_train)
 
-            masked_imgs, missing_parts, _ = self.mask_randomly(imgs)
+        masked_imgs, missing_parts, _ = self.mask_randomly(imgs)
 
-            # Generate a batch of new images
-            gen_missing = self.generator.predict(masked_imgs)
+        d_loss = self.train_discriminator(masked_imgs, missing_parts)
+        g_loss = self.train_generator(masked_imgs, missing_parts)
+        return {"d_loss": d_loss, "g_loss": g_loss}
 
-            # Train the discriminator
-            d_loss_real = self.discriminator.train_on_batch(missing_parts, valid)
-            d_loss_fake = self.discriminator.train_on_batch(gen_missing, fake)
-            d_loss = 0.5 * np.add(d_loss_real, d_loss_fake)
+    def train_discriminator(self, masked_imgs, missing_parts):
+        # Generate a batch of new images
+        gen_missing = self.generator.predict(masked_imgs)
 
-            # ---------------------
-            #  Train Generator
-            # ---------------------
+        # Train the discriminator
+        d_loss_real = self.discriminator.train_on_batch(missing_parts, self.valid)
+        d_loss_fake = self.discriminator.train_on_batch(gen_missing, self.fake)
+        d_loss = 0.5 * np.add(d_loss_real, d_loss_fake)
+        return d_loss
 
-            g_loss = self.combined.train_on_batch(masked_imgs, [missing_parts, valid])
+    def train_generator(self, masked_imgs, missing_parts):
+        g_loss = self.combined.train_on_batch(masked_imgs, [missing_parts, self.valid])
+        return g_loss
 
-            # Plot the progress
-            print("%d [D loss: %f, acc: %.2f%%] [G loss: %f, mse: %f]" % (
-            epoch, d_loss[0], 100 * d_loss[1], g_loss[0], g_loss[1]))
+    def format_progress(self, epoch, batch, logs):
+        d_loss, g_loss = logs["d_loss"], logs["g_loss"]
+        return "%d [D loss: %f, acc: %.2f%%] [G loss: %f, mse: %f]" % (
+            epoch, d_loss[0], 100 * d_loss[1], g_loss[0], g_loss[1])
 
-            # If at save interval => save generated image samples
-            if epoch % sample_interval == 0:
-                idx = np.random.randint(0, X_train.shape[0], 6)
-                imgs = X_train[idx]
-                self.sample_images(epoch, imgs)
+    def save_samples(self, epoch, batch):
+        idx = np.random.randint(0, self.X_train.shape[0], 6)
+        imgs = self.X_train[idx]
+        self.sample_images(epoch, imgs)
 
     def sample_images(self, epoch, imgs):
         r, c = 3, 6
@@ -194,18 +177,10 @@ class ContextEncoder(GANBase):
         masked_imgs = 0.5 * masked_imgs + 0.5
         gen_missing = 0.5 * gen_missing + 0.5
 
-        fig, axs = plt.subplots(r, c)
+        filled_in = imgs[:c].copy()
         for i in range(c):
-            axs[0, i].imshow(imgs[i, :, :])
-            axs[0, i].axis('off')
-            axs[1, i].imshow(masked_imgs[i, :, :])
-            axs[1, i].axis('off')
-            filled_in = imgs[i].copy()
-            filled_in[y1[i]:y2[i], x1[i]:x2[i], :] = gen_missing[i]
-            axs[2, i].imshow(filled_in)
-            axs[2, i].axis('off')
-        fig.savefig("images/%d.png" % epoch)
-        plt.close()
+            filled_in[i, y1[i]:y2[i], x1[i]:x2[i], :] = gen_missing[i]
+        self.save_grid("images/%d.png" % epoch, np.concatenate([imgs[:c], masked_imgs[:c], filled_in]), r, c)
 
     def save_model(self):
 
@@ -1,9 +1,7 @@
 from __future__ import print_function, division
 
 import datetime
-import os
 
-import matplotlib.pyplot as plt
 import numpy as np
 from keras.layers import Input, Dropout, Concatenate
 from keras.layers.advanced_activations import LeakyReLU
@@ -17,6 +15,10 @@ from .gan_base import GANBase
 
 
 class CycleGAN(GANBase):
+
+    # Trains on every batch of the DataLoader, samples are scheduled by batch
+    steps_per_epoch = None
+
     def __init__(self, *args, **kwargs):
         super(CycleGAN, self).__init__(*args, **kwargs)
         # Input shape
@@ -43,8 +45,10 @@ class CycleGAN(GANBase):
         self.lambda_id = 0.1 * self.lambda_cycle  # Identity loss
 
         # Build and compile the discriminators
-        self.d_A = self.build_discriminator()
-        self.d_B = self.build_discriminator()
+        custom_objects = {'InstanceNormalization': InstanceNormalization}
+        d_params = {'img_shape': self.img_shape, 'df': self.df}
+        self.d_A = self.cached_build('d_A', d_params, self.build_discriminator, custom_objects)
+        self.d_B = self.cached_build('d_B', d_params, self.build_discriminator, custom_objects)
         self.d_A.compile(loss='mse',
                          optimizer=self.get_optimizer(),
                          metrics=['accuracy'])
@@ -58,8 +62,9 @@ class CycleGAN(GANBase):
         # -------------------------
 
         # Build the generators
-        self.g_AB = self.build_generator()
-        self.g_BA = self.build_generator()
+        g_params = {'img_shape': self.img_shape, 'gf': self.gf, 'channels': self.channels}
+        self.g_AB = self.cached_build('g_AB', g_params, self.build_generator, custom_objects)
+        self.g_BA = self.cached_build('g_BA', g_params, self.build_generator, custom_objects)
 
         # Input images from both domains
         img_A = Input(shape=self.img_shape)
@@ -156,67 +161,71 @@ class CycleGAN(GANBase):
 
         return Model(img, validity)
 
-    def train(self, epochs, batch_size=1, sample_interval=50):
+    def train(self, epochs, batch_size=1, sample_interval=50, prefetch_depth=2, workers=1, **kwargs):
+        return super(CycleGAN, self).train(epochs, batch_size, sample_interval,
+                                          prefetch_depth=prefetch_depth, workers=workers, **kwargs)
 
-        start_time = datetime.datetime.now()
+    def setup_training(self, batch_size, prefetch_depth=2, workers=1):
+        self.prefetch_depth = prefetch_depth
+        self.workers = workers
+        self.start_time = datetime.datetime.now()
 
         # Adversarial loss ground truths
-        valid = np.ones((batch_size,) + self.disc_patch)
-        fake = np.zeros((batch_size,) + self.disc_patch)
-
-        for epoch in range(epochs):
-            for batch_i, (imgs_A, imgs_B) in enumerate(self.data_loader.load_batch(batch_size)):
-
-                # ----------------------
-                #  Train Discriminators
-                # ----------------------
-
-                # Translate images to opposite domain
-                fake_B = self.g_AB.predict(imgs_A)
-                fake_A = self.g_BA.predict(imgs_B)
-
-                # Train the discriminators (original images = real / translated = Fake)
-                dA_loss_real = self.d_A.train_on_batch(imgs_A, valid)
-                dA_loss_fake = self.d_A.train_on_batch(fake_A, fake)
-                dA_loss = 0.5 * np.add(dA_loss_real, dA_loss_fake)
-
-                dB_loss_real = self.d_B.train_on_batch(imgs_B, valid)
-                dB_loss_fake = self.d_B.train_on_batch(fake_B, fake)
-                dB_loss = 0.5 * np.add(dB_loss_real, dB_loss_fake)
-
-                # Total disciminator loss
-                d_loss = 0.5 * np.add(dA_loss, dB_loss)
-
-                # ------------------
-                #  Train Generators
-                # ------------------
-
-                # Train the generators
-                g_loss = self.combined.train_on_batch([imgs_A, imgs_B],
-                                                      [valid, valid,
-                                                       imgs_A, imgs_B,
-                                                       imgs_A, imgs_B])
-
-                elapsed_time = datetime.datetime.now() - start_time
-
-                # Plot the progress
-                print(
-                    "[Epoch %d/%d] [Batch %d/%d] [D loss: %f, acc: %3d%%] [G loss: %05f, adv: %05f, recon: %05f, id: %05f] time: %s " \
-                    % (epoch, epochs,
-                       batch_i, self.data_loader.n_batches,
-                       d_loss[0], 100 * d_loss[1],
-                       g_loss[0],
-                       np.mean(g_loss[1:3]),
-                       np.mean(g_loss[3:5]),
-                       np.mean(g_loss[5:6]),
-                       elapsed_time))
-
-                # If at save interval => save generated image samples
-                if batch_i % sample_interval == 0:
-                    self.sample_images(epoch, batch_i)
+        self.valid = self.get_labels((batch_size,) + self.disc_patch, 1)
+        self.fake = self.get_labels((batch_size,) + self.disc_patch, 0)
+
+    def iterate_batches(self, batch_size):
+        return self.data_loader.load_batch(batch_size, prefetch_depth=self.prefetch_depth, workers=self.workers)
+
+    def train_step(self, data, batch_size):
+        imgs_A, imgs_B = data
+        d_loss = self.train_discriminator(imgs_A, imgs_B)
+        g_loss = self.train_generator(imgs_A, imgs_B)
+        return {"d_loss": d_loss, "g_loss": g_loss}
+
+    def train_discriminator(self, imgs_A, imgs_B):
+        # Translate images to opposite domain
+        fake_B = self.g_AB.predict(imgs_A)
+        fake_A = self.g_BA.predict(imgs_B)
+
+        # Train the discriminators (original images = real / translated = Fake)
+        dA_loss_real = self.d_A.train_on_batch(imgs_A, self.valid)
+        dA_loss_fake = self.d_A.train_on_batch(fake_A, self.fake)
+        dA_loss = 0.5 * np.add(dA_loss_real, dA_loss_fake)
+
+        dB_loss_real = self.d_B.train_on_batch(imgs_B, self.valid)
+        dB_loss_fake = self.d_B.train_on_batch(fake_B, self.fake)
+        dB_loss = 0.5 * np.add(dB_loss_real, dB_loss_fake)
+
+        # Total disciminator loss
+        d_loss = 0.5 * np.add(dA_loss, dB_loss)
+        return d_loss
+
+    def train_generator(self, imgs_A, imgs_B):
+        # Train the generators
+        g_loss = self.combined.train_on_batch([imgs_A, imgs_B],
+                                              [self.valid, self.valid,
+                                               imgs_A, imgs_B,
+                                               imgs_A, imgs_B])
+        return g_loss
+
+    def format_progress(self, epoch, batch, logs):
+        d_loss, g_loss = logs["d_loss"], logs["g_loss"]
+        elapsed_time = datetime.datetime.now() - self.start_time
+        return "[Epoch %d/%d] [Batch %d/%d] [D loss: %f, acc: %3d%%] [G loss: %05f, adv: %05f, recon: %05f, id: %05f] time: %s " \
+               % (epoch, self.epochs,
+                  batch, self.data_loader.n_batches,
+                  d_loss[0], 100 * d_loss[1],
+                  g_loss[0],
+                  np.mean(g_loss[1:3]),
+                  np.mean(g_loss[3:5]),
+                  np.mean(g_loss[5:6]),
+                  elapsed_time)
+
+    def save_samples(self, epoch, batch):
+        self.sample_images(epoch, batch)
 
     def sample_images(self, epoch, batch_i):
-        os.makedirs('images/%s' % self.dataset_name, exist_ok=True)
         r, c = 2, 3
 
         imgs_A = self.data_loader.load_data(domain="A", batch_size=1, is_testing=True)
@@ -239,16 +248,7 @@ class CycleGAN(GANBase):
         gen_imgs = 0.5 * gen_imgs + 0.5
 
         titles = ['Original', 'Translated', 'Reconstructed']
-        fig, axs = plt.subplots(r, c)
-        cnt = 0
-        for i in range(r):
-            for j in range(c):
-                axs[i, j].imshow(gen_imgs[cnt])
-                axs[i, j].set_title(titles[j])
-                axs[i, j].axis('off')
-                cnt += 1
-        fig.savefig("images/%s/%d_%d.png" % (self.dataset_name, epoch, batch_i))
-        plt.close()
+        self.save_grid("images/%s/%d_%d.png" % (self.dataset_name, epoch, batch_i), gen_imgs, r, c, titles * r)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,24 @@
+from __future__ import print_function, division
+
+import numpy as np
+
+
+def empty_batch(batch_size, img_res, channels=3):
+    """Preallocated float32 buffer that a batch of images is decoded into"""
+    return np.empty((batch_size,) + tuple(img_res) + (channels,), dtype=np.float32)
+
+
+def random_flips(batch_size, is_testing=False):
+    """Boolean mask of the images to flip, one draw for the whole batch"""
+    if is_testing:
+        return np.zeros(batch_size, dtype=bool)
+    return np.random.random(batch_size) > 0.5
+
+
+def flip_and_normalize(imgs, flips):
+    """Flip the masked images left-right and rescale the batch from 0..255 to -1..1, in place"""
+    if flips.any():
+        imgs[flips] = imgs[flips, :, ::-1]
+    imgs /= 127.5
+    imgs -= 1.
+    return imgs
@@ -1,40 +1,28 @@
-from glob import glob
-
 import numpy as np
 import scipy
 
+from ..batching import random_flips
+from ..folder_loader import FolderDataLoader
+from ..prefetch import prefetch
 
-class DataLoader():
-    def __init__(self, dataset_name, img_res=(128, 128)):
-        self.dataset_name = dataset_name
-        self.img_res = img_res
-
-    def load_data(self, domain, batch_size=1, is_testing=False):
-        data_type = "train%s" % domain if not is_testing else "test%s" % domain
-        path = glob('./datasets/%s/%s/*' % (self.dataset_name, data_type))
-
-        batch_images = np.random.choice(path, size=batch_size)
-
-        imgs = []
-        for img_path in batch_images:
-            img = self.imread(img_path)
-            if not is_testing:
-                img = scipy.misc.imresize(img, self.img_res)
 
-                if np.random.random() > 0.5:
-                    img = np.fliplr(img)
-            else:
-                img = scipy.misc.imresize(img, self.img_res)
-            imgs.append(img)
+class DataLoader(FolderDataLoader):
+    """Loads unpaired datasets, e.g. apple2orange, with the images of each domain in their own folders"""
 
-        imgs = np.array(imgs)/127.5 - 1.
+    def read_record(self, path):
+        return {'img': scipy.misc.imresize(self.imread(path), self.img_res)}
 
+    def load_data(self, domain, batch_size=1, is_testing=False):
+        data_type = "train%s" % domain if not is_testing else "test%s" % domain
+        shards, batch = self.sample(data_type, batch_size)
+        imgs, = self.read_images(shards, batch, random_flips(batch_size, is_testing))
         return imgs
 
-    def load_batch(self, batch_size=1, is_testing=False):
+    def load_batch(self, batch_size=1, is_testing=False, prefetch_depth=0, workers=1, use_processes=False):
         data_type = "train" if not is_testing else "val"
-        path_A = glob('./datasets/%s/%sA/*' % (self.dataset_name, data_type))
-        path_B = glob('./datasets/%s/%sB/*' % (self.dataset_name, data_type))
+        # Record indices of compiled folders, else paths
+        shards_A, path_A = self.get_items("%sA" % data_type)
+        shards_B, path_B = self.get_items("%sB" % data_type)
 
         self.n_batches = int(min(len(path_A), len(path_B)) / batch_size)
         total_samples = self.n_batches * batch_size
@@ -44,34 +32,19 @@ class DataLoader():
         path_A = np.random.choice(path_A, total_samples, replace=False)
         path_B = np.random.choice(path_B, total_samples, replace=False)
 
-        for i in range(self.n_batches-1):
-            batch_A = path_A[i*batch_size:(i+1)*batch_size]
-            batch_B = path_B[i*batch_size:(i+1)*batch_size]
-            imgs_A, imgs_B = [], []
-            for img_A, img_B in zip(batch_A, batch_B):
-                img_A = self.imread(img_A)
-                img_B = self.imread(img_B)
-
-                img_A = scipy.misc.imresize(img_A, self.img_res)
-                img_B = scipy.misc.imresize(img_B, self.img_res)
-
-                if not is_testing and np.random.random() > 0.5:
-                        img_A = np.fliplr(img_A)
-                        img_B = np.fliplr(img_B)
-
-                imgs_A.append(img_A)
-                imgs_B.append(img_B)
-
-            imgs_A = np.array(imgs_A)/127.5 - 1.
-            imgs_B = np.array(imgs_B)/127.5 - 1.
-
-            yield imgs_A, imgs_B
-
-    def load_img(self, path):
-        img = self.imread(path)
-        img = scipy.misc.imresize(img, self.img_res)
-        img = img/127.5 - 1.
-        return img[np.newaxis, :, :, :]
-
-    def imread(self, path):
-        return scipy.misc.imread(path, mode='RGB').astype(np.float)
+        def batches():
+            for i in range(self.n_batches-1):
+                batch_A = path_A[i*batch_size:(i+1)*batch_size]
+                batch_B = path_B[i*batch_size:(i+1)*batch_size]
+                # Draw the flips here so that every worker sees the same random stream
+                flips = random_flips(batch_size, is_testing)
+                yield shards_A, batch_A, shards_B, batch_B, flips
+
+        return prefetch(self.read_batch, batches(), depth=prefetch_depth, workers=workers,
+                        use_processes=use_processes)
+
+    def read_batch(self, batch):
+        shards_A, batch_A, shards_B, batch_B, flips = batch
+        imgs_A, = self.read_images(shards_A, batch_A, flips)
+        imgs_B, = self.read_images(shards_B, batch_B, flips)
+        return imgs_A, imgs_B
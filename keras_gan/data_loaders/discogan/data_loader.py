@@ -1,79 +1,7 @@
-from glob import glob
+from ..folder_loader import PairedFolderDataLoader
 
-import numpy as np
-import scipy
 
+class DataLoader(PairedFolderDataLoader):
+    """Loads DiscoGAN datasets, e.g. edges2shoes, whose images hold the A and B images side by side"""
 
-class DataLoader():
-    def __init__(self, dataset_name, img_res=(128, 128)):
-        self.dataset_name = dataset_name
-        self.img_res = img_res
-
-    def load_data(self, batch_size=1, is_testing=False):
-        data_type = "train" if not is_testing else "val"
-        path = glob('./datasets/%s/%s/*' % (self.dataset_name, data_type))
-
-        batch = np.random.choice(path, size=batch_size)
-
-        imgs_A, imgs_B = [], []
-        for img in batch:
-            img = self.imread(img)
-            h, w, _ = img.shape
-            half_w = int(w/2)
-            img_A = img[:, :half_w, :]
-            img_B = img[:, half_w:, :]
-
-            img_A = scipy.misc.imresize(img_A, self.img_res)
-            img_B = scipy.misc.imresize(img_B, self.img_res)
-
-            if not is_testing and np.random.random() > 0.5:
-                    img_A = np.fliplr(img_A)
-                    img_B = np.fliplr(img_B)
-
-            imgs_A.append(img_A)
-            imgs_B.append(img_B)
-
-        imgs_A = np.array(imgs_A)/127.5 - 1.
-        imgs_B = np.array(imgs_B)/127.5 - 1.
-
-        return imgs_A, imgs_B
-
-    def load_batch(self, batch_size=1, is_testing=False):
-        data_type = "train" if not is_testing else "val"
-        path = glob('./datasets/%s/%s/*' % (self.dataset_name, data_type))
-
-        self.n_batches = int(len(path) / batch_size)
-
-        for i in range(self.n_batches-1):
-            batch = path[i*batch_size:(i+1)*batch_size]
-            imgs_A, imgs_B = [], []
-            for img in batch:
-                img = self.imread(img)
-                h, w, _ = img.shape
-                half_w = int(w/2)
-                img_A = img[:, :half_w, :]
-                img_B = img[:, half_w:, :]
-
-                img_A = scipy.misc.imresize(img_A, self.img_res)
-                img_B = scipy.misc.imresize(img_B, self.img_res)
-
-                if not is_testing and np.random.random() > 0.5:
-                        img_A = np.fliplr(img_A)
-                        img_B = np.fliplr(img_B)
-
-                imgs_A.append(img_A)
-                imgs_B.append(img_B)
-
-            imgs_A = np.array(imgs_A)/127.5 - 1.
-            imgs_B = np.array(imgs_B)/127.5 - 1.
-
-            yield imgs_A, imgs_B
-
-    def load_img(self, path):
-        img = self.imread(path)
-        img = scipy.misc.imresize(img, self.img_res)
-        img = img/127.5 - 1.
-        return img[np.newaxis, :, :, :]
-
-    def imread(self, path):
-        return scipy.misc.imread(path, mode='RGB').astype(np.float)
+    test_data_type = 'val'
@@ -0,0 +1,183 @@
+from __future__ import print_function, division
+
+import os
+
+import numpy as np
+import scipy
+
+from .batching import empty_batch, flip_and_normalize, random_flips
+from .path_index import PathIndex, get_manifest_path
+from .prefetch import prefetch
+from .shards import ShardedDataset, compile_dataset, get_shard_dir
+
+
+class FolderDataLoader(object):
+    """Base of the data loaders of image folder datasets, ./datasets/<name>/<data_type>/.
+
+    The files of every folder are listed once and saved to a manifest (see PathIndex).
+    A folder compiled into shards (see compile) is read from the memory-mapped shards,
+    otherwise its images are decoded by read_record.  Either way a batch is written into
+    preallocated float32 buffers, flipped and normalized to -1 to 1 in place.
+
+    Subclasses define read_record, which maps an image path to a dict of uint8 images
+    with the keys in `fields`, and the load_data/load_batch methods of their GANs.
+
+    :param dataset_name: folder of the dataset in ./datasets
+    :param img_res: (height, width) the images are resized to
+    """
+
+    # Keys of the records of read_record, in the order read_images returns them
+    fields = ('img',)
+
+    def __init__(self, dataset_name, img_res=(128, 128)):
+        self.dataset_name = dataset_name
+        self.img_res = img_res
+        self.shards = {}
+        self.indexes = {}
+
+    def get_folder(self, data_type):
+        return './datasets/%s/%s' % (self.dataset_name, data_type)
+
+    def get_data_types(self):
+        """Image folders of the dataset, skipping the 'compiled' folder of the shards"""
+        root = './datasets/%s' % self.dataset_name
+        return [d for d in sorted(os.listdir(root)) if d != 'compiled' and os.path.isdir(os.path.join(root, d))]
+
+    def compile(self, data_types=None, shard_size=1024):
+        """
+        Decode and resize every image once into memory-mapped shards, which the loader
+        then reads instead of the JPEG files.
+
+        :param data_types: folders to compile, e.g. ['trainA', 'trainB'], defaults to all
+        :param shard_size: number of records per shard file
+        """
+        for data_type in data_types or self.get_data_types():
+            shard_dir = get_shard_dir(self.dataset_name, data_type, self.img_res)
+            self.shards[data_type] = compile_dataset(self.get_index(data_type).paths, shard_dir, self.read_record,
+                                                     shard_size)
+
+    def get_shards(self, data_type):
+        """Compiled shards of a folder, or None if it has not been compiled"""
+        if data_type not in self.shards:
+            shard_dir = get_shard_dir(self.dataset_name, data_type, self.img_res)
+            self.shards[data_type] = ShardedDataset.open(shard_dir)
+        return self.shards[data_type]
+
+    def get_index(self, data_type):
+        """File listing of a folder, built once and saved to a manifest"""
+        if data_type not in self.indexes:
+            self.indexes[data_type] = PathIndex(self.get_folder(data_type),
+                                                get_manifest_path(self.dataset_name, data_type))
+        return self.indexes[data_type]
+
+    def get_items(self, data_type):
+        """
+        Items of a folder and its shards: the record indices of a compiled folder, else
+        the image paths.
+
+        :return (shards, items): shards is None for a folder that is not compiled
+        """
+        shards = self.get_shards(data_type)
+        if shards is not None:
+            return shards, np.arange(len(shards))
+        return None, self.get_index(data_type).paths
+
+    def sample(self, data_type, batch_size):
+        """
+        Random items of a folder, with replacement.
+
+        :return (shards, batch): sorted record indices of a compiled folder, else paths
+        """
+        shards = self.get_shards(data_type)
+        if shards is not None:
+            return shards, np.sort(np.random.randint(0, len(shards), batch_size))
+        return None, self.get_index(data_type).sample(batch_size)
+
+    def get_res(self, field):
+        """(height, width) of the images of a record field"""
+        return self.img_res
+
+    def read_record(self, path):
+        raise NotImplementedError
+
+    def read_images(self, shards, batch, flips):
+        """
+        Normalized images of a batch, one float32 array per field.
+
+        :param shards: shards the batch indexes, None if it is made of paths
+        :param batch: record indices (array or slice) of the shards, or image paths
+        :param flips: boolean array of the images to flip, one per image
+        :return imgs: list of arrays in the order of `fields`
+        """
+        imgs = [empty_batch(len(flips), self.get_res(field)) for field in self.fields]
+        if shards is not None:
+            for field, field_imgs in zip(self.fields, imgs):
+                field_imgs[...] = shards.batch(field, batch)
+        else:
+            for i, img_path in enumerate(batch):
+                record = self.read_record(img_path)
+                for field, field_imgs in zip(self.fields, imgs):
+                    field_imgs[i] = record[field]
+        return [flip_and_normalize(field_imgs, flips) for field_imgs in imgs]
+
+    def imread(self, path):
+        return scipy.misc.imread(path, mode='RGB')
+
+    def load_img(self, path):
+        img = self.imread(path)
+        img = scipy.misc.imresize(img, self.img_res)
+        img = img/127.5 - 1.
+        return img[np.newaxis, :, :, :]
+
+
+class PairedFolderDataLoader(FolderDataLoader):
+    """Loads datasets whose images hold an A and a B image side by side, e.g. facades or edges2shoes
+
+    :param dataset_name: folder of the dataset in ./datasets
+    :param img_res: (height, width) the images are resized to
+    """
+
+    fields = ('A', 'B')
+    # Folder of the images of load_data(is_testing=True)
+    test_data_type = 'val'
+
+    def read_record(self, path):
+        img = self.imread(path)
+
+        h, w, _ = img.shape
+        half_w = int(w/2)
+        img_A, img_B = img[:, :half_w, :], img[:, half_w:, :]
+
+        img_A = scipy.misc.imresize(img_A, self.img_res)
+        img_B = scipy.misc.imresize(img_B, self.img_res)
+
+        return {'A': img_A, 'B': img_B}
+
+    def load_data(self, batch_size=1, is_testing=False):
+        data_type = "train" if not is_testing else self.test_data_type
+        shards, batch = self.sample(data_type, batch_size)
+        return tuple(self.read_images(shards, batch, random_flips(batch_size, is_testing)))
+
+    def load_batch(self, batch_size=1, is_testing=False, prefetch_depth=0, workers=1, use_processes=False):
+        data_type = "train" if not is_testing else "val"
+        shards, items = self.get_items(data_type)
+
+        self.n_batches = int(len(items) / batch_size)
+
+        def batches():
+            for i in range(self.n_batches-1):
+                if shards is not None:
+                    # Consecutive records, i.e. zero-copy slices of the shards
+                    batch = slice(i*batch_size, (i+1)*batch_size)
+                else:
+                    batch = items[i*batch_size:(i+1)*batch_size]
+                # Draw the flips here so that every worker sees the same random stream
+                flips = random_flips(batch_size, is_testing)
+                yield shards, batch, flips
+
+        return prefetch(self.read_batch, batches(), depth=prefetch_depth, workers=workers,
+                        use_processes=use_processes)
+
+    def read_batch(self, batch):
+        shards, batch, flips = batch
+        return tuple(self.read_images(shards, batch, flips))
@@ -0,0 +1,76 @@
+from __future__ import print_function, division
+
+import json
+import os
+import tempfile
+
+import numpy as np
+
+
+def get_manifest_path(dataset_name, data_type):
+    """Manifest of the file listing of one folder of a dataset"""
+    return './datasets/%s/compiled/%s_manifest.json' % (dataset_name, data_type)
+
+
+def list_files(folder):
+    """Sorted paths of the files in a folder, skipping sub folders such as 'compiled'"""
+    # scandir gets the file types along with the names, without a stat call per file
+    return sorted(entry.path for entry in os.scandir(folder) if entry.is_file())
+
+
+class PathIndex(object):
+    """File listing of a dataset folder, built once.
+
+    The listing is kept as an array, so sampling a batch of paths costs O(batch_size)
+    instead of a glob and a list conversion per call.  With a manifest path the listing
+    is also saved to disk and reused by later runs for as long as the folder's
+    modification time, which changes when files are added or removed, is the same.
+
+    Example usage:
+        index = PathIndex('./datasets/facades/train', get_manifest_path('facades', 'train'))
+        batch_paths = index.sample(batch_size)
+
+    :param folder: folder holding the image files
+    :param manifest_path: optional file the listing is saved to
+    """
+
+    def __init__(self, folder, manifest_path=None):
+        self.folder = folder
+        self.manifest_path = manifest_path
+        # Whether the listing was read from the manifest
+        self.from_manifest = False
+        self.paths = self.load()
+
+    def load(self):
+        if self.manifest_path is not None:
+            # The manifest folder may be inside the indexed folder, e.g. for SRGAN's
+            # dataset root, so create it before reading the folder's modification time
+            manifest_folder = os.path.dirname(self.manifest_path)
+            if not os.path.isdir(manifest_folder):
+                os.makedirs(manifest_folder)
+        mtime = os.stat(self.folder).st_mtime
+        if self.manifest_path is not None and os.path.exists(self.manifest_path):
+            with open(self.manifest_path) as f:
+                manifest = json.load(f)
+            if manifest["folder"] == self.folder and manifest["mtime"] == mtime:
+                self.from_manifest = True
+                return np.array(manifest["paths"])
+
+        paths = list_files(self.folder)
+        if self.manifest_path is not None:
+            self.save(paths, mtime)
+        return np.array(paths)
+
+    def save(self, paths, mtime):
+        folder = os.path.dirname(self.manifest_path)
+        fd, tmp_path = tempfile.mkstemp(dir=folder, suffix='.json')
+        with os.fdopen(fd, 'w') as f:
+            json.dump({"folder": self.folder, "mtime": mtime, "paths": paths}, f)
+        os.replace(tmp_path, self.manifest_path)
+
+    def __len__(self):
+        return len(self.paths)
+
+    def sample(self, batch_size):
+        """Random paths, drawn with replacement"""
+        return self.paths[np.random.randint(0, len(self.paths), batch_size)]
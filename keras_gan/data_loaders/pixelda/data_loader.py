@@ -2,85 +2,117 @@ import gzip
 import os
 import pickle
 import urllib
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 
 import numpy as np
 from keras.datasets import mnist
 from skimage.transform import resize as imresize
 
+from ...dataset_store import default_store, to_tanh
+from ..samplers import IndexSampler
+
+
+def resize_chunk(images, img_res):
+    """Resize a chunk of uint8 images in one call, the batch axis is kept as is"""
+    out_shape = (len(images),) + tuple(img_res) + images.shape[3:]
+    resized = imresize(images, out_shape, preserve_range=True, mode='reflect')
+    return np.clip(resized + 0.5, 0, 255).astype(np.uint8)
+
+
+def resize_images(images, img_res, chunk_size=4096, workers=None):
+    """
+    Resize uint8 images to img_res, chunk by chunk in worker processes.
+
+    :param images: uint8 array (n, height, width) or (n, height, width, channels)
+    :param img_res: (height, width) of the output
+    :param chunk_size: number of images resized per task
+    :param workers: number of worker processes, defaults to the number of cores
+    :return images: resized uint8 images
+    """
+    chunks = [images[i:i + chunk_size] for i in range(0, len(images), chunk_size)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return np.concatenate(list(executor.map(partial(resize_chunk, img_res=img_res), chunks)))
+
 
 class DataLoader():
-    """Loads images from MNIST (domain A) and MNIST-M (domain B)"""
-    def __init__(self, img_res=(128, 128)):
+    """Loads images from MNIST (domain A) and MNIST-M (domain B)
+
+    The images are resized once per resolution and cached as uint8 arrays through the
+    dataset store, which memory-maps them so every PixelDA run shares the same data.
+    Batches are drawn without replacement, reshuffling every epoch of a domain, and are
+    normalized to -1 to 1 when they are sampled.  MNIST-M is built from the MNIST
+    training images, in the same order, so load_paired_data draws the batches of both
+    domains with one index draw.
+    """
+    def __init__(self, img_res=(128, 128), dataset_store=None, seed=None):
         self.img_res = img_res
+        self.dataset_store = dataset_store or default_store
+        self.seed = seed
 
         self.mnistm_url = 'https://github.com/VanushVaswani/keras_mnistm/releases/download/1.0/keras_mnistm.pkl.gz'
 
         self.setup_mnist(img_res)
         self.setup_mnistm(img_res)
 
-    def normalize(self, images):
-        return images.astype(np.float32) / 127.5 - 1.
+        self.samplers = {
+            'A': IndexSampler(len(self.mnist_X), seed=seed),
+            'B': IndexSampler(len(self.mnistm_X), seed=None if seed is None else seed + 1),
+            'AB': IndexSampler(len(self.mnist_X), seed=None if seed is None else seed + 2),
+        }
+
+    def get_cache_key(self, img_res):
+        return "x_uint8_{}x{}".format(*img_res)
 
     def setup_mnist(self, img_res):
 
         print ("Setting up MNIST...")
 
-        if not os.path.exists('datasets/mnist_x.npy'):
-            # Load the dataset
-            (mnist_X, mnist_y), (_, _) = mnist.load_data()
+        raw = []
 
-            # Normalize and rescale images
-            mnist_X = self.normalize(mnist_X)
-            mnist_X = np.array([imresize(x, img_res) for x in mnist_X])
-            mnist_X = np.expand_dims(mnist_X, axis=-1)
-            mnist_X = np.repeat(mnist_X, 3, axis=-1)
+        def load_raw():
+            if not raw:
+                (mnist_X, mnist_y), (_, _) = mnist.load_data()
+                raw.append((mnist_X, mnist_y))
+            return raw[0]
 
-            self.mnist_X, self.mnist_y = mnist_X, mnist_y
+        def build():
+            # Rescale images and repeat the gray channel to RGB
+            mnist_X = resize_images(load_raw()[0], img_res)
+            mnist_X = np.expand_dims(mnist_X, axis=-1)
+            return np.repeat(mnist_X, 3, axis=-1)
 
-            # Save formatted images
-            np.save('datasets/mnist_x.npy', self.mnist_X)
-            np.save('datasets/mnist_y.npy', self.mnist_y)
-        else:
-            self.mnist_X = np.load('datasets/mnist_x.npy')
-            self.mnist_y = np.load('datasets/mnist_y.npy')
+        self.mnist_X = self.dataset_store.cached('pixelda_mnist', self.get_cache_key(img_res), build)
+        self.mnist_y = self.dataset_store.cached('pixelda_mnist', 'y', lambda: load_raw()[1])
 
         print ("+ Done.")
 
+    def download_mnistm(self):
+        """Download the MNIST-M pkl file, once, and return its uint8 training images"""
+        filepath = 'datasets/keras_mnistm.pkl.gz'
+        if not os.path.exists(filepath.replace('.gz', '')):
+            print('+ Downloading ' + self.mnistm_url)
+            data = urllib.request.urlopen(self.mnistm_url)
+            with open(filepath, 'wb') as f:
+                f.write(data.read())
+            with open(filepath.replace('.gz', ''), 'wb') as out_f, \
+                    gzip.GzipFile(filepath) as zip_f:
+                out_f.write(zip_f.read())
+            os.unlink(filepath)
+
+        # load MNIST-M images from pkl file
+        with open('datasets/keras_mnistm.pkl', "rb") as f:
+            data = pickle.load(f, encoding='bytes')
+        return np.array(data[b'train'])
+
     def setup_mnistm(self, img_res):
 
         print ("Setting up MNIST-M...")
 
-        if not os.path.exists('datasets/mnistm_x.npy'):
-
-            # Download the MNIST-M pkl file
-            filepath = 'datasets/keras_mnistm.pkl.gz'
-            if not os.path.exists(filepath.replace('.gz', '')):
-                print('+ Downloading ' + self.mnistm_url)
-                data = urllib.request.urlopen(self.mnistm_url)
-                with open(filepath, 'wb') as f:
-                    f.write(data.read())
-                with open(filepath.replace('.gz', ''), 'wb') as out_f, \
-                        gzip.GzipFile(filepath) as zip_f:
-                    out_f.write(zip_f.read())
-                os.unlink(filepath)
-
-            # load MNIST-M images from pkl file
-            with open('datasets/keras_mnistm.pkl', "rb") as f:
-                data = pickle.load(f, encoding='bytes')
-
-            # Normalize and rescale images
-            mnistm_X = np.array(data[b'train'])
-            mnistm_X = self.normalize(mnistm_X)
-            mnistm_X = np.array([imresize(x, img_res) for x in mnistm_X])
-
-            self.mnistm_X, self.mnistm_y = mnistm_X, self.mnist_y.copy()
-
-            # Save formatted images
-            np.save('datasets/mnistm_x.npy', self.mnistm_X)
-            np.save('datasets/mnistm_y.npy', self.mnistm_y)
-        else:
-            self.mnistm_X = np.load('datasets/mnistm_x.npy')
-            self.mnistm_y = np.load('datasets/mnistm_y.npy')
+        self.mnistm_X = self.dataset_store.cached(
+            'pixelda_mnistm', self.get_cache_key(img_res), lambda: resize_images(self.download_mnistm(), img_res))
+        # MNIST-M shares the labels of MNIST
+        self.mnistm_y = self.mnist_y
 
         print ("+ Done.")
 
@@ -90,6 +122,21 @@ class DataLoader():
         X = self.mnist_X if domain == 'A' else self.mnistm_X
         y = self.mnist_y if domain == 'A' else self.mnistm_y
 
-        idx = np.random.choice(list(range(len(X))), size=batch_size)
+        idx = self.samplers[domain].draw(batch_size)
+
+        # Only the sampled batch is normalized
+        return to_tanh(X[idx]), y[idx]
+
+    def load_paired_data(self, batch_size=1):
+        """
+        Batches of both domains drawn with one index draw, of the same digits.
 
-        return X[idx], y[idx]
+        :param batch_size:
+        :return (imgs_A, labels_A, imgs_B, labels_B):
+        """
+        if len(self.mnist_X) != len(self.mnistm_X):
+            raise ValueError("MNIST and MNIST-M have %d and %d images, they are not aligned"
+                             % (len(self.mnist_X), len(self.mnistm_X)))
+        idx = self.samplers['AB'].draw(batch_size)
+        labels = self.mnist_y[idx]
+        return to_tanh(self.mnist_X[idx]), labels, to_tanh(self.mnistm_X[idx]), labels
@@ -0,0 +1,43 @@
+from __future__ import print_function, division
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+
+def prefetch(load_fn, tasks, depth=2, workers=1, use_processes=False):
+    """
+    Yield load_fn(task) for every task, in order, while background workers load the
+    following batches.
+
+    At most `depth` batches are being loaded or waiting to be consumed at any time, so
+    memory stays bounded when training is slower than loading.
+
+    Example usage:
+        for imgs_A, imgs_B in prefetch(data_loader.read_batch, tasks, depth=4, workers=2):
+            ...
+
+    :param load_fn: function loading one batch, must be picklable if use_processes
+    :param tasks: iterable of arguments for load_fn
+    :param depth: number of batches to load ahead, 0 loads on the calling thread
+    :param workers: number of worker threads or processes
+    :param use_processes: load in worker processes instead of threads
+    """
+    if depth < 1:
+        for task in tasks:
+            yield load_fn(task)
+        return
+
+    executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    executor = executor_class(max_workers=workers)
+    pending = deque()
+    try:
+        for task in tasks:
+            pending.append(executor.submit(load_fn, task))
+            if len(pending) >= depth:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
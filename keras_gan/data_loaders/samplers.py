@@ -0,0 +1,130 @@
+from __future__ import print_function, division
+
+import numpy as np
+
+
+def as_slice(indices):
+    """A slice equivalent to a sorted index array when its indices are contiguous, else the array"""
+    if len(indices) and indices[-1] - indices[0] == len(indices) - 1:
+        return slice(int(indices[0]), int(indices[-1]) + 1)
+    return indices
+
+
+class IndexSampler(object):
+    """Draws batches of indices without replacement, reshuffling once per epoch.
+
+    The indices of a batch are sorted, so reads from memory-mapped arrays go forward
+    through the file, and a batch of contiguous indices is returned as a slice, which
+    indexes an array without copying it.  Without shuffling every batch is a slice.
+    An epoch ends when fewer than batch_size indices are left; the tail is dropped.
+
+    Example usage:
+        sampler = IndexSampler(len(X_train), seed=0)
+        idx = sampler.draw(batch_size)
+        imgs = X_train[idx]
+
+    :param size: number of items to sample from
+    :param shuffle: whether to shuffle the items every epoch
+    :param seed: seed of the sampler's own random generator, None uses numpy's global one
+    """
+
+    def __init__(self, size, shuffle=True, seed=None):
+        self.size = size
+        self.shuffle = shuffle
+        self.random = np.random if seed is None else np.random.RandomState(seed)
+        self.epoch = -1
+        self.order = None
+        self.position = size
+
+    def new_epoch(self):
+        self.epoch += 1
+        self.position = 0
+        if self.shuffle:
+            self.order = self.random.permutation(self.size)
+
+    def draw(self, batch_size):
+        """
+        Indices of the next batch.
+
+        :param batch_size: number of indices, at most the sampler's size
+        :return indices: slice or sorted int array
+        """
+        if batch_size > self.size:
+            raise ValueError("Batch size %d is larger than the %d items sampled from" % (batch_size, self.size))
+        if self.position + batch_size > self.size:
+            self.new_epoch()
+        start = self.position
+        self.position += batch_size
+        if not self.shuffle:
+            return slice(start, start + batch_size)
+        return as_slice(np.sort(self.order[start:start + batch_size]))
+
+
+class EpochIterator(object):
+    """Endless iterator over batches of one or more aligned arrays, epoch after epoch.
+
+    Every item is seen once per epoch.  Two ways of shuffling are supported:
+
+    - 'full' (default) permutes the item indices once per epoch, so every epoch mixes
+      the items into new batches.  Only the indices are shuffled: every batch is
+      gathered from the arrays, e.g. a shared memory-mapped dataset, in sorted index
+      order, and no copy of the dataset is made.
+    - 'blocks' visits the batch_size blocks of the arrays in a new random order every
+      epoch, starting at a random offset.  Batches are views of the arrays instead of
+      gathered copies, but a batch holds nearly the same neighbouring items every
+      epoch, so only use it for data that is stored in random order.
+
+    Without shuffling every batch is a view of a contiguous slice.
+
+    The items that do not fill a whole batch are skipped for the epoch.
+
+    Example usage:
+        batches = EpochIterator((X_train, y_train), batch_size=32)
+        imgs, labels = next(batches)
+
+    :param arrays: sequence of arrays with the same number of items
+    :param batch_size: number of items of a batch, at most the number of items
+    :param shuffle: 'full', 'blocks' or None to go through the arrays in order
+    :param seed: seed of the iterator's own random generator, None uses numpy's global one
+    """
+
+    def __init__(self, arrays, batch_size, shuffle='full', seed=None):
+        self.arrays = tuple(arrays)
+        self.size = len(self.arrays[0])
+        if any(len(array) != self.size for array in self.arrays):
+            raise ValueError("The arrays have different numbers of items")
+        if batch_size > self.size:
+            raise ValueError("Batch size %d is larger than the %d items iterated over" % (batch_size, self.size))
+        if shuffle not in ('blocks', 'full', None):
+            raise ValueError("Unknown shuffle mode %r" % (shuffle,))
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.random = np.random if seed is None else np.random.RandomState(seed)
+        self.epoch = -1
+        self.order = None
+        self.starts = []
+
+    def new_epoch(self):
+        self.epoch += 1
+        n_batches = self.size // self.batch_size
+        if self.shuffle == 'blocks':
+            offset = self.random.randint(0, self.size - n_batches * self.batch_size + 1)
+            self.starts = list(offset + self.random.permutation(n_batches) * self.batch_size)
+            return
+        if self.shuffle == 'full':
+            self.order = self.random.permutation(self.size)
+        self.starts = list(range((n_batches - 1) * self.batch_size, -1, -self.batch_size))
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if not self.starts:
+            self.new_epoch()
+        start = self.starts.pop()
+        index = slice(start, start + self.batch_size)
+        if self.shuffle == 'full':
+            index = as_slice(np.sort(self.order[index]))
+        return tuple(array[index] for array in self.arrays)
+
+    next = __next__
@@ -0,0 +1,131 @@
+from __future__ import print_function, division
+
+import json
+import os
+
+import numpy as np
+
+INDEX_FILE = 'index.json'
+
+
+def get_shard_dir(dataset_name, data_type, img_res):
+    """Directory holding the compiled shards of one split at one resolution"""
+    return './datasets/%s/compiled/%s_%dx%d' % (dataset_name, data_type, img_res[0], img_res[1])
+
+
+def get_shard_path(shard_dir, field, shard_i):
+    return os.path.join(shard_dir, '%s_%05d.bin' % (field, shard_i))
+
+
+def compile_dataset(paths, shard_dir, read_fn, shard_size=1024):
+    """
+    Decode and resize every image once and write the uint8 pixels into fixed-stride
+    shard files plus an index.
+
+    Every field (e.g. 'A' and 'B' for paired datasets) gets its own shard files so a
+    batch of one field is a contiguous block of memory.
+
+    :param paths: image paths, in the order the records are written
+    :param shard_dir: output directory
+    :param read_fn: function mapping a path to a dict of field name -> uint8 image
+    :param shard_size: number of records per shard file
+    :return ShardedDataset: the compiled dataset
+    """
+    os.makedirs(shard_dir, exist_ok=True)
+    fields = None
+    shard_files = {}
+    for i, path in enumerate(paths):
+        record = read_fn(path)
+        if fields is None:
+            fields = {name: list(img.shape) for name, img in record.items()}
+        if i % shard_size == 0:
+            for f in shard_files.values():
+                f.close()
+            shard_files = {name: open(get_shard_path(shard_dir, name, i // shard_size), 'wb')
+                           for name in fields}
+        for name, img in record.items():
+            shard_files[name].write(np.ascontiguousarray(img, dtype=np.uint8).tobytes())
+    for f in shard_files.values():
+        f.close()
+
+    index = {
+        "fields": fields or {},
+        "shard_size": shard_size,
+        "count": len(paths),
+        "paths": list(paths),
+    }
+    # The index is written last, and renamed into place, so an interrupted compile is
+    # never picked up
+    index_path = os.path.join(shard_dir, INDEX_FILE)
+    with open(index_path + '.tmp', 'w') as f:
+        json.dump(index, f)
+    os.replace(index_path + '.tmp', index_path)
+    return ShardedDataset(shard_dir)
+
+
+class ShardedDataset(object):
+    """Memory-mapped view of a dataset written by compile_dataset.
+
+    Example usage:
+        shards = ShardedDataset.open(get_shard_dir('facades', 'train', (256, 256)))
+        imgs_A = shards.batch('A', slice(0, 32))
+    """
+
+    def __init__(self, shard_dir):
+        self.shard_dir = shard_dir
+        with open(os.path.join(shard_dir, INDEX_FILE), 'r') as f:
+            index = json.load(f)
+        self.fields = {name: tuple(shape) for name, shape in index["fields"].items()}
+        self.shard_size = index["shard_size"]
+        self.count = index["count"]
+        self.paths = index["paths"]
+        self._shards = {}
+
+    @staticmethod
+    def open(shard_dir):
+        """Open the shards in shard_dir, or return None if they have not been compiled"""
+        if not os.path.exists(os.path.join(shard_dir, INDEX_FILE)):
+            return None
+        return ShardedDataset(shard_dir)
+
+    def __len__(self):
+        return self.count
+
+    def __getstate__(self):
+        # Pickle by path (e.g. for worker processes) instead of copying the mapped data
+        state = self.__dict__.copy()
+        state['_shards'] = {}
+        return state
+
+    def get_shard(self, field, shard_i):
+        key = (field, shard_i)
+        if key not in self._shards:
+            n = min(self.shard_size, self.count - shard_i * self.shard_size)
+            self._shards[key] = np.memmap(get_shard_path(self.shard_dir, field, shard_i),
+                                          dtype=np.uint8, mode='r',
+                                          shape=(n,) + self.fields[field])
+        return self._shards[key]
+
+    def batch(self, field, index):
+        """
+        uint8 images of one field.
+
+        :param field: field name
+        :param index: slice or array of record indices.  A slice that falls inside one
+            shard is returned as a zero-copy view.
+        """
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self.count)
+            first_shard, last_shard = start // self.shard_size, (stop - 1) // self.shard_size
+            if step == 1 and first_shard == last_shard:
+                offset = first_shard * self.shard_size
+                return self.get_shard(field, first_shard)[start - offset:stop - offset]
+            index = np.arange(start, stop, step)
+
+        index = np.asarray(index)
+        imgs = np.empty((len(index),) + self.fields[field], dtype=np.uint8)
+        shard_ids = index // self.shard_size
+        for shard_i in np.unique(shard_ids):
+            in_shard = shard_ids == shard_i
+            imgs[in_shard] = self.get_shard(field, shard_i)[index[in_shard] - shard_i * self.shard_size]
+        return imgs
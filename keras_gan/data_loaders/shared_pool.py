@@ -0,0 +1,100 @@
+from __future__ import print_function, division
+
+from collections import deque
+from multiprocessing import Pool, RawArray, Value
+
+import numpy as np
+
+# State of a worker process, set by init_worker
+_worker = {}
+
+
+def as_array(raw, shape):
+    return np.frombuffer(raw, dtype=np.float32).reshape(shape)
+
+
+def init_worker(read_fn, buffers, seed, counter):
+    with counter.get_lock():
+        worker_id = counter.value
+        counter.value += 1
+    # Every worker gets its own, reproducible random stream
+    if seed is not None:
+        np.random.seed(seed + worker_id)
+    _worker['read_fn'] = read_fn
+    _worker['buffers'] = {name: as_array(raw, shape) for name, (raw, shape) in buffers.items()}
+
+
+def fill(task):
+    slot, i, item = task
+    for name, img in _worker['read_fn'](item).items():
+        _worker['buffers'][name][slot, i] = img
+
+
+class SharedBatchPool(object):
+    """Process pool decoding batches straight into shared-memory buffers.
+
+    Every image of a batch is a separate task, so the decoding is spread over all
+    workers even for small batches, and the workers write their float32 output into
+    `depth` shared batch slots instead of pickling it back to the main process.
+
+    Example usage:
+        pool = SharedBatchPool(data_loader.read_item, {'hr': (256, 256, 3), 'lr': (64, 64, 3)},
+                               batch_size=16, workers=8, seed=0)
+        for imgs, items in pool.imap(batches):
+            train(imgs['hr'], imgs['lr'])
+
+    :param read_fn: picklable function mapping an item to a dict of field name -> image
+    :param shapes: dict of field name -> image shape
+    :param batch_size: maximum number of items in a batch
+    :param depth: number of batches being decoded or consumed at the same time
+    :param workers: number of worker processes, defaults to the number of cores
+    :param seed: worker i seeds numpy's random generator with seed + i
+    """
+
+    def __init__(self, read_fn, shapes, batch_size, depth=2, workers=None, seed=None):
+        self.read_fn = read_fn
+        self.batch_size = batch_size
+        self.depth = max(depth, 1)
+        self.workers = workers
+        self.seed = seed
+        self.buffers = {}
+        for name, shape in shapes.items():
+            shape = (self.depth, batch_size) + tuple(shape)
+            self.buffers[name] = (RawArray('f', int(np.prod(shape))), shape)
+        self.arrays = {name: as_array(raw, shape) for name, (raw, shape) in self.buffers.items()}
+
+    def imap(self, batches):
+        """
+        Decode batches of items in the worker processes, in order.
+
+        The yielded arrays are views of a shared slot, which is reused once the next
+        batch is requested, so copy them if they have to outlive a step.
+
+        :param batches: iterable of lists of at most batch_size items
+        :return generator: yields (dict of field name -> float32 batch, items)
+        """
+        pool = Pool(self.workers, initializer=init_worker,
+                    initargs=(self.read_fn, self.buffers, self.seed, Value('i', 0)))
+        free = deque(range(self.depth))
+        pending = deque()
+        try:
+            for items in batches:
+                slot = free.popleft()
+                tasks = [(slot, i, item) for i, item in enumerate(items)]
+                pending.append((slot, items, pool.map_async(fill, tasks)))
+                if len(pending) >= self.depth:
+                    slot, batch = self.wait(pending)
+                    yield batch
+                    free.append(slot)
+            while pending:
+                slot, batch = self.wait(pending)
+                yield batch
+                free.append(slot)
+        finally:
+            pool.terminate()
+
+    def wait(self, pending):
+        slot, items, result = pending.popleft()
+        # Raises the error of a failed worker
+        result.get()
+        return slot, ({name: array[slot, :len(items)] for name, array in self.arrays.items()}, items)
@@ -1,45 +1,111 @@
-from glob import glob
-
 import numpy as np
 import scipy
 
+from ..batching import random_flips
+from ..folder_loader import FolderDataLoader
+from ..shared_pool import SharedBatchPool
+
+
+class DataLoader(FolderDataLoader):
+    """Loads the images of a dataset folder, e.g. img_align_celeba, as high and low resolution pairs"""
+
+    fields = ('hr', 'lr')
+
+    def get_folder(self, data_type):
+        # The images are in the dataset folder itself, there is a single 'all' data type
+        return './datasets/%s' % self.dataset_name
+
+    def get_res(self, field):
+        h, w = self.img_res
+        return self.img_res if field == 'hr' else (int(h / 4), int(w / 4))
 
-class DataLoader():
-    def __init__(self, dataset_name, img_res=(128, 128)):
-        self.dataset_name = dataset_name
-        self.img_res = img_res
+    def get_paths(self):
+        return self.get_index('all').paths
 
-    def load_data(self, batch_size=1, is_testing=False):
-        data_type = "train" if not is_testing else "test"
-        
-        path = glob('./datasets/%s/*' % (self.dataset_name))
+    def compile(self, shard_size=1024):
+        """
+        Decode and resize every image once to its high and low resolution versions and
+        write them into memory-mapped shards, which load_data then reads instead of the
+        JPEG files.
 
-        batch_images = np.random.choice(path, size=batch_size)
+        :param shard_size: number of images per shard file
+        """
+        super(DataLoader, self).compile(['all'], shard_size)
 
-        imgs_hr = []
-        imgs_lr = []
-        for img_path in batch_images:
-            img = self.imread(img_path)
+    def read_record(self, path):
+        img = self.imread(path)
 
-            h, w = self.img_res
-            low_h, low_w = int(h / 4), int(w / 4)
+        h, w = self.img_res
+        low_h, low_w = int(h / 4), int(w / 4)
 
-            img_hr = scipy.misc.imresize(img, self.img_res)
-            img_lr = scipy.misc.imresize(img, (low_h, low_w))
+        img_hr = scipy.misc.imresize(img, self.img_res)
+        img_lr = scipy.misc.imresize(img, (low_h, low_w))
 
-            # If training => do random flip
-            if not is_testing and np.random.random() < 0.5:
-                img_hr = np.fliplr(img_hr)
-                img_lr = np.fliplr(img_lr)
+        return {'hr': img_hr, 'lr': img_lr}
 
-            imgs_hr.append(img_hr)
-            imgs_lr.append(img_lr)
+    def load_data(self, batch_size=1, is_testing=False, return_keys=False):
+        """
+        Sample a random batch of high and low resolution images.
 
-        imgs_hr = np.array(imgs_hr) / 127.5 - 1.
-        imgs_lr = np.array(imgs_lr) / 127.5 - 1.
+        :param batch_size:
+        :param is_testing: don't flip the images
+        :param return_keys: also return a key per image, made of its path and flip state,
+            e.g. to look up cached features of the high resolution images
+        :return (imgs_hr, imgs_lr) or (imgs_hr, imgs_lr, keys):
+        """
+        shards, batch_images = self.sample('all', batch_size)
 
+        # If training => do random flip
+        flips = random_flips(batch_size, is_testing)
+
+        imgs_hr, imgs_lr = self.read_images(shards, batch_images, flips)
+        if return_keys:
+            batch_paths = [shards.paths[i] for i in batch_images] if shards is not None else batch_images
+            keys = ["%s:%d" % (img_path, flip) for img_path, flip in zip(batch_paths, flips)]
+            return imgs_hr, imgs_lr, keys
         return imgs_hr, imgs_lr
 
+    def read_item(self, item):
+        """Normalized high and low resolution images of one (path or record index, flip) item"""
+        record_id, flip = item
+        imgs = self.read_images(self.get_shards('all'), [record_id], np.array([flip]))
+        return {field: field_imgs[0] for field, field_imgs in zip(self.fields, imgs)}
+
+    def generate_batches(self, batch_size=1, workers=None, depth=2, seed=None, return_keys=False):
+        """
+        Endless random training batches, decoded and resized by a pool of worker processes.
+
+        The batches are drawn from a random generator seeded with `seed`, so a run is
+        reproducible for any number of workers.  The yielded arrays live in shared
+        memory and are overwritten once the next batch is requested.
+
+        :param batch_size:
+        :param workers: number of worker processes, defaults to the number of cores
+        :param depth: number of batches being decoded ahead
+        :param seed: seed of the batch sampling and of the workers
+        :param return_keys: also yield a 'path:flip' key per image, see load_data
+        :return generator: yields (imgs_hr, imgs_lr) or (imgs_hr, imgs_lr, keys)
+        """
+        shapes = {field: tuple(self.get_res(field)) + (3,) for field in self.fields}
+        pool = SharedBatchPool(self.read_item, shapes, batch_size, depth=depth, workers=workers, seed=seed)
+
+        shards = self.get_shards('all')
+        paths = shards.paths if shards is not None else self.get_paths()
+        rng = np.random.RandomState(seed)
+
+        def batches():
+            while True:
+                record_ids = rng.randint(0, len(paths), batch_size)
+                flips = rng.random_sample(batch_size) > 0.5
+                if shards is not None:
+                    yield list(zip(record_ids.tolist(), flips))
+                else:
+                    yield list(zip(paths[record_ids], flips))
 
-    def imread(self, path):
-        return scipy.misc.imread(path, mode='RGB').astype(np.float)
+        for imgs, items in pool.imap(batches()):
+            if return_keys:
+                keys = ["%s:%d" % (paths[record_id] if shards is not None else record_id, flip)
+                        for record_id, flip in items]
+                yield imgs['hr'], imgs['lr'], keys
+            else:
+                yield imgs['hr'], imgs['lr']
@@ -0,0 +1,125 @@
+from __future__ import print_function, division
+
+import os
+import tempfile
+
+import numpy as np
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.keras', 'datasets', 'keras_gan')
+
+
+def to_uint8(images):
+    """Keep images as raw uint8 pixels"""
+    return np.asarray(images, dtype=np.uint8)
+
+
+def to_tanh(images):
+    """Rescale uint8 images to float32 in the range -1 to 1"""
+    images = images.astype(np.float32)
+    images -= 127.5
+    images /= 127.5
+    return images
+
+
+def get_dataset_name(dataset):
+    """Name of a keras.datasets module, e.g. keras.datasets.mnist -> 'mnist'"""
+    return getattr(dataset, '__name__', str(dataset)).rsplit('.', 1)[-1]
+
+
+def get_transform_key(transform, key=None):
+    """
+    Cache key of a transform: the given key, else the function's name.
+
+    Lambdas all share the name '<lambda>', so they would read each other's cached
+    arrays and must be given an explicit key.
+
+    :param transform: function applied to the images
+    :param key: explicit cache key
+    :return key:
+    """
+    if key:
+        return key
+    name = getattr(transform, '__name__', None)
+    if name is None or name == '<lambda>':
+        raise ValueError("%r has no unique name, pass a cache key for it" % (transform,))
+    return name
+
+
+class DatasetStore(object):
+    """Normalizes datasets once and memory-maps the cached arrays on later loads.
+
+    Cached arrays are written as .npy files keyed by dataset name and transform, so
+    every training process on a host maps the same file instead of keeping a private
+    normalized copy.
+
+    Example usage:
+        store = DatasetStore()
+        X_train, y_train = store.load(mnist, transform=to_tanh)
+    """
+
+    def __init__(self, cache_dir=None, mmap_mode='r'):
+        self.cache_dir = cache_dir or os.environ.get('KERAS_GAN_CACHE_DIR', DEFAULT_CACHE_DIR)
+        self.mmap_mode = mmap_mode
+        self._arrays = {}
+
+    def get_path(self, name, key):
+        return os.path.join(self.cache_dir, "{}_{}.npy".format(name, key))
+
+    def cached(self, name, key, build):
+        """
+        Return the array cached under (name, key), calling build() to create it on a miss.
+
+        :param name: dataset name
+        :param key: identifies the transform applied by build
+        :param build: callable returning the array to cache
+        :return array: read-only memory-mapped array
+        """
+        path = self.get_path(name, key)
+        if path in self._arrays:
+            return self._arrays[path]
+        if not os.path.exists(path):
+            self.write(path, np.ascontiguousarray(build()))
+        array = np.load(path, mmap_mode=self.mmap_mode)
+        self._arrays[path] = array
+        return array
+
+    def write(self, path, array):
+        """Write the array to a temporary file and rename it, so readers never see a partial cache"""
+        cache_dir = os.path.dirname(path)
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, array)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def load(self, dataset, transform=to_tanh, key=None):
+        """
+        Load the training split of a keras dataset with transform applied to the images.
+
+        :param dataset: module with a load_data() function, e.g. keras.datasets.mnist
+        :param transform: function applied once to the uint8 training images
+        :param key: cache key of the transform, defaults to the transform's name and is
+            required for lambdas
+        :return (X_train, y_train):
+        """
+        name = get_dataset_name(dataset)
+        key = get_transform_key(transform, key)
+        raw = []
+
+        def load_raw():
+            if not raw:
+                (X_train, y_train), (_, _) = dataset.load_data()
+                raw.append((X_train, y_train))
+            return raw[0]
+
+        X_train = self.cached(name, "x_{}".format(key), lambda: transform(load_raw()[0]))
+        y_train = self.cached(name, "y", lambda: load_raw()[1])
+        return X_train, y_train
+
+
+default_store = DatasetStore()
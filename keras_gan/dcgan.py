@@ -1,8 +1,6 @@
 from __future__ import print_function, division
 
-import matplotlib.pyplot as plt
 import numpy as np
-from keras.datasets import mnist
 from keras.layers import BatchNormalization, Activation, ZeroPadding2D
 from keras.layers import Input, Dense, Reshape, Flatten, Dropout
 from keras.layers.advanced_activations import LeakyReLU
@@ -101,51 +99,49 @@ class DCGAN(GANBase):
 
         return Model(img, validity)
 
-    def train(self, epochs, batch_size=128, save_interval=50):
+    def train(self, epochs, batch_size=128, save_interval=50, **kwargs):
+        return super(DCGAN, self).train(epochs, batch_size, sample_interval=save_interval, **kwargs)
 
-        # Load the dataset
-        (X_train, _), (_, _) = mnist.load_data()
-
-        # Rescale -1 to 1
-        X_train = X_train / 127.5 - 1.
-        X_train = np.expand_dims(X_train, axis=3)
+    def setup_training(self, batch_size):
+        # Load the dataset (rescaled -1 to 1)
+        self.X_train, _ = self.load_dataset()
 
         # Adversarial ground truths
-        valid = np.ones((batch_size, 1))
-        fake = np.zeros((batch_size, 1))
-
-        for epoch in range(epochs):
+        self.valid = self.get_labels((batch_size, 1), 1)
+        self.fake = self.get_labels((batch_size, 1), 0)
 
-            # ---------------------
-            #  Train Discriminator
-            # ---------------------
+    def train_step(self, data, batch_size):
+        # Sample noise as generator input, shared by the discriminator and generator steps
+        noise = np.random.normal(0, 1, (batch_size, self.latent_dim))
 
-            # Select a random half of images
-            idx = np.random.randint(0, X_train.shape[0], batch_size)
-            imgs = X_train[idx]
+        d_loss = self.train_discriminator(noise, batch_size)
+        g_loss = self.train_generator(noise)
+        return {"d_loss": d_loss, "g_loss": g_loss}
 
-            # Sample noise and generate a batch of new images
-            noise = np.random.normal(0, 1, (batch_size, self.latent_dim))
-            gen_imgs = self.generator.predict(noise)
+    def train_discriminator(self, noise, batch_size):
+        # Select the next batch of images
+        imgs = self.next_batch(batch_size, self.X_train)
 
-            # Train the discriminator (real classified as ones and generated as zeros)
-            d_loss_real = self.discriminator.train_on_batch(imgs, valid)
-            d_loss_fake = self.discriminator.train_on_batch(gen_imgs, fake)
-            d_loss = 0.5 * np.add(d_loss_real, d_loss_fake)
+        # Generate a batch of new images
+        gen_imgs = self.generator.predict(noise)
 
-            # ---------------------
-            #  Train Generator
-            # ---------------------
+        # Train the discriminator (real classified as ones and generated as zeros)
+        d_loss_real = self.discriminator.train_on_batch(imgs, self.valid)
+        d_loss_fake = self.discriminator.train_on_batch(gen_imgs, self.fake)
+        d_loss = 0.5 * np.add(d_loss_real, d_loss_fake)
+        return d_loss
 
-            # Train the generator (wants discriminator to mistake images as real)
-            g_loss = self.combined.train_on_batch(noise, valid)
+    def train_generator(self, noise):
+        # Train the generator (wants discriminator to mistake images as real)
+        g_loss = self.combined.train_on_batch(noise, self.valid)
+        return g_loss
 
-            # Plot the progress
-            print("%d [D loss: %f, acc.: %.2f%%] [G loss: %f]" % (epoch, d_loss[0], 100 * d_loss[1], g_loss))
+    def save_samples(self, epoch, batch):
+        self.save_imgs(epoch)
 
-            # If at save interval => save generated image samples
-            if epoch % save_interval == 0:
-                self.save_imgs(epoch)
+    def format_progress(self, epoch, batch, logs):
+        d_loss, g_loss = logs["d_loss"], logs["g_loss"]
+        return "%d [D loss: %f, acc.: %.2f%%] [G loss: %f]" % (epoch, d_loss[0], 100 * d_loss[1], g_loss)
 
     def save_imgs(self, epoch):
         r, c = 5, 5
@@ -155,15 +151,7 @@ class DCGAN(GANBase):
         # Rescale images 0 - 1
         gen_imgs = 0.5 * gen_imgs + 0.5
 
-        fig, axs = plt.subplots(r, c)
-        cnt = 0
-        for i in range(r):
-            for j in range(c):
-                axs[i, j].imshow(gen_imgs[cnt, :, :, 0], cmap='gray')
-                axs[i, j].axis('off')
-                cnt += 1
-        fig.savefig("images/mnist_%d.png" % epoch)
-        plt.close()
+        self.save_grid("images/mnist_%d.png" % epoch, gen_imgs, r, c)
 
 
 if __name__ == '__main__':
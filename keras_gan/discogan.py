@@ -1,9 +1,7 @@
 from __future__ import print_function, division
 
 import datetime
-import os
 
-import matplotlib.pyplot as plt
 import numpy as np
 from keras.layers import Input, Dropout, Concatenate
 from keras.layers.advanced_activations import LeakyReLU
@@ -17,6 +15,10 @@ from .gan_base import GANBase
 
 
 class DiscoGAN(GANBase):
+
+    # Trains on every batch of the DataLoader, samples are scheduled by batch
+    steps_per_epoch = None
+
     def __init__(self, *args, **kwargs):
         super(DiscoGAN, self).__init__(*args, **kwargs)
         # Input shape
@@ -157,60 +159,65 @@ class DiscoGAN(GANBase):
 
         return Model(img, validity)
 
-    def train(self, epochs, batch_size=128, sample_interval=50):
+    def train(self, epochs, batch_size=128, sample_interval=50, prefetch_depth=2, workers=1, **kwargs):
+        return super(DiscoGAN, self).train(epochs, batch_size, sample_interval,
+                                          prefetch_depth=prefetch_depth, workers=workers, **kwargs)
 
-        start_time = datetime.datetime.now()
+    def setup_training(self, batch_size, prefetch_depth=2, workers=1):
+        self.prefetch_depth = prefetch_depth
+        self.workers = workers
+        self.start_time = datetime.datetime.now()
 
         # Adversarial loss ground truths
-        valid = np.ones((batch_size,) + self.disc_patch)
-        fake = np.zeros((batch_size,) + self.disc_patch)
-
-        for epoch in range(epochs):
-
-            for batch_i, (imgs_A, imgs_B) in enumerate(self.data_loader.load_batch(batch_size)):
-
-                # ----------------------
-                #  Train Discriminators
-                # ----------------------
-
-                # Translate images to opposite domain
-                fake_B = self.g_AB.predict(imgs_A)
-                fake_A = self.g_BA.predict(imgs_B)
+        self.valid = self.get_labels((batch_size,) + self.disc_patch, 1)
+        self.fake = self.get_labels((batch_size,) + self.disc_patch, 0)
 
-                # Train the discriminators (original images = real / translated = Fake)
-                dA_loss_real = self.d_A.train_on_batch(imgs_A, valid)
-                dA_loss_fake = self.d_A.train_on_batch(fake_A, fake)
-                dA_loss = 0.5 * np.add(dA_loss_real, dA_loss_fake)
+    def iterate_batches(self, batch_size):
+        return self.data_loader.load_batch(batch_size, prefetch_depth=self.prefetch_depth, workers=self.workers)
 
-                dB_loss_real = self.d_B.train_on_batch(imgs_B, valid)
-                dB_loss_fake = self.d_B.train_on_batch(fake_B, fake)
-                dB_loss = 0.5 * np.add(dB_loss_real, dB_loss_fake)
+    def train_step(self, data, batch_size):
+        imgs_A, imgs_B = data
+        d_loss = self.train_discriminator(imgs_A, imgs_B)
+        g_loss = self.train_generator(imgs_A, imgs_B)
+        return {"d_loss": d_loss, "g_loss": g_loss}
 
-                # Total disciminator loss
-                d_loss = 0.5 * np.add(dA_loss, dB_loss)
-
-                # ------------------
-                #  Train Generators
-                # ------------------
-
-                # Train the generators
-                g_loss = self.combined.train_on_batch([imgs_A, imgs_B], [valid, valid, \
-                                                                         imgs_B, imgs_A, \
-                                                                         imgs_A, imgs_B])
-
-                elapsed_time = datetime.datetime.now() - start_time
-                # Plot the progress
-                print("[%d] [%d/%d] time: %s, [d_loss: %f, g_loss: %f]" % (epoch, batch_i,
-                                                                           self.data_loader.n_batches,
-                                                                           elapsed_time,
-                                                                           d_loss[0], g_loss[0]))
+    def train_discriminator(self, imgs_A, imgs_B):
+        # Translate images to opposite domain
+        fake_B = self.g_AB.predict(imgs_A)
+        fake_A = self.g_BA.predict(imgs_B)
 
-                # If at save interval => save generated image samples
-                if batch_i % sample_interval == 0:
-                    self.sample_images(epoch, batch_i)
+        # Train the discriminators (original images = real / translated = Fake)
+        dA_loss_real = self.d_A.train_on_batch(imgs_A, self.valid)
+        dA_loss_fake = self.d_A.train_on_batch(fake_A, self.fake)
+        dA_loss = 0.5 * np.add(dA_loss_real, dA_loss_fake)
+
+        dB_loss_real = self.d_B.train_on_batch(imgs_B, self.valid)
+        dB_loss_fake = self.d_B.train_on_batch(fake_B, self.fake)
+        dB_loss = 0.5 * np.add(dB_loss_real, dB_loss_fake)
+
+        # Total disciminator loss
+        d_loss = 0.5 * np.add(dA_loss, dB_loss)
+        return d_loss
+
+    def train_generator(self, imgs_A, imgs_B):
+        # Train the generators
+        g_loss = self.combined.train_on_batch([imgs_A, imgs_B], [self.valid, self.valid,
+                                                                 imgs_B, imgs_A,
+                                                                 imgs_A, imgs_B])
+        return g_loss
+
+    def format_progress(self, epoch, batch, logs):
+        d_loss, g_loss = logs["d_loss"], logs["g_loss"]
+        elapsed_time = datetime.datetime.now() - self.start_time
+        return "[%d] [%d/%d] time: %s, [d_loss: %f, g_loss: %f]" % (epoch, batch,
+                                                                    self.data_loader.n_batches,
+                                                                    elapsed_time,
+                                                                    d_loss[0], g_loss[0])
+
+    def save_samples(self, epoch, batch):
+        self.sample_images(epoch, batch)
 
     def sample_images(self, epoch, batch_i):
-        os.makedirs('images/%s' % self.dataset_name, exist_ok=True)
         r, c = 2, 3
 
         imgs_A, imgs_B = self.data_loader.load_data(batch_size=1, is_testing=True)
@@ -228,16 +235,7 @@ class DiscoGAN(GANBase):
         gen_imgs = 0.5 * gen_imgs + 0.5
 
         titles = ['Original', 'Translated', 'Reconstructed']
-        fig, axs = plt.subplots(r, c)
-        cnt = 0
-        for i in range(r):
-            for j in range(c):
-                axs[i, j].imshow(gen_imgs[cnt])
-                axs[i, j].set_title(titles[j])
-                axs[i, j].axis('off')
-                cnt += 1
-        fig.savefig("images/%s/%d_%d.png" % (self.dataset_name, epoch, batch_i))
-        plt.close()
+        self.save_grid("images/%s/%d_%d.png" % (self.dataset_name, epoch, batch_i), gen_imgs, r, c, titles * r)
 
 
 if __name__ == '__main__':
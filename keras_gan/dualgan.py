@@ -1,16 +1,15 @@
 from __future__ import print_function, division
 
 import keras.backend as K
-import matplotlib.pyplot as plt
 import numpy as np
 import scipy
-from keras.datasets import mnist
 from keras.layers import BatchNormalization
 from keras.layers import Input, Dense, Dropout
 from keras.layers.advanced_activations import LeakyReLU
 from keras.models import Sequential, Model
 from keras.optimizers import Adam
 
+from .constraints import WeightClip
 from .gan_base import GANBase
 
 
@@ -22,6 +21,9 @@ class DUALGAN(GANBase):
         self.channels = 1
         self.img_dim = self.img_rows * self.img_cols
 
+        self.clip_value = 0.01
+        self.n_critic = 4
+
         # Build and compile the discriminators
         self.D_A = self.build_discriminator()
         self.D_A.compile(loss=self.wasserstein_loss,
@@ -94,13 +96,16 @@ class DUALGAN(GANBase):
 
         img = Input(shape=(self.img_dim,))
 
+        # Clip the discriminator weights after every update, inside the optimizer's update op
+        clip = WeightClip(self.clip_value)
+
         model = Sequential()
-        model.add(Dense(512, input_dim=self.img_dim))
+        model.add(Dense(512, input_dim=self.img_dim, **clip.layer_kwargs()))
         model.add(LeakyReLU(alpha=0.2))
-        model.add(Dense(256))
+        model.add(Dense(256, **clip.layer_kwargs()))
         model.add(LeakyReLU(alpha=0.2))
-        model.add(BatchNormalization(momentum=0.8))
-        model.add(Dense(1))
+        model.add(BatchNormalization(momentum=0.8, **clip.layer_kwargs(batch_normalization=True)))
+        model.add(Dense(1, **clip.layer_kwargs()))
 
         validity = model(img)
 
@@ -114,76 +119,63 @@ class DUALGAN(GANBase):
     def wasserstein_loss(self, y_true, y_pred):
         return K.mean(y_true * y_pred)
 
-    def train(self, epochs, batch_size=128, sample_interval=50):
-
-        # Load the dataset
-        (X_train, _), (_, _) = mnist.load_data()
-
-        # Rescale -1 to 1
-        X_train = (X_train.astype(np.float32) - 127.5) / 127.5
+    def setup_training(self, batch_size):
+        # Load the dataset (rescaled -1 to 1)
+        X_train, _ = self.load_dataset(channel_axis=False)
 
         # Domain A and B (rotated)
         X_A = X_train[:int(X_train.shape[0] / 2)]
         X_B = scipy.ndimage.interpolation.rotate(X_train[int(X_train.shape[0] / 2):], 90, axes=(1, 2))
 
-        X_A = X_A.reshape(X_A.shape[0], self.img_dim)
-        X_B = X_B.reshape(X_B.shape[0], self.img_dim)
-
-        clip_value = 0.01
-        n_critic = 4
+        self.X_A = X_A.reshape(X_A.shape[0], self.img_dim)
+        self.X_B = X_B.reshape(X_B.shape[0], self.img_dim)
 
         # Adversarial ground truths
-        valid = -np.ones((batch_size, 1))
-        fake = np.ones((batch_size, 1))
-
-        for epoch in range(epochs):
-
-            # Train the discriminator for n_critic iterations
-            for _ in range(n_critic):
+        self.valid = self.get_labels((batch_size, 1), -1)
+        self.fake = self.get_labels((batch_size, 1), 1)
 
-                # ----------------------
-                #  Train Discriminators
-                # ----------------------
+    def train_step(self, data, batch_size):
+        # Train the discriminator for n_critic iterations
+        for _ in range(self.n_critic):
+            # Sample generator inputs, the last ones are reused by the generator step
+            imgs_A = self.next_batch(batch_size, self.X_A)
+            imgs_B = self.next_batch(batch_size, self.X_B)
 
-                # Sample generator inputs
-                imgs_A = self.sample_generator_input(X_A, batch_size)
-                imgs_B = self.sample_generator_input(X_B, batch_size)
+            D_A_loss, D_B_loss = self.train_discriminator(imgs_A, imgs_B)
 
-                # Translate images to their opposite domain
-                fake_B = self.G_AB.predict(imgs_A)
-                fake_A = self.G_BA.predict(imgs_B)
+        g_loss = self.train_generator(imgs_A, imgs_B)
+        return {"d_loss": D_A_loss, "d2_loss": D_B_loss, "g_loss": g_loss}
 
-                # Train the discriminators
-                D_A_loss_real = self.D_A.train_on_batch(imgs_A, valid)
-                D_A_loss_fake = self.D_A.train_on_batch(fake_A, fake)
+    def train_discriminator(self, imgs_A, imgs_B):
+        # Translate images to their opposite domain
+        fake_B = self.G_AB.predict(imgs_A)
+        fake_A = self.G_BA.predict(imgs_B)
 
-                D_B_loss_real = self.D_B.train_on_batch(imgs_B, valid)
-                D_B_loss_fake = self.D_B.train_on_batch(fake_B, fake)
+        # Train the discriminators
+        D_A_loss_real = self.D_A.train_on_batch(imgs_A, self.valid)
+        D_A_loss_fake = self.D_A.train_on_batch(fake_A, self.fake)
 
-                D_A_loss = 0.5 * np.add(D_A_loss_real, D_A_loss_fake)
-                D_B_loss = 0.5 * np.add(D_B_loss_real, D_B_loss_fake)
+        D_B_loss_real = self.D_B.train_on_batch(imgs_B, self.valid)
+        D_B_loss_fake = self.D_B.train_on_batch(fake_B, self.fake)
 
-                # Clip discriminator weights
-                for d in [self.D_A, self.D_B]:
-                    for l in d.layers:
-                        weights = l.get_weights()
-                        weights = [np.clip(w, -clip_value, clip_value) for w in weights]
-                        l.set_weights(weights)
+        D_A_loss = 0.5 * np.add(D_A_loss_real, D_A_loss_fake)
+        D_B_loss = 0.5 * np.add(D_B_loss_real, D_B_loss_fake)
 
-            # ------------------
-            #  Train Generators
-            # ------------------
+        # The discriminator weights are clipped by their WeightClip constraints
+        return D_A_loss, D_B_loss
 
-            # Train the generators
-            g_loss = self.combined.train_on_batch([imgs_A, imgs_B], [valid, valid, imgs_A, imgs_B])
+    def train_generator(self, imgs_A, imgs_B):
+        # Train the generators
+        g_loss = self.combined.train_on_batch([imgs_A, imgs_B], [self.valid, self.valid, imgs_A, imgs_B])
+        return g_loss
 
-            # Plot the progress
-            print("%d [D1 loss: %f] [D2 loss: %f] [G loss: %f]" \
-                  % (epoch, D_A_loss[0], D_B_loss[0], g_loss[0]))
+    def format_progress(self, epoch, batch, logs):
+        D_A_loss, D_B_loss, g_loss = logs["d_loss"], logs["d2_loss"], logs["g_loss"]
+        return "%d [D1 loss: %f] [D2 loss: %f] [G loss: %f]" \
+               % (epoch, D_A_loss[0], D_B_loss[0], g_loss[0])
 
-            # If at save interval => save generated image samples
-            if epoch % sample_interval == 0:
-                self.save_imgs(epoch, X_A, X_B)
+    def save_samples(self, epoch, batch):
+        self.save_imgs(epoch, self.X_A, self.X_B)
 
     def save_imgs(self, epoch, X_A, X_B):
         r, c = 4, 4
@@ -197,20 +189,12 @@ class DUALGAN(GANBase):
         fake_A = self.G_BA.predict(imgs_B)
 
         gen_imgs = np.concatenate([imgs_A, fake_B, imgs_B, fake_A])
-        gen_imgs = gen_imgs.reshape((r, c, self.img_rows, self.img_cols, 1))
+        gen_imgs = gen_imgs.reshape((r * c, self.img_rows, self.img_cols, 1))
 
         # Rescale images 0 - 1
         gen_imgs = 0.5 * gen_imgs + 0.5
 
-        fig, axs = plt.subplots(r, c)
-        cnt = 0
-        for i in range(r):
-            for j in range(c):
-                axs[i, j].imshow(gen_imgs[i, j, :, :, 0], cmap='gray')
-                axs[i, j].axis('off')
-                cnt += 1
-        fig.savefig("images/mnist_%d.png" % epoch)
-        plt.close()
+        self.save_grid("images/mnist_%d.png" % epoch, gen_imgs, r, c)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,189 @@
+from __future__ import print_function, division
+
+import json
+import os
+import tempfile
+from collections import OrderedDict
+
+import numpy as np
+
+
+class FeatureCache(object):
+    """LRU cache of the features a frozen model computes for dataset images.
+
+    Features are looked up by a key per image, e.g. its path and flip state, and only
+    the images missing from the cache are passed to `predict`, as one batch.  The cache
+    holds at most `max_items` features, either in memory or, when `cache_dir` is given,
+    in a memory-mapped file on disk whose index is saved by flush() so that later runs
+    start warm.  A saved cache is only reused with the same size, dtype and signature,
+    which describes what the features depend on, e.g. the model layer and input shape,
+    and it is rebuilt when predict returns features of another shape.  The hits and
+    misses counters help to size it.
+
+    Example usage:
+        cache = FeatureCache(vgg.predict, max_items=10000, signature={'layer': 'block3_conv3'})
+        imgs_hr, imgs_lr, keys = data_loader.load_data(batch_size, return_keys=True)
+        image_features = cache(keys, imgs_hr)
+        print(cache.hit_rate())
+
+    :param predict: function computing the features of a batch of inputs
+    :param max_items: number of features kept, the least recently used are evicted
+    :param cache_dir: folder of the memory-mapped features, None keeps them in memory
+    :param dtype: storage type of the features, e.g. np.float16 halves their size
+    :param signature: JSON-serializable description of the features, saved in the index
+    """
+
+    def __init__(self, predict, max_items=1024, cache_dir=None, dtype=np.float32, signature=None):
+        self.predict = predict
+        self.max_items = max_items
+        self.cache_dir = cache_dir
+        self.dtype = np.dtype(dtype)
+        # As read back from the index, e.g. with tuples turned into lists
+        self.signature = json.loads(json.dumps(signature))
+        self.hits = 0
+        self.misses = 0
+        # key -> feature array (in memory) or slot of the memory-mapped file, in LRU order
+        self.entries = OrderedDict()
+        self.features = None
+        self.free_slots = []
+        # Slots referenced by the index on disk, which is removed before one is overwritten
+        self.saved_slots = set()
+        if cache_dir is not None:
+            self.open()
+
+    def get_index_path(self):
+        return os.path.join(self.cache_dir, "index.json")
+
+    def get_features_path(self):
+        return os.path.join(self.cache_dir, "features.npy")
+
+    def open(self):
+        """Map the features saved by an earlier run, if their index matches the cache"""
+        if not os.path.exists(self.get_index_path()):
+            return
+        with open(self.get_index_path()) as f:
+            index = json.load(f)
+        if (index["max_items"] != self.max_items or index["dtype"] != self.dtype.str
+                or index.get("signature") != self.signature):
+            return
+        features = np.load(self.get_features_path(), mmap_mode='r+')
+        if features.shape != (self.max_items,) + tuple(index["feature_shape"]) or features.dtype != self.dtype:
+            return
+        self.features = features
+        self.entries = OrderedDict((key, slot) for key, slot in index["entries"])
+        self.saved_slots = set(self.entries.values())
+        self.free_slots = [slot for slot in range(self.max_items - 1, -1, -1) if slot not in self.saved_slots]
+
+    def remove_index(self):
+        """Remove the index on disk, so that a run ending before the next flush starts cold"""
+        if os.path.exists(self.get_index_path()):
+            os.remove(self.get_index_path())
+        self.saved_slots = set()
+
+    def flush(self):
+        """Write the memory-mapped features and their index to disk"""
+        if self.features is None:
+            return
+        self.features.flush()
+        index = {"max_items": self.max_items, "dtype": self.dtype.str, "signature": self.signature,
+                 "feature_shape": list(self.features.shape[1:]), "entries": list(self.entries.items())}
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".json")
+        with os.fdopen(fd, "w") as f:
+            json.dump(index, f)
+        os.replace(tmp_path, self.get_index_path())
+        self.saved_slots = set(self.entries.values())
+
+    def allocate(self, feature_shape):
+        if not os.path.isdir(self.cache_dir):
+            os.makedirs(self.cache_dir)
+        self.remove_index()
+        self.features = np.lib.format.open_memmap(self.get_features_path(), mode='w+', dtype=self.dtype,
+                                                  shape=(self.max_items,) + tuple(feature_shape))
+        self.free_slots = list(range(self.max_items - 1, -1, -1))
+
+    def clear(self):
+        """Drop every cached feature, the file is allocated again by the next put"""
+        self.entries = OrderedDict()
+        self.features = None
+        self.free_slots = []
+
+    def get_feature_shape(self):
+        """Shape of the cached features, None when there are none"""
+        if self.cache_dir is not None:
+            return self.features.shape[1:] if self.features is not None else None
+        return next(iter(self.entries.values())).shape if self.entries else None
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def get(self, key):
+        if self.cache_dir is None:
+            return self.entries[key]
+        return self.features[self.entries[key]]
+
+    def put(self, key, feature):
+        if self.max_items < 1:
+            return
+        if key in self.entries:
+            self.entries.move_to_end(key)
+        elif len(self.entries) >= self.max_items:
+            _, evicted = self.entries.popitem(last=False)
+            if self.cache_dir is not None:
+                self.free_slots.append(evicted)
+
+        if self.cache_dir is None:
+            self.entries[key] = feature.astype(self.dtype)
+            return
+        if self.features is None:
+            self.allocate(feature.shape)
+        slot = self.entries.get(key)
+        if slot is None:
+            slot = self.free_slots.pop()
+            self.entries[key] = slot
+            if slot in self.saved_slots:
+                # The saved index would map another key to the new feature
+                self.remove_index()
+        self.features[slot] = feature
+
+    def __call__(self, keys, inputs):
+        """
+        Features of a batch, computing only the ones missing from the cache.
+
+        :param keys: one hashable key per input, unique per distinct input
+        :param inputs: batch passed to predict for the missing keys
+        :return features: float32 array with the features of every input
+        """
+        missing = [i for i, key in enumerate(keys) if key not in self.entries]
+        computed = self.predict(inputs[missing]) if missing else None
+        feature_shape = self.get_feature_shape()
+        if computed is not None and feature_shape is not None and computed.shape[1:] != feature_shape:
+            # The cached features were computed by another model or for other inputs
+            self.clear()
+            missing = list(range(len(keys)))
+            computed = self.predict(inputs)
+        self.hits += len(keys) - len(missing)
+        self.misses += len(missing)
+
+        feature_shape = computed.shape[1:] if computed is not None else self.get(keys[0]).shape
+
+        features = np.empty((len(keys),) + tuple(feature_shape), dtype=np.float32)
+        for i, key in enumerate(keys):
+            if key in self.entries:
+                features[i] = self.get(key)
+                self.entries.move_to_end(key)
+        if missing:
+            features[missing] = computed
+            for i, feature in zip(missing, computed):
+                self.put(keys[i], feature)
+        return features
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hit_rate(),
+                "items": len(self.entries), "max_items": self.max_items}
@@ -1,14 +1,52 @@
+from collections import OrderedDict
+
+import keras.backend as K
+import numpy as np
+from keras.datasets import mnist
+from keras.models import Model
 from keras.optimizers import Adam
 
+from .callbacks import CallbackList, ProgressLogger, SampleImages
+from .checkpoint import collect_variables, get_rng_state, read_checkpoint, set_rng_state, write_checkpoint
+from .data_loaders.samplers import EpochIterator
+from .dataset_store import default_store, to_tanh
+from .profiling import null_phase
+from .sample_writer import SampleWriter
+
 
 class GANBase(object):
 
-    def __init__(self, optimizer=Adam(0.0002, 0.5), verbose=True):
+    # Number of train_step calls per epoch.  The MNIST-style models train a single step
+    # per "epoch", models driven by a DataLoader set this to None.
+    steps_per_epoch = 1
+
+    def __init__(self, optimizer=Adam(0.0002, 0.5), verbose=True, dataset_store=None, build_cache=None):
         self.optimizer = optimizer
         self.verbose = verbose
+        self.dataset_store = dataset_store or default_store
+        # Optional keras_gan.build_cache.BuildCache used by cached_build
+        self.build_cache = build_cache
+        self.epoch = 0
+        self.global_step = 0
+        self.stop_training = False
+        # Set by a keras_gan.profiling.Profiler callback while training
+        self.profiler = None
+        self.sample_writer = SampleWriter()
+        # Read-only arrays of get_labels per (shape, value, dtype)
+        self.label_cache = {}
+        # EpochIterators of next_batch, one per batch size and arrays
+        self.epoch_iterators = []
 
     def get_optimizer(self):
-        return self.optimizer
+        """
+        New optimizer configured like the GAN's optimizer, for compiling one model.
+
+        Keras optimizers only keep the slots of the last model they were compiled with,
+        so every model gets its own one, whose slots can be checkpointed.
+
+        :return optimizer:
+        """
+        return self.optimizer.__class__.from_config(self.optimizer.get_config())
 
     def build_generator(self, *args, **kwargs):
         raise NotImplemented
@@ -16,11 +54,175 @@ class GANBase(object):
     def build_critic(self, *args, **kwargs):
         raise NotImplemented
 
-    def load_dataset(self):
-        raise NotImplemented
+    def cached_build(self, name, params, build_fn, custom_objects=None):
+        """
+        Build a model through the build cache when one is configured, see BuildCache.build.
 
-    def train(self, *args, **kwargs):
-        raise NotImplemented
+        :param name: attribute name of the model, prefixed with the class name in the cache
+        :param params: JSON-serializable dict of every architecture input not in build_fn's source
+        :param build_fn: callable returning the uncompiled model
+        :param custom_objects: custom layers of the model
+        :return model:
+        """
+        if self.build_cache is None:
+            return build_fn()
+        return self.build_cache.build(type(self).__name__ + "/" + name, params, build_fn, custom_objects)
+
+    def load_dataset(self, dataset=mnist, transform=to_tanh, key=None, channel_axis=True):
+        """
+        Load the training split of a keras dataset through the shared dataset store.
+
+        The images are transformed (by default rescaled to -1 to 1) once, cached on disk
+        and memory-mapped read-only on every later call.
+
+        :param dataset: module with a load_data() function, e.g. keras.datasets.mnist
+        :param transform: function applied once to the uint8 training images
+        :param key: cache key of the transform, defaults to the transform's name and is
+            required for lambdas
+        :param channel_axis: add a trailing channel axis to grayscale images
+        :return (X_train, y_train):
+        """
+        X_train, y_train = self.dataset_store.load(dataset, transform=transform, key=key)
+        if channel_axis and X_train.ndim == 3:
+            X_train = np.expand_dims(X_train, axis=3)
+        return X_train, y_train
+
+    def train(self, epochs, batch_size=128, sample_interval=50, callbacks=None, initial_epoch=0, **kwargs):
+        """
+        Run the training loop.
+
+        Every epoch runs train_step once for each batch yielded by iterate_batches.  The
+        progress line and image samples are produced by callbacks, and further callbacks
+        (see keras_gan.callbacks) can be registered for logging, checkpointing or early
+        stopping.
+
+        :param epochs: number of epochs to train
+        :param batch_size:
+        :param sample_interval: save image samples every sample_interval steps, 0 disables
+        :param callbacks: list of additional Callback instances
+        :param initial_epoch: index of the first epoch
+        :param kwargs: passed on to setup_training
+        :return logs: losses of the last step
+        """
+        callbacks = CallbackList([ProgressLogger(), SampleImages(sample_interval)] + list(callbacks or []),
+                                 model=self)
+        self.stop_training = False
+        self.epochs = epochs
+        self.batch_size = batch_size
+        # Release the iterators, and arrays, of an earlier training run
+        self.epoch_iterators = []
+        self.setup_training(batch_size, **kwargs)
+
+        logs = {}
+        try:
+            callbacks.on_train_begin()
+            for epoch in range(initial_epoch, initial_epoch + epochs):
+                self.epoch = epoch
+                callbacks.on_epoch_begin(epoch)
+                batches = enumerate(self.iterate_batches(batch_size))
+                while True:
+                    with self.timed("data"):
+                        step = next(batches, None)
+                    if step is None:
+                        break
+                    batch, data = step
+                    callbacks.on_step_begin(epoch, batch)
+                    logs = self.train_step(data, batch_size)
+                    self.global_step += 1
+                    callbacks.on_step_end(epoch, batch, logs)
+                    if self.stop_training:
+                        break
+                callbacks.on_epoch_end(epoch, logs)
+                if self.stop_training:
+                    break
+        finally:
+            # Also after an error or KeyboardInterrupt: unwrap profiled models, finish the
+            # background writes and stop data loading workers
+            try:
+                callbacks.on_train_end()
+            finally:
+                self.teardown_training()
+        return logs
+
+    def get_labels(self, shape, value, dtype=np.float32):
+        """
+        Constant ground truth array, e.g. the valid labels of a batch.
+
+        The arrays are created once per (shape, value, dtype) and made read-only, so the
+        same array is handed to every step instead of being allocated again.
+
+        :param shape: shape of the array, e.g. (batch_size, 1)
+        :param value: value of every element
+        :param dtype:
+        :return labels: read-only array
+        """
+        key = (tuple(shape), value, np.dtype(dtype).str)
+        if key not in self.label_cache:
+            labels = np.full(shape, value, dtype=dtype)
+            labels.setflags(write=False)
+            self.label_cache[key] = labels
+        return self.label_cache[key]
+
+    def get_one_hot_labels(self, batch_size, label, num_classes, dtype=np.float32):
+        """Read-only (batch_size, num_classes) one-hot encoding of a single class, see get_labels"""
+        key = ((batch_size, num_classes), 'one_hot_%d' % label, np.dtype(dtype).str)
+        if key not in self.label_cache:
+            labels = np.zeros((batch_size, num_classes), dtype=dtype)
+            labels[:, label] = 1
+            labels.setflags(write=False)
+            self.label_cache[key] = labels
+        return self.label_cache[key]
+
+    def next_batch(self, batch_size, *arrays):
+        """
+        Next batch of an epoch over the training arrays, see samplers.EpochIterator.
+
+        One iterator is kept per batch size and arrays, so that successive calls go
+        through the dataset without replacement.  The arrays are matched by identity and
+        the iterators are dropped when a new training run starts.
+
+        :param batch_size:
+        :param arrays: arrays with the same number of items, e.g. X_train, y_train
+        :return batch: a batch of every array, or the batch itself for a single array
+        """
+        for iterator in self.epoch_iterators:
+            if iterator.batch_size == batch_size and len(iterator.arrays) == len(arrays) and \
+                    all(a is b for a, b in zip(iterator.arrays, arrays)):
+                break
+        else:
+            iterator = EpochIterator(arrays, batch_size)
+            self.epoch_iterators.append(iterator)
+        batch = next(iterator)
+        return batch if len(batch) > 1 else batch[0]
+
+    def timed(self, name):
+        """
+        Context manager recording the wall time of a phase of the current step when a
+        Profiler callback is attached, and doing nothing otherwise.
+
+        :param name: name of the phase, e.g. "data" or "sample"
+        """
+        if self.profiler is None:
+            return null_phase
+        return self.profiler.phase(name)
+
+    def setup_training(self, batch_size, **kwargs):
+        """Load the dataset and the ground truths used by train_step"""
+        pass
+
+    def teardown_training(self):
+        """Release what setup_training acquired, e.g. data loading workers"""
+        pass
+
+    def iterate_batches(self, batch_size):
+        """Yield the data of every step of an epoch.  By default one step, which samples its own batch"""
+        yield None
+
+    def train_step(self, data, batch_size):
+        """Train on one batch and return the losses as a dict"""
+        d_loss = self.train_discriminator(batch_size)
+        g_loss = self.train_generator(batch_size)
+        return {"d_loss": d_loss, "g_loss": g_loss}
 
     def train_discriminator(self, *args, **kwargs):
         raise NotImplemented
@@ -28,8 +230,92 @@ class GANBase(object):
     def train_generator(self, *args, **kwargs):
         raise NotImplemented
 
+    def format_progress(self, epoch, batch, logs):
+        return "%d [D loss: %f] [G loss: %f]" % (
+            epoch, np.ravel(logs["d_loss"])[0], np.ravel(logs["g_loss"])[0])
+
+    def save_samples(self, epoch, batch):
+        """Called by the SampleImages callback"""
+        self.sample_images(epoch)
+
     def sample_images(self):
         raise NotImplemented
 
+    def save_grid(self, path, imgs, rows, cols, titles=None):
+        """
+        Write a grid of sample images in the background, see sample_writer.save_grid.
+
+        The images are copied, so the caller can reuse them right away.  The file is
+        complete after sample_writer.flush(), which the training loop calls on train end.
+        """
+        self.sample_writer.write_grid(path, imgs, rows, cols, titles)
+
     def save_model(self):
         raise NotImplemented
+
+    def get_checkpoint_models(self):
+        """Keras models of the GAN by attribute name, e.g. generator, discriminator and combined"""
+        return OrderedDict((name, value) for name, value in vars(self).items() if isinstance(value, Model))
+
+    def get_checkpoint_variables(self):
+        models = self.get_checkpoint_models()
+        compiled = {}
+        for name, model in models.items():
+            optimizer = getattr(model, "optimizer", None)
+            if optimizer is None:
+                continue
+            other_name, other_model = compiled.setdefault(id(optimizer), (name, model))
+            if other_model is not model:
+                raise ValueError("%s and %s share an optimizer, which only holds the slots of one of them, "
+                                 "compile them with get_optimizer()" % (other_name, name))
+            # The optimizer slots are created along with the training function
+            model._make_train_function()
+        return collect_variables(models)
+
+    def save_checkpoint(self, path):
+        """
+        Save the training state to a single checkpoint file, see keras_gan.checkpoint.
+
+        The file holds the weights of every model, the optimizer slots, numpy's random
+        state, the epoch and step counters and, when the model has one, its get_config().
+
+        :param path:
+        :return path:
+        """
+        header, arrays = self.get_checkpoint_state()
+        return write_checkpoint(path, header, arrays)
+
+    def get_checkpoint_state(self):
+        """Snapshot of the training state as host arrays, (header, arrays) of write_checkpoint"""
+        variables = self.get_checkpoint_variables()
+        arrays = OrderedDict(zip(variables.keys(), K.batch_get_value(list(variables.values()))))
+        rng_state, arrays["rng/keys"] = get_rng_state()
+        header = {
+            "model": type(self).__name__,
+            "config": self.get_config() if hasattr(self, "get_config") else None,
+            "epoch": self.epoch,
+            "global_step": self.global_step,
+            "rng": rng_state,
+        }
+        return header, arrays
+
+    def load_checkpoint(self, path):
+        """
+        Restore the training state saved by save_checkpoint into this GAN, so that training
+        resumes with the same weights, optimizer moments and counters.
+
+        :param path:
+        :return header: the checkpoint's header
+        """
+        header, arrays = read_checkpoint(path)
+        if header["model"] != type(self).__name__:
+            raise ValueError("%s is a checkpoint of %s, not %s" % (path, header["model"], type(self).__name__))
+        variables = self.get_checkpoint_variables()
+        missing = [name for name in variables if name not in arrays]
+        if missing:
+            raise ValueError("%s has no values for %s" % (path, ", ".join(missing)))
+        K.batch_set_value([(variable, arrays[name]) for name, variable in variables.items()])
+        set_rng_state(header["rng"], arrays["rng/keys"])
+        self.epoch = header["epoch"]
+        self.global_step = header["global_step"]
+        return header
@@ -1,9 +1,7 @@
 from __future__ import print_function, division
 
 import keras.backend as K
-import matplotlib.pyplot as plt
 import numpy as np
-from keras.datasets import mnist
 from keras.layers import BatchNormalization, Activation, ZeroPadding2D
 from keras.layers import Input, Dense, Reshape, Flatten, Dropout
 from keras.layers.advanced_activations import LeakyReLU
@@ -137,73 +135,62 @@ class INFOGAN(GANBase):
 
         return sampled_noise, sampled_labels
 
-    def train(self, epochs, batch_size=128, sample_interval=50):
-
-        # Load the dataset
-        (X_train, y_train), (_, _) = mnist.load_data()
-
-        # Rescale -1 to 1
-        X_train = (X_train.astype(np.float32) - 127.5) / 127.5
-        X_train = np.expand_dims(X_train, axis=3)
-        y_train = y_train.reshape(-1, 1)
+    def setup_training(self, batch_size):
+        # Load the dataset (rescaled -1 to 1)
+        self.X_train, y_train = self.load_dataset()
+        self.y_train = y_train.reshape(-1, 1)
 
         # Adversarial ground truths
-        valid = np.ones((batch_size, 1))
-        fake = np.zeros((batch_size, 1))
-
-        for epoch in range(epochs):
-
-            # ---------------------
-            #  Train Discriminator
-            # ---------------------
-
-            # Select a random half batch of images
-            idx = np.random.randint(0, X_train.shape[0], batch_size)
-            imgs = X_train[idx]
+        self.valid = self.get_labels((batch_size, 1), 1)
+        self.fake = self.get_labels((batch_size, 1), 0)
 
-            # Sample noise and categorical labels
-            sampled_noise, sampled_labels = self.sample_generator_input(batch_size)
-            gen_input = np.concatenate((sampled_noise, sampled_labels), axis=1)
+    def train_step(self, data, batch_size):
+        # Sample noise and categorical labels, shared by the discriminator and generator steps
+        sampled_noise, sampled_labels = self.sample_generator_input(batch_size)
+        gen_input = np.concatenate((sampled_noise, sampled_labels), axis=1)
 
-            # Generate a half batch of new images
-            gen_imgs = self.generator.predict(gen_input)
+        d_loss = self.train_discriminator(gen_input, batch_size)
+        g_loss = self.train_generator(gen_input, sampled_labels)
+        return {"d_loss": d_loss, "g_loss": g_loss}
 
-            # Train on real and generated data
-            d_loss_real = self.discriminator.train_on_batch(imgs, valid)
-            d_loss_fake = self.discriminator.train_on_batch(gen_imgs, fake)
+    def train_discriminator(self, gen_input, batch_size):
+        # Select the next half batch of images
+        imgs = self.next_batch(batch_size, self.X_train)
 
-            # Avg. loss
-            d_loss = 0.5 * np.add(d_loss_real, d_loss_fake)
+        # Generate a half batch of new images
+        gen_imgs = self.generator.predict(gen_input)
 
-            # ---------------------
-            #  Train Generator and Q-network
-            # ---------------------
+        # Train on real and generated data
+        d_loss_real = self.discriminator.train_on_batch(imgs, self.valid)
+        d_loss_fake = self.discriminator.train_on_batch(gen_imgs, self.fake)
 
-            g_loss = self.combined.train_on_batch(gen_input, [valid, sampled_labels])
+        # Avg. loss
+        d_loss = 0.5 * np.add(d_loss_real, d_loss_fake)
+        return d_loss
 
-            # Plot the progress
-            print("%d [D loss: %.2f, acc.: %.2f%%] [Q loss: %.2f] [G loss: %.2f]" % (
-            epoch, d_loss[0], 100 * d_loss[1], g_loss[1], g_loss[2]))
+    def train_generator(self, gen_input, sampled_labels):
+        # Train Generator and Q-network
+        g_loss = self.combined.train_on_batch(gen_input, [self.valid, sampled_labels])
+        return g_loss
 
-            # If at save interval => save generated image samples
-            if epoch % sample_interval == 0:
-                self.sample_images(epoch)
+    def format_progress(self, epoch, batch, logs):
+        d_loss, g_loss = logs["d_loss"], logs["g_loss"]
+        return "%d [D loss: %.2f, acc.: %.2f%%] [Q loss: %.2f] [G loss: %.2f]" % (
+            epoch, d_loss[0], 100 * d_loss[1], g_loss[1], g_loss[2])
 
     def sample_images(self, epoch):
         r, c = 10, 10
 
-        fig, axs = plt.subplots(r, c)
+        # One column of generated images per categorical label
+        columns = []
         for i in range(c):
             sampled_noise, _ = self.sample_generator_input(c)
             label = to_categorical(np.full(fill_value=i, shape=(r, 1)), num_classes=self.num_classes)
             gen_input = np.concatenate((sampled_noise, label), axis=1)
-            gen_imgs = self.generator.predict(gen_input)
-            gen_imgs = 0.5 * gen_imgs + 0.5
-            for j in range(r):
-                axs[j, i].imshow(gen_imgs[j, :, :, 0], cmap='gray')
-                axs[j, i].axis('off')
-        fig.savefig("images/%d.png" % epoch)
-        plt.close()
+            columns.append(self.generator.predict(gen_input))
+        gen_imgs = np.stack(columns, axis=1).reshape((r * c,) + columns[0].shape[1:])
+        gen_imgs = 0.5 * gen_imgs + 0.5
+        self.save_grid("images/%d.png" % epoch, gen_imgs, r, c)
 
     def save_model(self):
 
@@ -0,0 +1,61 @@
+from __future__ import print_function, division
+
+import numpy as np
+
+
+def random_boxes(batch_size, img_shape, mask_shape):
+    """
+    Random positions of a mask_shape box inside every image of a batch.
+
+    :param batch_size:
+    :param img_shape: (height, width) of the images
+    :param mask_shape: (height, width) of the boxes
+    :return (y1, y2, x1, x2): arrays of box coordinates, one per image
+    """
+    img_height, img_width = img_shape[:2]
+    mask_height, mask_width = mask_shape
+    y1 = np.random.randint(0, img_height - mask_height, batch_size)
+    x1 = np.random.randint(0, img_width - mask_width, batch_size)
+    return y1, y1 + mask_height, x1, x1 + mask_width
+
+
+def box_mask(img_shape, y1, y2, x1, x2):
+    """
+    Boolean (batch, height, width, 1) mask of the boxes, built from broadcast index grids.
+
+    The coordinates are arrays with one value per image, so every image may have a box
+    of a different shape.
+    """
+    rows = np.arange(img_shape[0])[np.newaxis, :, np.newaxis]
+    cols = np.arange(img_shape[1])[np.newaxis, np.newaxis, :]
+    inside = ((rows >= y1[:, np.newaxis, np.newaxis]) & (rows < y2[:, np.newaxis, np.newaxis]) &
+              (cols >= x1[:, np.newaxis, np.newaxis]) & (cols < x2[:, np.newaxis, np.newaxis]))
+    return inside[..., np.newaxis]
+
+
+def mask_boxes(imgs, y1, y2, x1, x2, value=0.):
+    """Copy of the batch with the boxes filled with value"""
+    return np.where(box_mask(imgs.shape[1:3], y1, y2, x1, x2), np.asarray(value, dtype=imgs.dtype), imgs)
+
+
+def crop_boxes(imgs, y1, x1, mask_shape):
+    """Gather the equally sized boxes of a batch into a (batch, mask_height, mask_width, channels) array"""
+    mask_height, mask_width = mask_shape
+    index = np.arange(len(imgs))[:, np.newaxis, np.newaxis]
+    rows = (y1[:, np.newaxis] + np.arange(mask_height))[:, :, np.newaxis]
+    cols = (x1[:, np.newaxis] + np.arange(mask_width))[:, np.newaxis, :]
+    return imgs[index, rows, cols]
+
+
+def mask_randomly(imgs, mask_shape):
+    """
+    Zero a randomly placed box in every image of a batch.
+
+    :param imgs: batch of images (batch, height, width, channels)
+    :param mask_shape: (height, width) of the boxes
+    :return (masked_imgs, missing_parts, (y1, y2, x1, x2)):
+    """
+    y1, y2, x1, x2 = random_boxes(len(imgs), imgs.shape[1:3], mask_shape)
+    masked_imgs = mask_boxes(imgs, y1, y2, x1, x2)
+    missing_parts = crop_boxes(imgs, y1, x1, mask_shape)
+    return masked_imgs, missing_parts, (y1, y2, x1, x2)
@@ -1,9 +1,7 @@
 from __future__ import print_function, division
 
 import datetime
-import os
 
-import matplotlib.pyplot as plt
 import numpy as np
 from keras.layers import BatchNormalization
 from keras.layers import Input, Dropout, Concatenate
@@ -17,6 +15,10 @@ from .gan_base import GANBase
 
 
 class Pix2Pix(GANBase):
+
+    # Trains on every batch of the DataLoader, samples are scheduled by batch
+    steps_per_epoch = None
+
     def __init__(self, *args, **kwargs):
         super(Pix2Pix, self).__init__(*args, **kwargs)
         # Input shape
@@ -141,52 +143,53 @@ class Pix2Pix(GANBase):
 
         return Model([img_A, img_B], validity)
 
-    def train(self, epochs, batch_size=1, sample_interval=50):
+    def train(self, epochs, batch_size=1, sample_interval=50, prefetch_depth=2, workers=1, **kwargs):
+        return super(Pix2Pix, self).train(epochs, batch_size, sample_interval,
+                                          prefetch_depth=prefetch_depth, workers=workers, **kwargs)
 
-        start_time = datetime.datetime.now()
+    def setup_training(self, batch_size, prefetch_depth=2, workers=1):
+        self.prefetch_depth = prefetch_depth
+        self.workers = workers
+        self.start_time = datetime.datetime.now()
 
         # Adversarial loss ground truths
-        valid = np.ones((batch_size,) + self.disc_patch)
-        fake = np.zeros((batch_size,) + self.disc_patch)
+        self.valid = self.get_labels((batch_size,) + self.disc_patch, 1)
+        self.fake = self.get_labels((batch_size,) + self.disc_patch, 0)
 
-        for epoch in range(epochs):
-            for batch_i, (imgs_A, imgs_B) in enumerate(self.data_loader.load_batch(batch_size)):
+    def iterate_batches(self, batch_size):
+        return self.data_loader.load_batch(batch_size, prefetch_depth=self.prefetch_depth, workers=self.workers)
 
-                # ---------------------
-                #  Train Discriminator
-                # ---------------------
+    def train_step(self, data, batch_size):
+        imgs_A, imgs_B = data
+        d_loss = self.train_discriminator(imgs_A, imgs_B)
+        g_loss = self.train_generator(imgs_A, imgs_B)
+        return {"d_loss": d_loss, "g_loss": g_loss}
 
-                # Condition on B and generate a translated version
-                fake_A = self.generator.predict(imgs_B)
-
-                # Train the discriminators (original images = real / generated = Fake)
-                d_loss_real = self.discriminator.train_on_batch([imgs_A, imgs_B], valid)
-                d_loss_fake = self.discriminator.train_on_batch([fake_A, imgs_B], fake)
-                d_loss = 0.5 * np.add(d_loss_real, d_loss_fake)
+    def train_discriminator(self, imgs_A, imgs_B):
+        # Condition on B and generate a translated version
+        fake_A = self.generator.predict(imgs_B)
 
-                # -----------------
-                #  Train Generator
-                # -----------------
+        # Train the discriminators (original images = real / generated = Fake)
+        d_loss_real = self.discriminator.train_on_batch([imgs_A, imgs_B], self.valid)
+        d_loss_fake = self.discriminator.train_on_batch([fake_A, imgs_B], self.fake)
+        d_loss = 0.5 * np.add(d_loss_real, d_loss_fake)
+        return d_loss
 
-                # Train the generators
-                g_loss = self.combined.train_on_batch([imgs_A, imgs_B], [valid, imgs_A])
+    def train_generator(self, imgs_A, imgs_B):
+        # Train the generators
+        g_loss = self.combined.train_on_batch([imgs_A, imgs_B], [self.valid, imgs_A])
+        return g_loss
 
-                elapsed_time = datetime.datetime.now() - start_time
-                # Plot the progress
-                print("[Epoch %d/%d] [Batch %d/%d] [D loss: %f, acc: %3d%%] [G loss: %f] time: %s" % (epoch, epochs,
-                                                                                                      batch_i,
-                                                                                                      self.data_loader.n_batches,
-                                                                                                      d_loss[0],
-                                                                                                      100 * d_loss[1],
-                                                                                                      g_loss[0],
-                                                                                                      elapsed_time))
+    def format_progress(self, epoch, batch, logs):
+        d_loss, g_loss = logs["d_loss"], logs["g_loss"]
+        elapsed_time = datetime.datetime.now() - self.start_time
+        return "[Epoch %d/%d] [Batch %d/%d] [D loss: %f, acc: %3d%%] [G loss: %f] time: %s" % (
+            epoch, self.epochs, batch, self.data_loader.n_batches, d_loss[0], 100 * d_loss[1], g_loss[0], elapsed_time)
 
-                # If at save interval => save generated image samples
-                if batch_i % sample_interval == 0:
-                    self.sample_images(epoch, batch_i)
+    def save_samples(self, epoch, batch):
+        self.sample_images(epoch, batch)
 
     def sample_images(self, epoch, batch_i):
-        os.makedirs('images/%s' % self.dataset_name, exist_ok=True)
         r, c = 3, 3
 
         imgs_A, imgs_B = self.data_loader.load_data(batch_size=3, is_testing=True)
@@ -198,16 +201,8 @@ class Pix2Pix(GANBase):
         gen_imgs = 0.5 * gen_imgs + 0.5
 
         titles = ['Condition', 'Generated', 'Original']
-        fig, axs = plt.subplots(r, c)
-        cnt = 0
-        for i in range(r):
-            for j in range(c):
-                axs[i, j].imshow(gen_imgs[cnt])
-                axs[i, j].set_title(titles[i])
-                axs[i, j].axis('off')
-                cnt += 1
-        fig.savefig("images/%s/%d_%d.png" % (self.dataset_name, epoch, batch_i))
-        plt.close()
+        self.save_grid("images/%s/%d_%d.png" % (self.dataset_name, epoch, batch_i), gen_imgs, r, c,
+                       [title for title in titles for _ in range(c)])
 
 
 if __name__ == '__main__':
@@ -1,6 +1,5 @@
 from __future__ import print_function, division
 
-import matplotlib.pyplot as plt
 import numpy as np
 from keras.layers import BatchNormalization, Activation, Add
 from keras.layers import Input, Dense, Flatten
@@ -25,7 +24,7 @@ class PixelDA(GANBase):
         self.num_classes = 10
 
         # Configure MNIST and MNIST-M data loader
-        self.data_loader = DataLoader(img_res=(self.img_rows, self.img_cols))
+        self.data_loader = DataLoader(img_res=(self.img_rows, self.img_cols), dataset_store=self.dataset_store)
 
         # Loss weights
         lambda_adv = 10
@@ -43,16 +42,22 @@ class PixelDA(GANBase):
         self.cf = 64
 
         # Build and compile the discriminators
-        self.discriminator = self.build_discriminator()
+        custom_objects = {'InstanceNormalization': InstanceNormalization}
+        self.discriminator = self.cached_build('discriminator', {'img_shape': self.img_shape, 'df': self.df},
+                                               self.build_discriminator, custom_objects)
         self.discriminator.compile(loss='mse',
                                    optimizer=self.get_optimizer(),
                                    metrics=['accuracy'])
 
         # Build the generator
-        self.generator = self.build_generator()
+        self.generator = self.cached_build('generator',
+                                           {'img_shape': self.img_shape, 'residual_blocks': self.residual_blocks,
+                                            'channels': self.channels},
+                                           self.build_generator)
 
         # Build the task (classification) network
-        self.clf = self.build_classifier()
+        self.clf = self.cached_build('clf', {'img_shape': self.img_shape, 'cf': self.cf, 'num_classes': self.num_classes},
+                                     self.build_classifier, custom_objects)
 
         # Input images from both domains
         img_A = Input(shape=self.img_shape)
@@ -146,66 +151,58 @@ class PixelDA(GANBase):
 
         return Model(img, class_pred)
 
-    def train(self, epochs, batch_size=128, sample_interval=50):
-
-        half_batch = int(batch_size / 2)
-
+    def setup_training(self, batch_size):
         # Classification accuracy on 100 last batches of domain B
-        test_accs = []
+        self.test_accs = []
 
         # Adversarial ground truths
-        valid = np.ones((batch_size, *self.disc_patch))
-        fake = np.zeros((batch_size, *self.disc_patch))
-
-        for epoch in range(epochs):
+        self.valid = self.get_labels((batch_size, *self.disc_patch), 1)
+        self.fake = self.get_labels((batch_size, *self.disc_patch), 0)
 
-            # ---------------------
-            #  Train Discriminator
-            # ---------------------
+    def train_step(self, data, batch_size):
+        imgs_A, labels_A, imgs_B, labels_B = self.data_loader.load_paired_data(batch_size)
 
-            imgs_A, labels_A = self.data_loader.load_data(domain="A", batch_size=batch_size)
-            imgs_B, labels_B = self.data_loader.load_data(domain="B", batch_size=batch_size)
+        d_loss = self.train_discriminator(imgs_A, imgs_B)
+        g_loss = self.train_generator(imgs_A, labels_A)
 
-            # Translate images from domain A to domain B
-            fake_B = self.generator.predict(imgs_A)
+        # -----------------------
+        # Evaluation (domain B)
+        # -----------------------
 
-            # Train the discriminators (original images = real / translated = Fake)
-            d_loss_real = self.discriminator.train_on_batch(imgs_B, valid)
-            d_loss_fake = self.discriminator.train_on_batch(fake_B, fake)
-            d_loss = 0.5 * np.add(d_loss_real, d_loss_fake)
+        pred_B = self.clf.predict(imgs_B)
+        test_acc = np.mean(np.argmax(pred_B, axis=1) == labels_B)
 
-            # --------------------------------
-            #  Train Generator and Classifier
-            # --------------------------------
+        # Add accuracy to list of last 100 accuracy measurements
+        self.test_accs.append(test_acc)
+        if len(self.test_accs) > 100:
+            self.test_accs.pop(0)
 
-            # One-hot encoding of labels
-            labels_A = to_categorical(labels_A, num_classes=self.num_classes)
+        return {"d_loss": d_loss, "g_loss": g_loss, "test_acc": test_acc}
 
-            # Train the generator and classifier
-            g_loss = self.combined.train_on_batch(imgs_A, [valid, labels_A])
-
-            # -----------------------
-            # Evaluation (domain B)
-            # -----------------------
+    def train_discriminator(self, imgs_A, imgs_B):
+        # Translate images from domain A to domain B
+        fake_B = self.generator.predict(imgs_A)
 
-            pred_B = self.clf.predict(imgs_B)
-            test_acc = np.mean(np.argmax(pred_B, axis=1) == labels_B)
+        # Train the discriminators (original images = real / translated = Fake)
+        d_loss_real = self.discriminator.train_on_batch(imgs_B, self.valid)
+        d_loss_fake = self.discriminator.train_on_batch(fake_B, self.fake)
+        d_loss = 0.5 * np.add(d_loss_real, d_loss_fake)
+        return d_loss
 
-            # Add accuracy to list of last 100 accuracy measurements
-            test_accs.append(test_acc)
-            if len(test_accs) > 100:
-                test_accs.pop(0)
+    def train_generator(self, imgs_A, labels_A):
+        # One-hot encoding of labels
+        labels_A = to_categorical(labels_A, num_classes=self.num_classes)
 
-            # Plot the progress
-            print(
-                "%d : [D - loss: %.5f, acc: %3d%%], [G - loss: %.5f], [clf - loss: %.5f, acc: %3d%%, test_acc: %3d%% (%3d%%)]" % \
-                (epoch, d_loss[0], 100 * float(d_loss[1]),
-                 g_loss[1], g_loss[2], 100 * float(g_loss[-1]),
-                 100 * float(test_acc), 100 * float(np.mean(test_accs))))
+        # Train the generator and classifier
+        g_loss = self.combined.train_on_batch(imgs_A, [self.valid, labels_A])
+        return g_loss
 
-            # If at save interval => save generated image samples
-            if epoch % sample_interval == 0:
-                self.sample_images(epoch)
+    def format_progress(self, epoch, batch, logs):
+        d_loss, g_loss, test_acc = logs["d_loss"], logs["g_loss"], logs["test_acc"]
+        return "%d : [D - loss: %.5f, acc: %3d%%], [G - loss: %.5f], [clf - loss: %.5f, acc: %3d%%, test_acc: %3d%% (%3d%%)]" % \
+               (epoch, d_loss[0], 100 * float(d_loss[1]),
+                g_loss[1], g_loss[2], 100 * float(g_loss[-1]),
+                100 * float(test_acc), 100 * float(np.mean(self.test_accs)))
 
     def sample_images(self, epoch):
         r, c = 2, 5
@@ -220,17 +217,7 @@ class PixelDA(GANBase):
         # Rescale images 0 - 1
         gen_imgs = 0.5 * gen_imgs + 0.5
 
-        # titles = ['Original', 'Translated']
-        fig, axs = plt.subplots(r, c)
-        cnt = 0
-        for i in range(r):
-            for j in range(c):
-                axs[i, j].imshow(gen_imgs[cnt])
-                # axs[i, j].set_title(titles[i])
-                axs[i, j].axis('off')
-                cnt += 1
-        fig.savefig("images/%d.png" % (epoch))
-        plt.close()
+        self.save_grid("images/%d.png" % (epoch), gen_imgs, r, c)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,183 @@
+from __future__ import print_function, division
+
+import csv
+import json
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from .callbacks import Callback
+
+# Methods of the Keras models and data loaders found on the GAN that are timed as phases
+WATCHED_METHODS = ('predict', 'train_on_batch')
+WATCHED_LOADER_METHODS = ('load_data',)
+PERCENTILES = (50, 90, 99)
+
+
+class NullPhase(object):
+    """Context manager doing nothing, used while no profiler is attached"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+null_phase = NullPhase()
+
+
+class Phase(object):
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.time()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.add(self.name, time.time() - self.start)
+        return False
+
+
+class Profiler(Callback):
+    """Records the wall time of every training step, split into phases.
+
+    The phases are the data loading of the training loop ("data", and
+    "data_loader.load_data" for models sampling from a DataLoader), every `predict` and
+    `train_on_batch` call of the Keras models held by the GAN (e.g.
+    "generator.predict", "discriminator.train_on_batch", "combined.train_on_batch")
+    and the "sample" and "checkpoint" callbacks.  Anything else a model wants to
+    time can be wrapped in `with self.timed(name):`.
+
+    Example usage:
+        profiler = Profiler(trace_path="./profile.csv")
+        gan.train(epochs=1000, batch_size=32, callbacks=[profiler])
+        print(profiler.report())
+
+    :param trace_path: write the per-step trace to this .json or .csv file on train end
+    :param watch: names of the Keras model methods to time
+    :param watch_loaders: names of the data loader methods to time
+    :param skip_steps: number of warm-up steps left out of the summary
+    """
+
+    def __init__(self, trace_path=None, watch=WATCHED_METHODS, watch_loaders=WATCHED_LOADER_METHODS,
+                 skip_steps=1):
+        super(Profiler, self).__init__()
+        self.trace_path = trace_path
+        self.watch = watch
+        self.watch_loaders = watch_loaders
+        self.skip_steps = skip_steps
+        self.steps = []
+        self.phases = []
+        self.current = OrderedDict()
+        self.last_time = None
+        self._wrapped = []
+
+    def phase(self, name):
+        return Phase(self, name)
+
+    def add(self, name, seconds):
+        if name not in self.phases:
+            self.phases.append(name)
+        self.current[name] = self.current.get(name, 0.) + seconds
+
+    def on_train_begin(self):
+        self.steps = []
+        self.current = OrderedDict()
+        self.model.profiler = self
+        self.wrap_models()
+        self.last_time = time.time()
+
+    def on_step_end(self, epoch, batch, logs):
+        now = time.time()
+        step = OrderedDict([("step", self.model.global_step), ("epoch", epoch), ("batch", batch),
+                            ("images", self.model.batch_size), ("wall", now - self.last_time)])
+        step.update(self.current)
+        self.steps.append(step)
+        self.current = OrderedDict()
+        self.last_time = now
+
+    def on_train_end(self):
+        self.unwrap_models()
+        self.model.profiler = None
+        if self.trace_path:
+            self.save_trace(self.trace_path)
+        if self.model.verbose:
+            print(self.report())
+
+    def wrap_models(self):
+        """Time the watched methods of the Keras models and data loaders held by the GAN"""
+        seen = set()
+        for attr, value in list(vars(self.model).items()):
+            if id(value) in seen:
+                continue
+            for methods in [self.watch, self.watch_loaders]:
+                if methods and all(hasattr(value, method) for method in methods):
+                    seen.add(id(value))
+                    for method in methods:
+                        setattr(value, method, self.timed_method(getattr(value, method), "%s.%s" % (attr, method)))
+                        self._wrapped.append((value, method))
+
+    def unwrap_models(self):
+        for value, method in self._wrapped:
+            # Remove the instance attribute so the class method is visible again
+            delattr(value, method)
+        self._wrapped = []
+
+    def timed_method(self, method, name):
+        def timed(*args, **kwargs):
+            with self.phase(name):
+                return method(*args, **kwargs)
+        return timed
+
+    def summary(self):
+        """
+        Summarize the recorded steps.
+
+        :return summary: dict with the number of steps, images/sec and, for the wall time
+            of a step and for each phase, the mean, percentiles (in seconds) and the share
+            of the total wall time
+        """
+        steps = self.steps[self.skip_steps:] or self.steps
+        wall = np.array([step["wall"] for step in steps])
+        total = wall.sum()
+
+        summary = OrderedDict()
+        summary["steps"] = len(steps)
+        summary["images_per_sec"] = sum(step["images"] for step in steps) / total if total else 0.
+        summary["phases"] = OrderedDict()
+        for name in ["wall"] + self.phases:
+            times = np.array([step.get(name, 0.) for step in steps])
+            stats = OrderedDict([("mean", float(times.mean()) if len(times) else 0.)])
+            for q in PERCENTILES:
+                stats["p%d" % q] = float(np.percentile(times, q)) if len(times) else 0.
+            stats["share"] = float(times.sum() / total) if total else 0.
+            summary["phases"][name] = stats
+        return summary
+
+    def report(self):
+        summary = self.summary()
+        lines = ["%d steps, %.1f images/sec" % (summary["steps"], summary["images_per_sec"]),
+                 "%-32s %10s %10s %10s %10s %7s" % ("phase (ms)", "mean", "p50", "p90", "p99", "share")]
+        for name, stats in summary["phases"].items():
+            lines.append("%-32s %10.2f %10.2f %10.2f %10.2f %6.1f%%" % (
+                name, 1000 * stats["mean"], 1000 * stats["p50"], 1000 * stats["p90"], 1000 * stats["p99"],
+                100 * stats["share"]))
+        return "\n".join(lines)
+
+    def save_trace(self, path):
+        """Write the per-step trace as .csv (one row per step) or .json (with the summary)"""
+        if path.endswith(".csv"):
+            fields = ["step", "epoch", "batch", "images", "wall"] + self.phases
+            with open(path, "w") as f:
+                writer = csv.DictWriter(f, fieldnames=fields, restval=0.)
+                writer.writeheader()
+                writer.writerows(self.steps)
+        else:
+            with open(path, "w") as f:
+                json.dump({"summary": self.summary(), "steps": self.steps}, f, indent=2)
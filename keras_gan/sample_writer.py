@@ -0,0 +1,149 @@
+from __future__ import print_function, division
+
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+# Height in pixels of the strip holding a cell's title, and the gap between cells
+TITLE_HEIGHT = 14
+PADDING = 2
+
+
+def to_uint8_pixels(imgs):
+    """
+    Convert a batch of images to uint8 pixels the way pyplot's imshow displayed them.
+
+    Single channel images are rescaled from their own min - max range, like imshow's
+    colormap normalization, and color images, which should be rescaled to 0 - 1, are
+    clipped to that range.
+    """
+    imgs = np.asarray(imgs, dtype=np.float32)
+    if imgs.ndim == 3 or imgs.shape[-1] == 1:
+        axes = tuple(range(1, imgs.ndim))
+        low = imgs.min(axis=axes, keepdims=True)
+        high = imgs.max(axis=axes, keepdims=True)
+        imgs = (imgs - low) / np.where(high > low, high - low, 1.)
+    imgs = np.clip(imgs, 0., 1.) * 255.
+    return (imgs + 0.5).astype(np.uint8)
+
+
+def text_width(draw, text, font):
+    if hasattr(draw, 'textbbox'):
+        left, _, right, _ = draw.textbbox((0, 0), text, font=font)
+        return right - left
+    return draw.textsize(text, font=font)[0]
+
+
+def tile_images(imgs, rows, cols, top=0, padding=PADDING, fill=255):
+    """
+    Assemble a batch of images into one mosaic.
+
+    :param imgs: uint8 array (rows * cols, height, width, channels) in row-major order
+    :param rows:
+    :param cols:
+    :param top: height of the empty strip above every cell, e.g. for titles
+    :param padding: gap between cells
+    :param fill: pixel value of the gaps and strips
+    :return mosaic: uint8 array (rows * (top + height + padding), cols * (width + padding), channels)
+    """
+    n, h, w, channels = imgs.shape
+    cells = np.full((rows * cols, top + h + padding, w + padding, channels), fill, dtype=np.uint8)
+    cells[:n, top:top + h, :w] = imgs
+    cells = cells.reshape((rows, cols) + cells.shape[1:])
+    return cells.transpose(0, 2, 1, 3, 4).reshape(rows * cells.shape[2], cols * cells.shape[3], channels)
+
+
+def save_grid(path, imgs, rows, cols, titles=None):
+    """
+    Write a rows x cols grid of images to a PNG file.
+
+    The grid is tiled with NumPy and written with Pillow.  Cells are upscaled by an
+    integer factor when a title would not fit above them.
+
+    :param path: output file, its folder is created if needed
+    :param imgs: array of rows * cols images (height, width, channels) in row-major
+        order, rescaled to 0 - 1.  Single channel images are written in gray, rescaled
+        from their own min - max range.
+    :param rows:
+    :param cols:
+    :param titles: optional title of every cell, in the same order as imgs
+    """
+    folder = os.path.dirname(path)
+    if folder and not os.path.isdir(folder):
+        os.makedirs(folder)
+
+    imgs = to_uint8_pixels(imgs)
+    if imgs.ndim == 3:
+        imgs = imgs[..., np.newaxis]
+
+    top = 0
+    if titles is not None:
+        font = ImageFont.load_default()
+        draw = ImageDraw.Draw(Image.new('L', (1, 1)))
+        widths = [text_width(draw, title, font) for title in titles]
+        scale = int(np.ceil(max(widths) / imgs.shape[2])) if widths else 1
+        if scale > 1:
+            imgs = imgs.repeat(scale, axis=1).repeat(scale, axis=2)
+        top = TITLE_HEIGHT
+
+    mosaic = tile_images(imgs, rows, cols, top=top)
+    image = Image.fromarray(mosaic[..., 0] if mosaic.shape[-1] == 1 else mosaic)
+
+    if titles is not None:
+        draw = ImageDraw.Draw(image)
+        cell_h, cell_w = mosaic.shape[0] // rows, mosaic.shape[1] // cols
+        fill = 0 if image.mode == 'L' else (0, 0, 0)
+        for cnt, (title, width) in enumerate(zip(titles, widths)):
+            i, j = divmod(cnt, cols)
+            draw.text((j * cell_w + (cell_w - PADDING - width) // 2, i * cell_h + 1), title, fill=fill, font=font)
+
+    image.save(path)
+
+
+class SampleWriter(object):
+    """Renders image grids on a background thread.
+
+    write_grid copies the images and returns immediately, so the training loop only
+    pays for generating the samples.  At most `max_pending` grids wait to be written;
+    after that write_grid blocks until the oldest one is done, which keeps memory
+    bounded when rendering is slower than sampling.
+
+    Example usage:
+        writer = SampleWriter()
+        writer.write_grid("images/%d.png" % epoch, gen_imgs, 5, 5)
+        ...
+        writer.flush()
+
+    :param max_pending: number of grids that may be waiting to be written
+    """
+
+    def __init__(self, max_pending=4):
+        self.max_pending = max_pending
+        self.executor = None
+        self.pending = deque()
+
+    def submit(self, fn, *args, **kwargs):
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=1)
+        self.pending.append(self.executor.submit(fn, *args, **kwargs))
+        while len(self.pending) > self.max_pending:
+            self.pending.popleft().result()
+
+    def write_grid(self, path, imgs, rows, cols, titles=None):
+        """Queue save_grid, see its parameters.  imgs is copied before returning"""
+        self.submit(save_grid, path, np.array(imgs, copy=True), rows, cols,
+                    titles=list(titles) if titles is not None else None)
+
+    def flush(self):
+        """Wait until every queued grid is written, raising the first error of a worker"""
+        while self.pending:
+            self.pending.popleft().result()
+
+    def close(self):
+        self.flush()
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
@@ -0,0 +1,161 @@
+from __future__ import print_function, division
+
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import keras.backend as K
+import numpy as np
+from keras.models import model_from_json
+
+
+class GeneratorServer(object):
+    """Serves samples of a trained generator, batching concurrent requests together.
+
+    Only the generator is loaded, from its saved JSON architecture and weights, without
+    building the critic or compiling the training graphs.  Requests from any number of
+    threads are queued and a worker thread coalesces them into one predict_on_batch
+    call, as soon as max_batch_size samples are waiting or the oldest request has waited
+    max_latency seconds.  Every request gets back its own slice of the batch.
+
+    Example usage:
+        with GeneratorServer.from_config('models/wgan_gp_config.json') as server:
+            future = server.submit(16)
+            imgs = future.result()
+            imgs = server.generate(16)
+
+    :param generator: keras model mapping latent vectors to images
+    :param max_batch_size: maximum number of samples per predict call
+    :param max_latency: seconds a request may wait for others to be batched with it
+    """
+
+    def __init__(self, generator, max_batch_size=64, max_latency=0.005):
+        self.generator = generator
+        self.latent_dim = generator.input_shape[-1]
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+        self.batches = 0
+        self.samples = 0
+
+        # Keras models are bound to the graph they were created in, which is only the
+        # default graph of the thread that created them
+        self.graph = K.get_session().graph
+        self.generator._make_predict_function()
+
+        self.requests = queue.Queue()
+        # Guards closed, so that no request is queued after the worker's stop marker
+        self.lock = threading.Lock()
+        self.closed = False
+        self.thread = threading.Thread(target=self.run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    @classmethod
+    def from_files(cls, generator_json_path, generator_path, **kwargs):
+        """Load the generator saved by e.g. WGANGP.save_generator"""
+        with open(generator_json_path, "r") as json_file:
+            generator = model_from_json(json_file.read())
+        generator.load_weights(generator_path)
+        return cls(generator, **kwargs)
+
+    @classmethod
+    def from_config(cls, config_path, **kwargs):
+        """Load the generator of a model saved by e.g. WGANGP.save"""
+        with open(config_path, "r") as f:
+            config = json.load(f)
+        return cls.from_files(config["generator_json_path"], config["generator_path"], **kwargs)
+
+    def generate_noise(self, n_samples):
+        return np.random.normal(0, 1, (n_samples, self.latent_dim))
+
+    def submit(self, n_samples=1, noise=None):
+        """
+        Queue a request for generated images.
+
+        :param n_samples: number of images, ignored when noise is given
+        :param noise: optional (n_samples, latent_dim) generator input
+        :return future: concurrent.futures.Future of the (n_samples, ...) images,
+            which may be cancelled while it waits to be batched
+        """
+        if noise is None:
+            noise = self.generate_noise(n_samples)
+        future = Future()
+        with self.lock:
+            if self.closed:
+                raise RuntimeError("The generator server is closed")
+            self.requests.put((np.asarray(noise, dtype=np.float32), future))
+        return future
+
+    def generate(self, n_samples=1, noise=None):
+        """Generated images of a request, blocking until they are ready"""
+        return self.submit(n_samples, noise).result()
+
+    def next_request(self, timeout=None):
+        """Next request that was not cancelled, None for the stop marker, raises queue.Empty on timeout"""
+        while True:
+            request = self.requests.get(timeout=timeout)
+            # Marks the future as running, so it can no longer be cancelled
+            if request is None or request[1].set_running_or_notify_cancel():
+                return request
+
+    def run(self):
+        carry = None
+        stopping = False
+        while carry is not None or not stopping:
+            request = carry if carry is not None else self.next_request()
+            carry = None
+            if request is None:
+                break
+            batch = [request]
+            size = len(request[0])
+            deadline = time.time() + self.max_latency
+            while size < self.max_batch_size:
+                timeout = deadline - time.time()
+                if timeout <= 0:
+                    break
+                try:
+                    request = self.next_request(timeout)
+                except queue.Empty:
+                    break
+                if request is None:
+                    stopping = True
+                    break
+                if size + len(request[0]) > self.max_batch_size:
+                    # Served by the next batch
+                    carry = request
+                    break
+                batch.append(request)
+                size += len(request[0])
+            self.predict_batch(batch)
+
+    def predict_batch(self, batch):
+        try:
+            noise = np.concatenate([noise for noise, _ in batch])
+            with self.graph.as_default():
+                imgs = self.generator.predict_on_batch(noise)
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        self.batches += 1
+        self.samples += len(noise)
+        start = 0
+        for noise, future in batch:
+            future.set_result(imgs[start:start + len(noise)])
+            start += len(noise)
+
+    def close(self):
+        """Serve the queued requests and stop the worker thread, later submits raise"""
+        with self.lock:
+            if not self.closed:
+                self.closed = True
+                self.requests.put(None)
+        self.thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -1,8 +1,6 @@
 from __future__ import print_function, division
 
-import matplotlib.pyplot as plt
 import numpy as np
-from keras.datasets import mnist
 from keras.layers import BatchNormalization, Activation, ZeroPadding2D
 from keras.layers import Input, Dense, Reshape, Flatten, Dropout
 from keras.layers.advanced_activations import LeakyReLU
@@ -105,15 +103,10 @@ class SGAN(GANBase):
 
         return Model(img, [valid, label])
 
-    def train(self, epochs, batch_size=128, sample_interval=50):
-
-        # Load the dataset
-        (X_train, y_train), (_, _) = mnist.load_data()
-
-        # Rescale -1 to 1
-        X_train = (X_train.astype(np.float32) - 127.5) / 127.5
-        X_train = np.expand_dims(X_train, axis=3)
-        y_train = y_train.reshape(-1, 1)
+    def setup_training(self, batch_size):
+        # Load the dataset (rescaled -1 to 1)
+        self.X_train, y_train = self.load_dataset()
+        self.y_train = y_train.reshape(-1, 1)
 
         # Class weights:
         # To balance the difference in occurences of digit class labels.
@@ -124,47 +117,46 @@ class SGAN(GANBase):
         half_batch = batch_size // 2
         cw2 = {i: self.num_classes / half_batch for i in range(self.num_classes)}
         cw2[self.num_classes] = 1 / half_batch
+        self.class_weight = [cw1, cw2]
 
         # Adversarial ground truths
-        valid = np.ones((batch_size, 1))
-        fake = np.zeros((batch_size, 1))
-
-        for epoch in range(epochs):
+        self.valid = self.get_labels((batch_size, 1), 1)
+        self.fake = self.get_labels((batch_size, 1), 0)
 
-            # ---------------------
-            #  Train Discriminator
-            # ---------------------
+    def train_step(self, data, batch_size):
+        # Sample noise as generator input, shared by the discriminator and generator steps
+        noise = np.random.normal(0, 1, (batch_size, self.latent_dim))
 
-            # Select a random batch of images
-            idx = np.random.randint(0, X_train.shape[0], batch_size)
-            imgs = X_train[idx]
+        d_loss = self.train_discriminator(noise, batch_size)
+        g_loss = self.train_generator(noise)
+        return {"d_loss": d_loss, "g_loss": g_loss}
 
-            # Sample noise and generate a batch of new images
-            noise = np.random.normal(0, 1, (batch_size, self.latent_dim))
-            gen_imgs = self.generator.predict(noise)
+    def train_discriminator(self, noise, batch_size):
+        # Select the next batch of images
+        imgs, img_labels = self.next_batch(batch_size, self.X_train, self.y_train)
 
-            # One-hot encoding of labels
-            labels = to_categorical(y_train[idx], num_classes=self.num_classes + 1)
-            fake_labels = to_categorical(np.full((batch_size, 1), self.num_classes), num_classes=self.num_classes + 1)
-
-            # Train the discriminator
-            d_loss_real = self.discriminator.train_on_batch(imgs, [valid, labels], class_weight=[cw1, cw2])
-            d_loss_fake = self.discriminator.train_on_batch(gen_imgs, [fake, fake_labels], class_weight=[cw1, cw2])
-            d_loss = 0.5 * np.add(d_loss_real, d_loss_fake)
+        # Generate a batch of new images
+        gen_imgs = self.generator.predict(noise)
 
-            # ---------------------
-            #  Train Generator
-            # ---------------------
+        # One-hot encoding of labels
+        labels = to_categorical(img_labels, num_classes=self.num_classes + 1)
+        fake_labels = self.get_one_hot_labels(batch_size, self.num_classes, self.num_classes + 1)
 
-            g_loss = self.combined.train_on_batch(noise, validity, class_weight=[cw1, cw2])
+        # Train the discriminator
+        d_loss_real = self.discriminator.train_on_batch(imgs, [self.valid, labels], class_weight=self.class_weight)
+        d_loss_fake = self.discriminator.train_on_batch(gen_imgs, [self.fake, fake_labels],
+                                                        class_weight=self.class_weight)
+        d_loss = 0.5 * np.add(d_loss_real, d_loss_fake)
+        return d_loss
 
-            # Plot the progress
-            print("%d [D loss: %f, acc: %.2f%%, op_acc: %.2f%%] [G loss: %f]" % (
-            epoch, d_loss[0], 100 * d_loss[3], 100 * d_loss[4], g_loss))
+    def train_generator(self, noise):
+        g_loss = self.combined.train_on_batch(noise, self.valid, class_weight=self.class_weight)
+        return g_loss
 
-            # If at save interval => save generated image samples
-            if epoch % sample_interval == 0:
-                self.sample_images(epoch)
+    def format_progress(self, epoch, batch, logs):
+        d_loss, g_loss = logs["d_loss"], logs["g_loss"]
+        return "%d [D loss: %f, acc: %.2f%%, op_acc: %.2f%%] [G loss: %f]" % (
+            epoch, d_loss[0], 100 * d_loss[3], 100 * d_loss[4], g_loss)
 
     def sample_images(self, epoch):
         r, c = 5, 5
@@ -174,15 +166,7 @@ class SGAN(GANBase):
         # Rescale images 0 - 1
         gen_imgs = 0.5 * gen_imgs + 1
 
-        fig, axs = plt.subplots(r, c)
-        cnt = 0
-        for i in range(r):
-            for j in range(c):
-                axs[i, j].imshow(gen_imgs[cnt, :, :, 0], cmap='gray')
-                axs[i, j].axis('off')
-                cnt += 1
-        fig.savefig("images/mnist_%d.png" % epoch)
-        plt.close()
+        self.save_grid("images/mnist_%d.png" % epoch, gen_imgs, r, c)
 
     def save_model(self):
 
@@ -12,9 +12,7 @@ Instrustion on running the script:
 from __future__ import print_function, division
 
 import datetime
-import os
 
-import matplotlib.pyplot as plt
 import numpy as np
 from keras.applications import VGG19
 from keras.layers import BatchNormalization, Activation, Add
@@ -25,11 +23,22 @@ from keras.models import Model
 from keras.optimizers import Adam
 
 from .data_loaders.srgan.data_loader import DataLoader
+from .feature_cache import FeatureCache
 from .gan_base import GANBase
 
 
 class SRGAN(GANBase):
     def __init__(self, *args, **kwargs):
+        """
+        Takes the arguments of GANBase and the keyword arguments:
+
+        :param feature_cache_size: number of VGG19 features of high resolution images to
+            cache, 0 computes them on every generator step
+        :param feature_cache_dir: keep the cached features memory-mapped in this folder,
+            so later runs reuse them, instead of in memory
+        """
+        feature_cache_size = kwargs.pop('feature_cache_size', 0)
+        feature_cache_dir = kwargs.pop('feature_cache_dir', None)
         super(SRGAN, self).__init__(*args, **kwargs)
         # Input shape
         self.channels = 3
@@ -45,12 +54,22 @@ class SRGAN(GANBase):
 
         # We use a pre-trained VGG19 model to extract image features from the high resolution
         # and the generated high resolution images and minimize the mse between them
-        self.vgg = self.build_vgg()
+        vgg_params = {'hr_shape': self.hr_shape, 'layer': 'block3_conv3'}
+        self.vgg = self.cached_build('vgg', vgg_params, self.build_vgg)
         self.vgg.trainable = False
         self.vgg.compile(loss='mse',
                          optimizer=self.get_optimizer(),
                          metrics=['accuracy'])
 
+        # The VGG19 features of a dataset image only depend on its path and flip state
+        self.feature_cache = None
+        if feature_cache_size:
+            self.feature_cache = FeatureCache(self.predict_features, max_items=feature_cache_size,
+                                              cache_dir=feature_cache_dir, signature=vgg_params)
+
+        # Training batches decoded by worker processes, see setup_training
+        self.batches = None
+
         # Configure data loader
         self.dataset_name = 'img_align_celeba'
         self.data_loader = DataLoader(dataset_name=self.dataset_name,
@@ -65,13 +84,17 @@ class SRGAN(GANBase):
         self.df = 64
 
         # Build and compile the discriminator
-        self.discriminator = self.build_discriminator()
+        self.discriminator = self.cached_build('discriminator', {'hr_shape': self.hr_shape, 'df': self.df},
+                                               self.build_discriminator)
         self.discriminator.compile(loss='mse',
                                    optimizer=self.get_optimizer(),
                                    metrics=['accuracy'])
 
         # Build the generator
-        self.generator = self.build_generator()
+        self.generator = self.cached_build('generator', {'lr_shape': self.lr_shape, 'gf': self.gf,
+                                                         'n_residual_blocks': self.n_residual_blocks,
+                                                         'channels': self.channels},
+                                           self.build_generator)
 
         # High res. and low res. images
         img_hr = Input(shape=self.hr_shape)
@@ -99,10 +122,11 @@ class SRGAN(GANBase):
         Builds a pre-trained VGG19 model that outputs image features extracted at the
         third block of the model
         """
-        vgg = VGG19(weights="imagenet")
-        # Set outputs to outputs of last conv. layer in block 3
+        # The convolutional part is enough, which skips loading the weights of the dense layers
+        vgg = VGG19(weights="imagenet", include_top=False, input_shape=self.hr_shape)
+        # Truncate the model at the layer that was vgg.layers[9], the third conv. layer of block 3
         # See architecture at: https://github.com/keras-team/keras/blob/master/keras/applications/vgg19.py
-        vgg.outputs = [vgg.layers[9].output]
+        vgg = Model(vgg.input, vgg.get_layer('block3_conv3').output)
 
         img = Input(shape=self.hr_shape)
 
@@ -184,56 +208,101 @@ class SRGAN(GANBase):
 
         return Model(d0, validity)
 
-    def train(self, epochs, batch_size=1, sample_interval=50):
-
-        start_time = datetime.datetime.now()
-
-        for epoch in range(epochs):
-
-            # ----------------------
-            #  Train Discriminator
-            # ----------------------
-
-            # Sample images and their conditioning counterparts
-            imgs_hr, imgs_lr = self.data_loader.load_data(batch_size)
-
-            # From low res. image generate high res. version
-            fake_hr = self.generator.predict(imgs_lr)
-
-            valid = np.ones((batch_size,) + self.disc_patch)
-            fake = np.zeros((batch_size,) + self.disc_patch)
-
-            # Train the discriminators (original images = real / generated = Fake)
-            d_loss_real = self.discriminator.train_on_batch(imgs_hr, valid)
-            d_loss_fake = self.discriminator.train_on_batch(fake_hr, fake)
-            d_loss = 0.5 * np.add(d_loss_real, d_loss_fake)
+    def train(self, epochs, batch_size=1, sample_interval=50, reuse_batch=False, workers=0, seed=None, **kwargs):
+        """
+        :param reuse_batch: train the discriminator and the generator on the same batch,
+            instead of loading a second one for the generator step
+        :param workers: number of processes decoding and resizing the training batches,
+            0 loads them on the training thread
+        :param seed: seed of the batches sampled by the worker processes
+        """
+        return super(SRGAN, self).train(epochs, batch_size, sample_interval, reuse_batch=reuse_batch,
+                                        workers=workers, seed=seed, **kwargs)
+
+    def setup_training(self, batch_size, reuse_batch=False, workers=0, seed=None):
+        self.reuse_batch = reuse_batch
+        self.start_time = datetime.datetime.now()
+
+        self.batches = None
+        if workers:
+            self.batches = self.data_loader.generate_batches(batch_size, workers=workers, seed=seed,
+                                                             return_keys=self.feature_cache is not None)
+
+        # Adversarial ground truths
+        self.valid = self.get_labels((batch_size,) + self.disc_patch, 1)
+        self.fake = self.get_labels((batch_size,) + self.disc_patch, 0)
+
+    def teardown_training(self):
+        try:
+            if self.batches is not None:
+                self.batches.close()
+                self.batches = None
+        finally:
+            if self.feature_cache is not None:
+                self.feature_cache.flush()
+
+    def load_batch(self, batch_size):
+        """Sample images, their conditioning counterparts and, if features are cached, their keys"""
+        if self.batches is not None:
+            batch = next(self.batches)
+            return batch if len(batch) == 3 else batch + (None,)
+        if self.feature_cache is not None:
+            return self.data_loader.load_data(batch_size, return_keys=True)
+        imgs_hr, imgs_lr = self.data_loader.load_data(batch_size)
+        return imgs_hr, imgs_lr, None
+
+    def iterate_batches(self, batch_size):
+        yield self.load_batch(batch_size)
+
+    def train_step(self, data, batch_size):
+        d_loss = self.train_discriminator(data)
+        if not self.reuse_batch:
+            with self.timed("data"):
+                data = self.load_batch(batch_size)
+        g_loss = self.train_generator(data)
+        return {"d_loss": d_loss, "g_loss": g_loss}
+
+    def train_discriminator(self, batch):
+        imgs_hr, imgs_lr, _ = batch
+
+        # From low res. image generate high res. version
+        fake_hr = self.generator.predict(imgs_lr)
 
-            # ------------------
-            #  Train Generator
-            # ------------------
+        # Train the discriminators (original images = real / generated = Fake)
+        d_loss_real = self.discriminator.train_on_batch(imgs_hr, self.valid)
+        d_loss_fake = self.discriminator.train_on_batch(fake_hr, self.fake)
+        d_loss = 0.5 * np.add(d_loss_real, d_loss_fake)
+        return d_loss
 
-            # Sample images and their conditioning counterparts
-            imgs_hr, imgs_lr = self.data_loader.load_data(batch_size)
+    def predict_features(self, imgs_hr):
+        return self.vgg.predict(imgs_hr)
 
-            # The generators want the discriminators to label the generated images as real
-            valid = np.ones((batch_size,) + self.disc_patch)
+    def train_generator(self, batch):
+        imgs_hr, imgs_lr, keys = batch
 
-            # Extract ground truth image features using pre-trained VGG19 model
-            image_features = self.vgg.predict(imgs_hr)
+        # Extract ground truth image features using pre-trained VGG19 model
+        if self.feature_cache is not None:
+            image_features = self.feature_cache(keys, imgs_hr)
+        else:
+            image_features = self.predict_features(imgs_hr)
 
-            # Train the generators
-            g_loss = self.combined.train_on_batch([imgs_lr, imgs_hr], [valid, image_features])
+        # Train the generators, they want the discriminators to label the generated images as real
+        g_loss = self.combined.train_on_batch([imgs_lr, imgs_hr], [self.valid, image_features])
+        return g_loss
 
-            elapsed_time = datetime.datetime.now() - start_time
-            # Plot the progress
-            print("%d time: %s" % (epoch, elapsed_time))
+    def format_progress(self, epoch, batch, logs):
+        elapsed_time = datetime.datetime.now() - self.start_time
+        if self.feature_cache is not None:
+            return "%d time: %s [feature cache hit rate: %.2f%%]" % (
+                epoch, elapsed_time, 100 * self.feature_cache.hit_rate())
+        return "%d time: %s" % (epoch, elapsed_time)
 
-            # If at save interval => save generated image samples
-            if epoch % sample_interval == 0:
-                self.sample_images(epoch)
+    def save_samples(self, epoch, batch):
+        self.sample_images(epoch)
+        if self.feature_cache is not None:
+            self.feature_cache.flush()
 
     def sample_images(self, epoch):
-        os.makedirs('images/%s' % self.dataset_name, exist_ok=True)
         r, c = 2, 2
 
         imgs_hr, imgs_lr = self.data_loader.load_data(batch_size=2, is_testing=True)
@@ -246,23 +315,12 @@ class SRGAN(GANBase):
 
         # Save generated images and the high resolution originals
         titles = ['Generated', 'Original']
-        fig, axs = plt.subplots(r, c)
-        cnt = 0
-        for row in range(r):
-            for col, image in enumerate([fake_hr, imgs_hr]):
-                axs[row, col].imshow(image[row])
-                axs[row, col].set_title(titles[col])
-                axs[row, col].axis('off')
-            cnt += 1
-        fig.savefig("images/%s/%d.png" % (self.dataset_name, epoch))
-        plt.close()
+        gen_imgs = np.stack([fake_hr[:r], imgs_hr[:r]], axis=1).reshape((r * c,) + imgs_hr.shape[1:])
+        self.save_grid("images/%s/%d.png" % (self.dataset_name, epoch), gen_imgs, r, c, titles * r)
 
         # Save low resolution images for comparison
         for i in range(r):
-            fig = plt.figure()
-            plt.imshow(imgs_lr[i])
-            fig.savefig('images/%s/%d_lowres%d.png' % (self.dataset_name, epoch, i))
-            plt.close()
+            self.save_grid('images/%s/%d_lowres%d.png' % (self.dataset_name, epoch, i), imgs_lr[i:i + 1], 1, 1)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,38 @@
+from unittest import main, TestCase
+
+import numpy as np
+
+from keras_gan.data_loaders.batching import empty_batch, flip_and_normalize, random_flips
+
+
+class TestBatching(TestCase):
+
+    def test_flip_and_normalize_matches_per_image_loop(self):
+        imgs = np.random.randint(0, 256, (6, 4, 5, 3)).astype(np.float32)
+        flips = np.array([True, False, True, True, False, False])
+
+        # The per-image loop the data loaders used before
+        expected = []
+        for img, flip in zip(imgs, flips):
+            if flip:
+                img = np.fliplr(img)
+            expected.append(img)
+        expected = np.array(expected) / 127.5 - 1.
+
+        batch = empty_batch(6, (4, 5))
+        batch[...] = imgs
+        result = flip_and_normalize(batch, flips)
+        self.assertIs(result, batch)
+        np.testing.assert_allclose(result, expected, rtol=1e-6, atol=1e-6)
+
+    def test_testing_batches_are_not_flipped(self):
+        self.assertFalse(random_flips(8, is_testing=True).any())
+        self.assertEqual(random_flips(8).shape, (8,))
+
+    def test_empty_batch_shape(self):
+        batch = empty_batch(2, (4, 5), channels=1)
+        self.assertEqual((batch.shape, batch.dtype), ((2, 4, 5, 1), np.float32))
+
+
+if __name__ == "__main__":
+    main()
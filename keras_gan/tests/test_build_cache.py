@@ -0,0 +1,71 @@
+import shutil
+import tempfile
+
+from unittest import main, TestCase
+
+import numpy as np
+from keras.layers import Dense
+from keras.models import Sequential
+
+from keras_gan.build_cache import BuildCache, get_builder_source
+
+
+def build_dense(units=4):
+    model = Sequential()
+    model.add(Dense(units, input_dim=3))
+    return model
+
+
+class Builder(object):
+    def build(self):
+        return self.build_layers()
+
+    def build_layers(self):
+        return "layers"
+
+
+class OtherBuilder(Builder):
+    def build_layers(self):
+        return "other layers"
+
+
+class TestBuildCacheKey(TestCase):
+
+    def test_source_covers_the_methods_a_builder_calls(self):
+        source = get_builder_source(Builder().build)
+        self.assertIn("def build_layers", source)
+        self.assertNotEqual(get_builder_source(OtherBuilder().build), source)
+
+    def test_key_depends_on_the_builder_source(self):
+        cache = BuildCache("./models/builds")
+        paths = cache.get_paths("GAN/generator", {"latent_dim": 100}, get_builder_source(Builder().build))
+        self.assertEqual(paths, cache.get_paths("GAN/generator", {"latent_dim": 100},
+                                                get_builder_source(Builder().build)))
+        self.assertNotEqual(paths, cache.get_paths("GAN/generator", {"latent_dim": 100},
+                                                   get_builder_source(OtherBuilder().build)))
+
+
+class TestBuildCache(TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def test_build_cache(self):
+        cache = BuildCache(self.folder)
+        model = cache.build("GAN/dense", {"units": 4}, build_dense)
+        model2 = cache.build("GAN/dense", {"units": 4}, build_dense)
+        self.assertEqual((cache.misses, cache.hits), (1, 1))
+        for (a, b) in zip(model.get_weights(), model2.get_weights()):
+            self.assertTrue(np.all(a == b))
+
+        # Other builder parameters are built again
+        model3 = cache.build("GAN/dense", {"units": 5}, lambda: build_dense(5))
+        self.assertEqual((cache.misses, cache.hits), (2, 1))
+        self.assertEqual(model3.output_shape, (None, 5))
+
+
+if __name__ == "__main__":
+    main()
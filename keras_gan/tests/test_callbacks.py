@@ -0,0 +1,60 @@
+import os
+import shutil
+import tempfile
+
+from unittest import main, TestCase
+
+import numpy as np
+
+from keras_gan.callbacks import AsyncCheckpoint, Callback, EarlyStopping
+from keras_gan.tests.test_gan_base import StepGAN, TinyGAN
+
+
+class RecordEpochs(Callback):
+
+    def __init__(self):
+        super(RecordEpochs, self).__init__()
+        self.epochs = []
+        self.steps = 0
+
+    def on_step_end(self, epoch, batch, logs):
+        self.steps += 1
+
+    def on_epoch_end(self, epoch, logs):
+        self.epochs.append(epoch)
+
+
+class TestCallbacks(TestCase):
+
+    def test_callbacks_see_every_epoch(self):
+        record = RecordEpochs()
+        StepGAN().train(epochs=3, batch_size=8, sample_interval=0, callbacks=[record])
+        self.assertEqual(record.epochs, [0, 1, 2])
+        self.assertEqual(record.steps, 3)
+
+    def test_early_stopping(self):
+        record = RecordEpochs()
+        StepGAN().train(epochs=10, batch_size=8, sample_interval=0,
+                        callbacks=[EarlyStopping(monitor='g_loss', patience=1, min_delta=np.inf), record])
+        self.assertEqual(len(record.epochs), 1)
+
+
+class TestAsyncCheckpoint(TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def test_async_checkpoint(self):
+        checkpoint = AsyncCheckpoint(self.folder, interval=2, keep=2)
+        TinyGAN().train(epochs=7, batch_size=8, sample_interval=0, callbacks=[checkpoint])
+        paths = checkpoint.writer.list_checkpoints()
+        self.assertEqual([os.path.basename(path) for path in paths],
+                         ["tinygan_000000004.ckpt", "tinygan_000000006.ckpt"])
+        self.assertEqual(TinyGAN().load_checkpoint(paths[-1])["global_step"], 6)
+
+
+if __name__ == "__main__":
+    main()
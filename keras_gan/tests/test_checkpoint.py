@@ -0,0 +1,102 @@
+import os
+import shutil
+import tempfile
+
+from collections import OrderedDict
+from unittest import main, TestCase
+
+import numpy as np
+
+from keras_gan.checkpoint import (ALIGNMENT, AsyncCheckpointWriter, get_rng_state, read_checkpoint, set_rng_state,
+                                  write_checkpoint)
+
+
+class CheckpointTestCase(TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+
+class TestCheckpointFormat(CheckpointTestCase):
+
+    def test_arrays_round_trip(self):
+        arrays = OrderedDict([
+            ("generator/0", np.random.normal(size=(3, 5)).astype(np.float32)),
+            ("generator/1", np.arange(7, dtype=np.int64)),
+            ("critic/0", np.random.normal(size=(4, 6))[:, ::2]),
+            ("step", np.array(3, dtype=np.uint8)),
+        ])
+        path = write_checkpoint(os.path.join(self.folder, "gan.ckpt"), {"epoch": 2}, arrays)
+        header, read = read_checkpoint(path)
+
+        self.assertEqual(header["epoch"], 2)
+        self.assertEqual(list(read.keys()), list(arrays.keys()))
+        for name, array in arrays.items():
+            self.assertEqual(read[name].dtype, array.dtype)
+            np.testing.assert_array_equal(read[name], array)
+        for entry in header["arrays"]:
+            self.assertEqual(entry["offset"] % ALIGNMENT, 0)
+        self.assertFalse(read["generator/0"].flags.writeable)
+
+    def test_other_files_are_rejected(self):
+        path = os.path.join(self.folder, "weights.h5")
+        with open(path, "wb") as f:
+            f.write(b"\0" * 64)
+        with self.assertRaises(ValueError):
+            read_checkpoint(path)
+
+    def test_rng_state_round_trip(self):
+        np.random.seed(1)
+        np.random.normal()
+        state, keys = get_rng_state()
+        path = write_checkpoint(os.path.join(self.folder, "rng.ckpt"), {"rng": state}, {"rng/keys": keys})
+        expected = np.random.normal(size=5)
+
+        header, arrays = read_checkpoint(path)
+        set_rng_state(header["rng"], arrays["rng/keys"])
+        np.testing.assert_array_equal(np.random.normal(size=5), expected)
+
+
+class TestAsyncCheckpointWriter(CheckpointTestCase):
+
+    def test_only_the_last_checkpoints_are_kept(self):
+        writer = AsyncCheckpointWriter(self.folder, prefix="gan", keep=2)
+        for step in range(1, 5):
+            writer.write(step, {"global_step": step}, {"weights": np.full(3, step)})
+        writer.close()
+
+        paths = writer.list_checkpoints()
+        self.assertEqual([os.path.basename(path) for path in paths], ["gan_000000003.ckpt", "gan_000000004.ckpt"])
+        header, arrays = read_checkpoint(writer.latest())
+        self.assertEqual(header["global_step"], 4)
+        np.testing.assert_array_equal(arrays["weights"], [4, 4, 4])
+
+    def test_other_prefixes_are_ignored(self):
+        other = AsyncCheckpointWriter(self.folder, prefix="wgan_gp", keep=None)
+        other.write(7, {"global_step": 7}, {"weights": np.zeros(3)})
+        other.close()
+
+        writer = AsyncCheckpointWriter(self.folder, prefix="wgan", keep=1)
+        self.assertEqual(writer.list_checkpoints(), [])
+        for step in range(1, 3):
+            writer.write(step, {"global_step": step}, {"weights": np.full(3, step)})
+        writer.close()
+
+        self.assertEqual(sorted(os.listdir(self.folder)), ["wgan_000000002.ckpt", "wgan_gp_000000007.ckpt"])
+        self.assertEqual(os.path.basename(writer.latest()), "wgan_000000002.ckpt")
+
+    def test_missing_directory_has_no_checkpoints(self):
+        writer = AsyncCheckpointWriter(os.path.join(self.folder, "missing"))
+        self.assertEqual(writer.list_checkpoints(), [])
+        self.assertIsNone(writer.latest())
+
+    def test_at_least_one_checkpoint_is_kept(self):
+        with self.assertRaises(ValueError):
+            AsyncCheckpointWriter(self.folder, keep=0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+from unittest import main, TestCase
+
+import keras.backend as K
+import numpy as np
+from keras.layers import BatchNormalization, Dense
+from keras.models import Sequential
+from keras.optimizers import SGD
+
+from keras_gan.constraints import WeightClip
+
+
+class TestWeightClip(TestCase):
+
+    def test_weights_are_clipped_after_every_step(self):
+        clip = WeightClip(0.01)
+        model = Sequential()
+        model.add(Dense(8, input_dim=4, **clip.layer_kwargs()))
+        model.add(BatchNormalization(**clip.layer_kwargs(batch_normalization=True)))
+        model.add(Dense(1, **clip.layer_kwargs()))
+        model.compile(loss='mse', optimizer=SGD(lr=10.))
+
+        for _ in range(3):
+            model.train_on_batch(np.random.normal(size=(16, 4)), np.random.normal(size=(16, 1)) * 100)
+            # Including the batch normalization gamma, initialized to 1
+            for weight in K.batch_get_value(model.trainable_weights):
+                self.assertLessEqual(np.abs(weight).max(), 0.01 + 1e-7)
+
+    def test_config(self):
+        clip = WeightClip.from_config(WeightClip(0.05).get_config())
+        self.assertEqual(clip.clip_value, 0.05)
+
+
+if __name__ == "__main__":
+    main()
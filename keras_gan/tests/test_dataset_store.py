@@ -0,0 +1,83 @@
+import os
+import shutil
+import tempfile
+
+from unittest import main, TestCase
+
+import numpy as np
+
+from keras_gan.dataset_store import DatasetStore, to_tanh
+
+
+class FakeDataset(object):
+    """Stands in for a keras.datasets module, counting the load_data calls"""
+
+    __name__ = "keras.datasets.fake"
+
+    def __init__(self):
+        self.loads = 0
+
+    def load_data(self):
+        self.loads += 1
+        X_train = np.arange(4 * 2 * 2, dtype=np.uint8).reshape(4, 2, 2) * 16
+        y_train = np.arange(4)
+        return (X_train, y_train), (X_train[:1], y_train[:1])
+
+
+class InterruptedArray(object):
+    """Array whose conversion is interrupted, as np.save would be half way through a file"""
+
+    def __array__(self, *args, **kwargs):
+        raise KeyboardInterrupt
+
+
+class TestDatasetStore(TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.dataset = FakeDataset()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def test_transformed_arrays_are_cached(self):
+        X_train, y_train = DatasetStore(self.folder).load(self.dataset, transform=to_tanh)
+        (X_raw, y_raw), _ = FakeDataset().load_data()
+        np.testing.assert_allclose(X_train, X_raw / 127.5 - 1.)
+        np.testing.assert_array_equal(y_train, y_raw)
+        self.assertEqual(X_train.dtype, np.float32)
+        self.assertEqual(sorted(os.listdir(self.folder)), ["fake_x_to_tanh.npy", "fake_y.npy"])
+
+        # Another store, as in another process, maps the cached files
+        X_train, _ = DatasetStore(self.folder).load(self.dataset, transform=to_tanh)
+        self.assertEqual(self.dataset.loads, 1)
+        self.assertIsInstance(X_train, np.memmap)
+        self.assertFalse(X_train.flags.writeable)
+
+    def test_arrays_are_shared_within_a_store(self):
+        store = DatasetStore(self.folder)
+        self.assertIs(store.load(self.dataset)[0], store.load(self.dataset)[0])
+
+    def test_lambdas_need_a_key(self):
+        store = DatasetStore(self.folder)
+        with self.assertRaises(ValueError):
+            store.load(self.dataset, transform=lambda X: X / 255.)
+        X_half, _ = store.load(self.dataset, transform=lambda X: X / 2., key="half")
+        X_double, _ = store.load(self.dataset, transform=lambda X: X * 2., key="double")
+        np.testing.assert_allclose(X_double, X_half * 4.)
+
+    def test_failed_build_leaves_no_cache(self):
+        store = DatasetStore(self.folder)
+
+        def fail():
+            raise KeyboardInterrupt
+
+        with self.assertRaises(KeyboardInterrupt):
+            store.cached("fake", "x", fail)
+        with self.assertRaises(KeyboardInterrupt):
+            store.write(store.get_path("fake", "x"), InterruptedArray())
+        self.assertEqual(os.listdir(self.folder), [])
+
+
+if __name__ == "__main__":
+    main()
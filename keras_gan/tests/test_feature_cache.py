@@ -0,0 +1,94 @@
+import shutil
+import tempfile
+
+from unittest import main, TestCase
+
+import numpy as np
+
+from keras_gan.feature_cache import FeatureCache
+
+
+class CountingPredict(object):
+    """Features of a batch, sums over the last axis repeated `width` times"""
+
+    def __init__(self, width=2):
+        self.width = width
+        self.inputs = 0
+
+    def __call__(self, inputs):
+        self.inputs += len(inputs)
+        return np.repeat(inputs.sum(axis=-1, keepdims=True), self.width, axis=-1)
+
+
+class TestFeatureCache(TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.inputs = np.arange(12, dtype=np.float32).reshape(4, 3)
+        self.keys = ["a", "b", "c", "d"]
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def test_only_missing_features_are_computed(self):
+        predict = CountingPredict()
+        cache = FeatureCache(predict, max_items=3)
+        cache(self.keys[:2], self.inputs[:2])
+        features = cache(self.keys[1:3], self.inputs[1:3])
+        self.assertEqual((cache.hits, cache.misses, predict.inputs), (1, 3, 3))
+        np.testing.assert_array_equal(features, predict(self.inputs[1:3]))
+
+        # "a" is the least recently used
+        cache(self.keys[3:], self.inputs[3:])
+        self.assertNotIn("a", cache)
+        self.assertEqual(len(cache), 3)
+
+    def test_saved_cache_is_reused(self):
+        cache = FeatureCache(CountingPredict(), max_items=4, cache_dir=self.folder, signature={"shape": (3,)})
+        cache(self.keys, self.inputs)
+        cache.flush()
+
+        predict = CountingPredict()
+        cache = FeatureCache(predict, max_items=4, cache_dir=self.folder, signature={"shape": (3,)})
+        features = cache(self.keys, self.inputs)
+        self.assertEqual(predict.inputs, 0)
+        np.testing.assert_array_equal(features, predict(self.inputs))
+
+    def test_overwritten_slots_invalidate_the_saved_index(self):
+        cache = FeatureCache(CountingPredict(), max_items=2, cache_dir=self.folder)
+        cache(self.keys[:2], self.inputs[:2])
+        cache.flush()
+
+        # "a" is evicted and its slot reused, then the run ends without a flush
+        cache = FeatureCache(CountingPredict(), max_items=2, cache_dir=self.folder)
+        cache(self.keys[2:3], self.inputs[2:3])
+        del cache
+
+        predict = CountingPredict()
+        cache = FeatureCache(predict, max_items=2, cache_dir=self.folder)
+        np.testing.assert_array_equal(cache(self.keys[:1], self.inputs[:1]), predict(self.inputs[:1]))
+        self.assertEqual(cache.misses, 1)
+
+    def test_saved_cache_with_another_signature_is_ignored(self):
+        cache = FeatureCache(CountingPredict(), max_items=4, cache_dir=self.folder, signature={"layer": 1})
+        cache(self.keys, self.inputs)
+        cache.flush()
+
+        cache = FeatureCache(CountingPredict(), max_items=4, cache_dir=self.folder, signature={"layer": 2})
+        self.assertEqual(len(cache), 0)
+
+    def test_features_of_another_shape_rebuild_the_cache(self):
+        cache = FeatureCache(CountingPredict(width=2), max_items=4, cache_dir=self.folder)
+        cache(self.keys, self.inputs)
+        cache.flush()
+
+        predict = CountingPredict(width=5)
+        cache = FeatureCache(predict, max_items=4, cache_dir=self.folder)
+        features = cache(self.keys[:3] + ["e"], self.inputs)
+        self.assertEqual(features.shape, (4, 5))
+        self.assertEqual(cache.get_feature_shape(), (5,))
+        np.testing.assert_array_equal(cache(self.keys[:3], self.inputs[:3]), predict(self.inputs[:3]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import os
+import shutil
+import tempfile
+
+from unittest import main, TestCase
+
+import numpy as np
+
+from keras_gan.data_loaders.cyclegan.data_loader import DataLoader as CycleGANDataLoader
+from keras_gan.data_loaders.pix2pix.data_loader import DataLoader as Pix2PixDataLoader
+from keras_gan.data_loaders.shards import compile_dataset, get_shard_dir
+
+
+def read_pair(path):
+    """A and B images of a fake path, filled with the file number and the number + 100"""
+    value = int(os.path.splitext(os.path.basename(path))[0])
+    return {'A': np.full((4, 4, 3), value, dtype=np.uint8), 'B': np.full((4, 4, 3), value + 100, dtype=np.uint8)}
+
+
+def read_image(path):
+    return {'img': read_pair(path)['A']}
+
+
+def to_values(imgs):
+    """File numbers of a batch of normalized images"""
+    return np.round((imgs[:, 0, 0, 0] + 1.) * 127.5).astype(int)
+
+
+class FolderLoaderTestCase(TestCase):
+
+    def setUp(self):
+        # The data loaders read ./datasets
+        self.cwd = os.getcwd()
+        self.folder = tempfile.mkdtemp()
+        os.chdir(self.folder)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def compile(self, data_type, read_fn, count):
+        paths = ["./datasets/facades/%s/%d.jpg" % (data_type, i) for i in range(count)]
+        compile_dataset(paths, get_shard_dir("facades", data_type, (4, 4)), read_fn, shard_size=4)
+
+
+class TestPairedFolderDataLoader(FolderLoaderTestCase):
+
+    def setUp(self):
+        super(TestPairedFolderDataLoader, self).setUp()
+        self.compile("val", read_pair, 10)
+        self.data_loader = Pix2PixDataLoader("facades", img_res=(4, 4))
+
+    def test_batches_are_consecutive_pairs(self):
+        batches = list(self.data_loader.load_batch(batch_size=3, is_testing=True, prefetch_depth=2))
+        self.assertEqual(self.data_loader.n_batches, 3)
+        self.assertEqual(len(batches), 2)
+        for i, (imgs_A, imgs_B) in enumerate(batches):
+            np.testing.assert_array_equal(to_values(imgs_A), np.arange(i * 3, i * 3 + 3))
+            np.testing.assert_array_equal(to_values(imgs_B), to_values(imgs_A) + 100)
+
+
+class TestCycleGANDataLoader(FolderLoaderTestCase):
+
+    def setUp(self):
+        super(TestCycleGANDataLoader, self).setUp()
+        self.compile("trainA", read_image, 8)
+        self.compile("trainB", read_image, 6)
+        self.data_loader = CycleGANDataLoader("facades", img_res=(4, 4))
+
+    def test_domains_are_sampled_without_replacement(self):
+        batches = list(self.data_loader.load_batch(batch_size=2))
+        self.assertEqual(self.data_loader.n_batches, 3)
+        values_B = np.concatenate([to_values(imgs_B) for _, imgs_B in batches])
+        self.assertEqual(len(set(values_B)), 4)
+        self.assertTrue(set(values_B) <= set(range(6)))
+        self.assertEqual(self.data_loader.load_data("A", batch_size=5).shape, (5, 4, 4, 3))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import os
+import shutil
+import tempfile
+
+from unittest import main, TestCase
+
+import numpy as np
+from keras.layers import Dense, Input
+from keras.models import Model, Sequential
+
+from keras_gan.callbacks import Callback
+from keras_gan.gan_base import GANBase
+
+
+class StepGAN(GANBase):
+    """GAN without models, whose steps only count"""
+
+    def __init__(self, *args, **kwargs):
+        super(StepGAN, self).__init__(verbose=False, *args, **kwargs)
+        self.steps = 0
+        self.torn_down = False
+
+    def train_step(self, data, batch_size):
+        self.steps += 1
+        return {"d_loss": 0., "g_loss": 0.}
+
+    def teardown_training(self):
+        self.torn_down = True
+
+
+class FailingCallback(Callback):
+
+    def __init__(self, fail_at):
+        super(FailingCallback, self).__init__()
+        self.fail_at = fail_at
+        self.ended = False
+
+    def on_step_end(self, epoch, batch, logs):
+        if self.model.steps == self.fail_at:
+            raise KeyboardInterrupt
+
+    def on_train_end(self):
+        self.ended = True
+
+
+class TinyGAN(GANBase):
+    """Dense GAN on a fixed random dataset, without dropout, so its steps are deterministic"""
+
+    def __init__(self, *args, **kwargs):
+        super(TinyGAN, self).__init__(verbose=False, *args, **kwargs)
+        self.latent_dim = 4
+        self.X_train = np.random.RandomState(0).normal(size=(64, 6)).astype(np.float32)
+
+        self.discriminator = Sequential()
+        self.discriminator.add(Dense(8, activation='relu', input_dim=6))
+        self.discriminator.add(Dense(1, activation='sigmoid'))
+        self.discriminator.compile(loss='binary_crossentropy', optimizer=self.get_optimizer())
+
+        self.generator = Sequential()
+        self.generator.add(Dense(6, activation='tanh', input_dim=self.latent_dim))
+
+        z = Input(shape=(self.latent_dim,))
+        self.discriminator.trainable = False
+        self.combined = Model(z, self.discriminator(self.generator(z)))
+        self.combined.compile(loss='binary_crossentropy', optimizer=self.get_optimizer())
+
+    def setup_training(self, batch_size):
+        self.valid = self.get_labels((batch_size, 1), 1)
+        self.fake = self.get_labels((batch_size, 1), 0)
+
+    def train_discriminator(self, batch_size):
+        imgs = self.next_batch(batch_size, self.X_train)
+        gen_imgs = self.generator.predict(np.random.normal(0, 1, (batch_size, self.latent_dim)))
+        self.discriminator.train_on_batch(imgs, self.valid)
+        return self.discriminator.train_on_batch(gen_imgs, self.fake)
+
+    def train_generator(self, batch_size):
+        return self.combined.train_on_batch(np.random.normal(0, 1, (batch_size, self.latent_dim)), self.valid)
+
+
+class TestGANBaseTrain(TestCase):
+
+    def test_cleanup_runs_after_interrupt(self):
+        gan = StepGAN()
+        callback = FailingCallback(fail_at=3)
+        with self.assertRaises(KeyboardInterrupt):
+            gan.train(epochs=10, batch_size=4, sample_interval=0, callbacks=[callback])
+        self.assertEqual(gan.steps, 3)
+        self.assertTrue(callback.ended)
+        self.assertTrue(gan.torn_down)
+
+
+class TestGANBaseLabels(TestCase):
+
+    def test_labels_are_cached_read_only(self):
+        gan = StepGAN()
+        valid = gan.get_labels((64, 1), -1)
+        self.assertIs(valid, gan.get_labels((64, 1), -1))
+        self.assertFalse(valid.flags.writeable)
+        self.assertTrue(np.all(valid == -1))
+        self.assertEqual(gan.get_one_hot_labels(4, 2, 3).tolist(), [[0, 0, 1]] * 4)
+
+
+class TestGANBaseCheckpoint(TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def test_resumed_training_matches_uninterrupted_run(self):
+        gan = TinyGAN()
+        gan.train(epochs=3, batch_size=8, sample_interval=0)
+        path = gan.save_checkpoint(os.path.join(self.folder, "tiny.ckpt"))
+        gan.train(epochs=2, batch_size=8, sample_interval=0, initial_epoch=gan.epoch + 1)
+
+        resumed = TinyGAN()
+        resumed.load_checkpoint(path)
+        resumed.train(epochs=2, batch_size=8, sample_interval=0, initial_epoch=resumed.epoch + 1)
+
+        self.assertEqual(resumed.global_step, gan.global_step)
+        for name in ("discriminator", "generator"):
+            for a, b in zip(getattr(gan, name).get_weights(), getattr(resumed, name).get_weights()):
+                np.testing.assert_allclose(a, b, rtol=1e-5, atol=1e-6)
+        for name in ("discriminator", "combined"):
+            for a, b in zip(getattr(gan, name).optimizer.get_weights(), getattr(resumed, name).optimizer.get_weights()):
+                np.testing.assert_allclose(a, b, rtol=1e-5, atol=1e-6)
+
+    def test_shared_optimizers_are_rejected(self):
+        gan = TinyGAN()
+        gan.combined.compile(loss='binary_crossentropy', optimizer=gan.discriminator.optimizer)
+        with self.assertRaises(ValueError):
+            gan.get_checkpoint_variables()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+from unittest import main, TestCase
+
+import numpy as np
+
+from keras_gan.masking import mask_boxes, mask_randomly
+
+
+def mask_with_loop(imgs, y1, y2, x1, x2):
+    """The per-image loop of ContextEncoder.mask_randomly before it was vectorized"""
+    masked_imgs = np.empty_like(imgs)
+    missing_parts = np.empty((imgs.shape[0], y2[0] - y1[0], x2[0] - x1[0], imgs.shape[3]))
+    for i, img in enumerate(imgs):
+        masked_img = img.copy()
+        _y1, _y2, _x1, _x2 = y1[i], y2[i], x1[i], x2[i]
+        missing_parts[i] = masked_img[_y1:_y2, _x1:_x2, :].copy()
+        masked_img[_y1:_y2, _x1:_x2, :] = 0
+        masked_imgs[i] = masked_img
+    return masked_imgs, missing_parts
+
+
+class TestMasking(TestCase):
+
+    def setUp(self):
+        self.imgs = np.random.uniform(-1, 1, (16, 12, 10, 3)).astype(np.float32)
+
+    def test_mask_randomly_matches_loop(self):
+        masked_imgs, missing_parts, (y1, y2, x1, x2) = mask_randomly(self.imgs, (4, 3))
+        self.assertTrue(np.all(y2 - y1 == 4) and np.all(x2 - x1 == 3))
+        self.assertTrue(np.all(y2 <= 12) and np.all(x2 <= 10))
+
+        expected_imgs, expected_parts = mask_with_loop(self.imgs, y1, y2, x1, x2)
+        np.testing.assert_array_equal(masked_imgs, expected_imgs)
+        np.testing.assert_array_equal(missing_parts, expected_parts)
+        self.assertEqual(masked_imgs.dtype, self.imgs.dtype)
+
+    def test_boxes_of_different_shapes(self):
+        y1, y2 = np.array([0, 2, 5]), np.array([3, 4, 12])
+        x1, x2 = np.array([1, 0, 9]), np.array([2, 10, 10])
+        masked_imgs = mask_boxes(self.imgs[:3], y1, y2, x1, x2)
+        for i in range(3):
+            expected = self.imgs[i].copy()
+            expected[y1[i]:y2[i], x1[i]:x2[i], :] = 0
+            np.testing.assert_array_equal(masked_imgs[i], expected)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import os
+import shutil
+import tempfile
+
+from unittest import main, TestCase
+
+from keras_gan.data_loaders.path_index import PathIndex, list_files
+
+
+class TestPathIndex(TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        for name in ("b.jpg", "a.jpg"):
+            open(os.path.join(self.folder, name), "w").close()
+        # The manifest lives inside the indexed folder, as for SRGAN's dataset root
+        self.manifest_path = os.path.join(self.folder, "compiled", "all_manifest.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def test_list_files_skips_folders(self):
+        os.mkdir(os.path.join(self.folder, "compiled"))
+        self.assertEqual(list_files(self.folder), [os.path.join(self.folder, "a.jpg"),
+                                                   os.path.join(self.folder, "b.jpg")])
+
+    def test_manifest_hit_and_invalidation(self):
+        index = PathIndex(self.folder, self.manifest_path)
+        self.assertFalse(index.from_manifest)
+        self.assertEqual(len(index), 2)
+
+        # Creating the manifest does not invalidate it
+        index = PathIndex(self.folder, self.manifest_path)
+        self.assertTrue(index.from_manifest)
+        self.assertEqual(list(index.paths), list_files(self.folder))
+
+        # Adding a file changes the folder's modification time
+        open(os.path.join(self.folder, "c.jpg"), "w").close()
+        mtime = os.stat(self.folder).st_mtime + 10
+        os.utime(self.folder, (mtime, mtime))
+        index = PathIndex(self.folder, self.manifest_path)
+        self.assertFalse(index.from_manifest)
+        self.assertEqual(len(index), 3)
+        self.assertTrue(PathIndex(self.folder, self.manifest_path).from_manifest)
+
+    def test_sample(self):
+        index = PathIndex(self.folder)
+        self.assertTrue(set(index.sample(10)) <= set(list_files(self.folder)))
+
+
+if __name__ == "__main__":
+    main()
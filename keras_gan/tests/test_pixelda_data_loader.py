@@ -0,0 +1,71 @@
+import shutil
+import tempfile
+
+from unittest import main, TestCase
+
+import numpy as np
+from skimage.transform import resize as imresize
+
+from keras_gan.data_loaders.pixelda.data_loader import DataLoader, resize_chunk, resize_images
+from keras_gan.dataset_store import DatasetStore
+
+
+class TestResizeImages(TestCase):
+
+    def setUp(self):
+        self.images = np.random.randint(0, 256, (10, 28, 28)).astype(np.uint8)
+
+    def test_chunk_matches_per_image_resize(self):
+        resized = resize_chunk(self.images, (32, 32))
+        self.assertEqual((resized.shape, resized.dtype), ((10, 32, 32), np.uint8))
+        for image, result in zip(self.images, resized):
+            expected = imresize(image, (32, 32), preserve_range=True, mode='reflect')
+            self.assertLessEqual(np.abs(result - expected).max(), 0.5 + 1e-6)
+
+    def test_chunks_are_concatenated_in_order(self):
+        resized = resize_images(self.images, (32, 32), chunk_size=3, workers=2)
+        np.testing.assert_array_equal(resized, resize_chunk(self.images, (32, 32)))
+
+
+class TestPixelDADataLoader(TestCase):
+
+    def setUp(self):
+        # Resized datasets cached by an earlier run, so nothing is downloaded
+        self.folder = tempfile.mkdtemp()
+        store = DatasetStore(self.folder)
+        self.labels = np.arange(20) % 10
+        # Every image is filled with its index, domain B with the index + 100
+        images = np.repeat(np.arange(20, dtype=np.uint8), 8 * 8 * 3).reshape(20, 8, 8, 3)
+        store.write(store.get_path('pixelda_mnist', 'x_uint8_8x8'), images)
+        store.write(store.get_path('pixelda_mnist', 'y'), self.labels)
+        store.write(store.get_path('pixelda_mnistm', 'x_uint8_8x8'), images + 100)
+        self.data_loader = DataLoader(img_res=(8, 8), dataset_store=store, seed=0)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def test_domains_are_sampled_without_replacement(self):
+        for domain, offset in [('A', 0), ('B', 100)]:
+            items = []
+            for _ in range(4):
+                imgs, labels = self.data_loader.load_data(domain, batch_size=5)
+                self.assertEqual(imgs.dtype, np.float32)
+                index = np.round((imgs[:, 0, 0, 0] + 1.) * 127.5).astype(int) - offset
+                np.testing.assert_array_equal(labels, self.labels[index])
+                items.extend(index)
+            self.assertEqual(sorted(items), list(range(20)))
+
+    def test_paired_batches_hold_the_same_items(self):
+        items = []
+        for _ in range(4):
+            imgs_A, labels_A, imgs_B, labels_B = self.data_loader.load_paired_data(batch_size=5)
+            index = np.round((imgs_A[:, 0, 0, 0] + 1.) * 127.5).astype(int)
+            np.testing.assert_array_equal(np.round((imgs_B[:, 0, 0, 0] + 1.) * 127.5).astype(int), index + 100)
+            np.testing.assert_array_equal(labels_A, self.labels[index])
+            np.testing.assert_array_equal(labels_B, labels_A)
+            items.extend(index)
+        self.assertEqual(sorted(items), list(range(20)))
+
+
+if __name__ == "__main__":
+    main()
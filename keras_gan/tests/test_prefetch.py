@@ -0,0 +1,47 @@
+import threading
+import time
+
+from unittest import main, TestCase
+
+from keras_gan.data_loaders.prefetch import prefetch
+
+
+def square(task):
+    return task * task
+
+
+class TestPrefetch(TestCase):
+
+    def test_batches_keep_their_order(self):
+        def load(task):
+            # Later tasks finish first
+            time.sleep(0.01 * (5 - task))
+            return task
+
+        self.assertEqual(list(prefetch(load, range(5), depth=4, workers=4)), list(range(5)))
+
+    def test_loading_is_bounded_by_depth(self):
+        submitted = []
+
+        def tasks():
+            for task in range(10):
+                submitted.append(task)
+                yield task
+
+        batches = prefetch(square, tasks(), depth=3)
+        self.assertEqual(next(batches), 0)
+        self.assertEqual(len(submitted), 3)
+        batches.close()
+        self.assertEqual(len(submitted), 3)
+
+    def test_depth_0_loads_on_the_calling_thread(self):
+        threads = list(prefetch(lambda task: threading.current_thread(), range(3), depth=0))
+        self.assertEqual(threads, [threading.current_thread()] * 3)
+
+    def test_worker_processes(self):
+        self.assertEqual(list(prefetch(square, range(6), depth=2, workers=2, use_processes=True)),
+                         [0, 1, 4, 9, 16, 25])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+from unittest import main, TestCase
+
+from keras_gan.profiling import Profiler
+from keras_gan.tests.test_gan_base import TinyGAN
+
+
+class TestProfiler(TestCase):
+
+    def test_profiler(self):
+        gan = TinyGAN()
+        profiler = Profiler(skip_steps=0)
+        gan.train(epochs=3, batch_size=8, sample_interval=0, callbacks=[profiler])
+        self.assertEqual(len(profiler.steps), 3)
+        self.assertIn("combined.train_on_batch", profiler.phases)
+        self.assertIn("generator.predict", profiler.phases)
+        self.assertEqual(profiler.summary()["steps"], 3)
+
+        # The models are unwrapped after training
+        self.assertNotIn("train_on_batch", vars(gan.combined))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import os
+import shutil
+import tempfile
+
+from unittest import main, TestCase
+
+import numpy as np
+from PIL import Image
+
+from keras_gan.sample_writer import SampleWriter, save_grid, tile_images
+
+
+class TestSaveGrid(TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def read_cell(self, path, i, j, height, width):
+        pixels = np.array(Image.open(path))
+        top, left = i * (height + 2), j * (width + 2)
+        return pixels[top:top + height, left:left + width]
+
+    def test_gray_images_use_their_own_range(self):
+        # Generator output, offset as a sample_images rescale may leave it
+        imgs = np.tanh(np.random.normal(size=(4, 8, 8, 1))) + 3.
+        path = os.path.join(self.folder, "gray.png")
+        save_grid(path, imgs, 2, 2)
+
+        for cnt in range(4):
+            cell = self.read_cell(path, cnt // 2, cnt % 2, 8, 8)
+            self.assertEqual((cell.min(), cell.max()), (0, 255))
+            expected = (imgs[cnt, :, :, 0] - imgs[cnt].min()) / (imgs[cnt].max() - imgs[cnt].min()) * 255.
+            self.assertLessEqual(np.abs(cell - expected).max(), 1.)
+
+    def test_color_images_are_clipped(self):
+        imgs = np.random.uniform(-0.5, 1.5, (2, 6, 6, 3))
+        path = os.path.join(self.folder, "color.png")
+        save_grid(path, imgs, 1, 2)
+
+        cell = self.read_cell(path, 0, 1, 6, 6)
+        self.assertTrue(np.all(np.abs(cell - np.clip(imgs[1], 0, 1) * 255.) <= 1.))
+
+    def test_tile_images_layout(self):
+        imgs = np.arange(6, dtype=np.uint8).reshape(6, 1, 1, 1)
+        mosaic = tile_images(imgs, 2, 3, padding=1, fill=9)
+        self.assertEqual(mosaic.shape, (4, 6, 1))
+        self.assertEqual(mosaic[::2, ::2, 0].tolist(), [[0, 1, 2], [3, 4, 5]])
+
+
+class TestSampleWriter(TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def test_writer_writes_in_background(self):
+        writer = SampleWriter(max_pending=1)
+        imgs = np.ones((4, 8, 8, 3))
+        paths = [os.path.join(self.folder, "images", "%d.png" % i) for i in range(3)]
+        for path in paths:
+            writer.write_grid(path, imgs, 2, 2, titles=["a", "b", "c", "d"] if path != paths[0] else None)
+            # The images are copied, so they can be reused right away
+            imgs[:] = 0
+        writer.close()
+        self.assertTrue(all(os.path.exists(path) for path in paths))
+        self.assertTrue(np.all(np.array(Image.open(paths[0]))[:8, :8] == 255))
+
+    def test_worker_errors_are_raised_by_flush(self):
+        blocker = os.path.join(self.folder, "file")
+        open(blocker, "w").close()
+        writer = SampleWriter()
+        writer.write_grid(os.path.join(blocker, "0.png"), np.zeros((1, 4, 4, 1)), 1, 1)
+        with self.assertRaises(OSError):
+            writer.flush()
+        writer.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+from unittest import main, TestCase
+
+import numpy as np
+
+from keras_gan.data_loaders.samplers import EpochIterator, IndexSampler
+
+
+class TestIndexSampler(TestCase):
+
+    def test_every_index_once_per_epoch(self):
+        sampler = IndexSampler(100, seed=0)
+        batches = [sampler.draw(10) for _ in range(10)]
+        epoch = np.concatenate([np.arange(100)[idx] for idx in batches])
+        self.assertEqual(sorted(epoch), list(range(100)))
+        self.assertEqual(sampler.epoch, 0)
+
+        # The tail of an epoch is dropped
+        sampler = IndexSampler(25, seed=0)
+        sampler.draw(10), sampler.draw(10), sampler.draw(10)
+        self.assertEqual(sampler.epoch, 1)
+
+    def test_batches_are_sorted(self):
+        sampler = IndexSampler(1000, seed=0)
+        idx = sampler.draw(64)
+        self.assertEqual(list(idx), sorted(idx))
+
+    def test_unshuffled_batches_are_slices(self):
+        sampler = IndexSampler(100, shuffle=False)
+        self.assertEqual(sampler.draw(30), slice(0, 30))
+        self.assertEqual(sampler.draw(30), slice(30, 60))
+
+    def test_batch_larger_than_dataset(self):
+        with self.assertRaises(ValueError):
+            IndexSampler(10).draw(11)
+
+
+class TestEpochIterator(TestCase):
+
+    def test_every_item_once_per_epoch(self):
+        x_train = np.arange(100)
+        for shuffle in ('blocks', 'full', None):
+            batches = EpochIterator((x_train,), batch_size=10, shuffle=shuffle, seed=0)
+            epoch = np.concatenate([next(batches)[0] for _ in range(10)])
+            self.assertEqual(sorted(epoch), list(range(100)))
+            self.assertEqual(batches.epoch, 0)
+
+    def test_batches_are_views(self):
+        x_train = np.random.uniform(-1, 1, (100, 4))
+        batches = EpochIterator((x_train,), batch_size=32, shuffle='blocks')
+        self.assertTrue(np.shares_memory(next(batches)[0], x_train))
+
+    def test_full_shuffle_mixes_batches_every_epoch(self):
+        x_train = np.arange(100)
+        batches = EpochIterator((x_train,), batch_size=10, seed=0)
+        first = set(frozenset(next(batches)[0]) for _ in range(10))
+        second = set(frozenset(next(batches)[0]) for _ in range(10))
+        self.assertFalse(first & second)
+
+    def test_full_shuffle_gathers_sorted_batches(self):
+        x_train = np.arange(100)
+        batches = EpochIterator((x_train,), batch_size=50, seed=0)
+        first = next(batches)[0]
+        self.assertEqual(list(first), sorted(first))
+        expected = first.copy()
+        next(batches), next(batches)
+        # The batches of an earlier epoch are not overwritten
+        np.testing.assert_array_equal(first, expected)
+
+    def test_arrays_stay_aligned(self):
+        x_train = np.arange(50)
+        y_train = -np.arange(50)
+        x, y = next(EpochIterator((x_train, y_train), batch_size=16, seed=0))
+        np.testing.assert_array_equal(x, -y)
+
+
+if __name__ == "__main__":
+    main()
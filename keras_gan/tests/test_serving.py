@@ -0,0 +1,51 @@
+import shutil
+import tempfile
+
+from unittest import main, TestCase
+
+import numpy as np
+
+from keras_gan.serving import GeneratorServer
+from keras_gan.wgan_gp import WGANGP
+
+
+class TestGeneratorServer(TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def test_generator_server(self):
+        gan = WGANGP(verbose=False, model_dir=self.folder)
+        path_dict = gan.save()
+
+        with GeneratorServer.from_config(path_dict["config_path"], max_batch_size=8) as server:
+            futures = [server.submit(3) for _ in range(5)]
+            imgs = [future.result() for future in futures]
+            noise = gan.generate_noise(2)
+            served = server.generate(noise=noise)
+
+        for batch in imgs:
+            self.assertEqual(batch.shape, (3,) + tuple(gan.img_shape))
+        self.assertTrue(np.allclose(served, gan.generator.predict(noise), atol=1e-5))
+        self.assertLess(server.batches, 6)
+
+    def test_cancelled_requests_do_not_stop_the_server(self):
+        gan = WGANGP(verbose=False, model_dir=self.folder)
+        server = GeneratorServer(gan.generator, max_batch_size=8, max_latency=0.05)
+        futures = [server.submit(2) for _ in range(4)]
+        for future in futures[::2]:
+            future.cancel()
+        self.assertEqual(server.generate(3).shape, (3,) + tuple(gan.img_shape))
+        for future in futures:
+            self.assertTrue(future.cancelled() or future.result().shape[0] == 2)
+
+        server.close()
+        with self.assertRaises(RuntimeError):
+            server.submit(1)
+
+
+if __name__ == "__main__":
+    main()
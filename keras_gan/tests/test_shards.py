@@ -0,0 +1,71 @@
+import os
+import pickle
+import shutil
+import tempfile
+
+from unittest import main, TestCase
+
+import numpy as np
+
+from keras_gan.data_loaders.shards import ShardedDataset, compile_dataset
+
+
+def read_record(path):
+    """Paired record of a fake image path, e.g. '7.jpg' -> images filled with 7 and 107"""
+    value = int(os.path.splitext(path)[0])
+    return {"A": np.full((2, 3, 3), value, dtype=np.uint8), "B": np.full((2, 3, 3), value + 100, dtype=np.uint8)}
+
+
+class TestShardedDataset(TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.shard_dir = os.path.join(self.folder, "train_2x3")
+        self.paths = ["%d.jpg" % i for i in range(10)]
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def test_compiled_records_match_the_images(self):
+        compile_dataset(self.paths, self.shard_dir, read_record, shard_size=4)
+        shards = ShardedDataset.open(self.shard_dir)
+        self.assertEqual((len(shards), shards.paths, shards.fields["A"]), (10, self.paths, (2, 3, 3)))
+
+        index = np.array([9, 0, 5, 4])
+        np.testing.assert_array_equal(shards.batch("A", index)[:, 0, 0, 0], index)
+        np.testing.assert_array_equal(shards.batch("B", index)[:, 0, 0, 0], index + 100)
+        # Across shard boundaries
+        np.testing.assert_array_equal(shards.batch("A", slice(2, 9))[:, 0, 0, 0], np.arange(2, 9))
+
+    def test_slices_within_a_shard_are_views(self):
+        shards = compile_dataset(self.paths, self.shard_dir, read_record, shard_size=4)
+        batch = shards.batch("A", slice(4, 8))
+        self.assertIsInstance(batch.base, np.memmap)
+        np.testing.assert_array_equal(batch[:, 0, 0, 0], np.arange(4, 8))
+
+    def test_uncompiled_dataset(self):
+        self.assertIsNone(ShardedDataset.open(self.shard_dir))
+
+    def test_interrupted_compile_is_not_opened(self):
+        def read_or_interrupt(path):
+            if path == "5.jpg":
+                raise KeyboardInterrupt
+            return read_record(path)
+
+        with self.assertRaises(KeyboardInterrupt):
+            compile_dataset(self.paths, self.shard_dir, read_or_interrupt, shard_size=4)
+        self.assertIsNone(ShardedDataset.open(self.shard_dir))
+        compile_dataset(self.paths, self.shard_dir, read_record, shard_size=4)
+        self.assertNotIn("index.json.tmp", os.listdir(self.shard_dir))
+        self.assertEqual(len(ShardedDataset.open(self.shard_dir)), 10)
+
+    def test_pickles_without_the_mapped_data(self):
+        shards = compile_dataset(self.paths, self.shard_dir, read_record, shard_size=4)
+        shards.batch("A", slice(0, 4))
+        copy = pickle.loads(pickle.dumps(shards))
+        self.assertEqual(copy._shards, {})
+        np.testing.assert_array_equal(copy.batch("B", [3])[:, 0, 0, 0], [103])
+
+
+if __name__ == "__main__":
+    main()
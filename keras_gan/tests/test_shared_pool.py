@@ -0,0 +1,37 @@
+from unittest import main, TestCase
+
+import numpy as np
+
+from keras_gan.data_loaders.shared_pool import SharedBatchPool
+
+
+def read_item(item):
+    """Images filled with the item, which is picklable as a module level function"""
+    if item < 0:
+        raise ValueError("Cannot read item %d" % item)
+    return {'hr': np.full((4, 4, 3), item), 'lr': np.full((2, 2, 3), -item)}
+
+
+class TestSharedBatchPool(TestCase):
+
+    def setUp(self):
+        self.pool = SharedBatchPool(read_item, {'hr': (4, 4, 3), 'lr': (2, 2, 3)}, batch_size=4, depth=2,
+                                    workers=2, seed=0)
+
+    def test_batches_are_decoded_in_order(self):
+        batches = [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9, 10, 11], [12, 13]]
+        received = []
+        for imgs, items in self.pool.imap(batches):
+            self.assertEqual(imgs['hr'].shape, (len(items), 4, 4, 3))
+            np.testing.assert_array_equal(imgs['hr'][:, 0, 0, 0], items)
+            np.testing.assert_array_equal(imgs['lr'][:, 1, 1, 2], [-item for item in items])
+            received.append(items)
+        self.assertEqual(received, batches)
+
+    def test_worker_errors_are_raised(self):
+        with self.assertRaises(ValueError):
+            list(self.pool.imap([[0, 1], [2, -1]]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import os
+import shutil
+import tempfile
+
+from unittest import main, TestCase
+
+import numpy as np
+
+from keras_gan.data_loaders.shards import compile_dataset, get_shard_dir
+from keras_gan.data_loaders.srgan.data_loader import DataLoader
+
+
+def read_record(path):
+    """High and low resolution images of a fake path, a horizontal ramp offset by the file number"""
+    value = int(os.path.splitext(os.path.basename(path))[0])
+    return {'hr': np.tile(np.arange(8, dtype=np.uint8)[None, :, None] * 20 + value, (8, 1, 3)),
+            'lr': np.tile(np.arange(2, dtype=np.uint8)[None, :, None] * 80 + value, (2, 1, 3))}
+
+
+class TestSRGANDataLoader(TestCase):
+
+    def setUp(self):
+        # The data loaders read ./datasets
+        self.cwd = os.getcwd()
+        self.folder = tempfile.mkdtemp()
+        os.chdir(self.folder)
+        paths = ["./datasets/faces/%d.jpg" % i for i in range(6)]
+        compile_dataset(paths, get_shard_dir("faces", "all", (8, 8)), read_record, shard_size=4)
+        self.data_loader = DataLoader("faces", img_res=(8, 8))
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def test_keys_match_the_images(self):
+        imgs_hr, imgs_lr, keys = self.data_loader.load_data(16, return_keys=True)
+        self.assertEqual((imgs_hr.shape, imgs_lr.shape), ((16, 8, 8, 3), (16, 2, 2, 3)))
+        for img_hr, img_lr, key in zip(imgs_hr, imgs_lr, keys):
+            path, flip = key.rsplit(":", 1)
+            record = read_record(path)
+            for img, expected in [(img_hr, record['hr']), (img_lr, record['lr'])]:
+                if flip == "1":
+                    expected = expected[:, ::-1]
+                np.testing.assert_allclose(img, expected / 127.5 - 1., atol=1e-6)
+
+    def test_testing_batches_are_not_flipped(self):
+        _, _, keys = self.data_loader.load_data(8, is_testing=True, return_keys=True)
+        self.assertTrue(all(key.endswith(":0") for key in keys))
+
+
+if __name__ == "__main__":
+    main()
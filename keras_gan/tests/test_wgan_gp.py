@@ -44,6 +44,31 @@ class TestWGANGPBasicUse(TestCase):
         for (a, b) in zip(gan.critic.get_weights(), gan2.critic.get_weights()):
             self.assertTrue(np.all(a == b))
 
+    def test_load_generator_only(self):
+        gan = WGANGP(verbose=False)
+        path_dict = gan.save()
+
+        gan2 = WGANGP.load(path_dict["config_path"], mode="generator", verbose=False)
+        self.assertIsNone(gan2.critic)
+        self.assertIsNone(gan2.generator_graph)
+        for (a, b) in zip(gan.generator.get_weights(), gan2.generator.get_weights()):
+            self.assertTrue(np.all(a == b))
+        self.assertEqual(gan2.generate_batch(4).shape, (4,) + tuple(gan.img_shape))
+
+    def test_checkpoint(self):
+        gan = WGANGP(verbose=False)
+        gan.train(epochs=2, batch_size=8, sample_interval=0)
+        path = gan.save_checkpoint("./models/wgan.ckpt")
+
+        gan2 = WGANGP(verbose=False)
+        header = gan2.load_checkpoint(path)
+        self.assertEqual(header["config"], gan.get_config())
+        self.assertEqual((gan2.epoch, gan2.global_step), (gan.epoch, gan.global_step))
+        for (a, b) in zip(gan.critic_graph.optimizer.get_weights(), gan2.critic_graph.optimizer.get_weights()):
+            self.assertTrue(np.all(a == b))
+        for (a, b) in zip(gan.generator.get_weights(), gan2.generator.get_weights()):
+            self.assertTrue(np.all(a == b))
+
     def test_basic_workflow(self):
         # Construct WGANGP
         gan = WGANGP()
@@ -56,5 +81,57 @@ class TestWGANGPBasicUse(TestCase):
         self.assertEqual(len(image_fns), 2)
 
 
+class TestWGANGPBatchSizes(TestCase):
+
+    def setUp(self):
+        self.gan = WGANGP(verbose=False)
+
+    def check_critic_graph(self, batch_size):
+        imgs = np.random.uniform(-1, 1, (batch_size,) + tuple(self.gan.img_shape))
+        noise = self.gan.generate_noise(batch_size)
+        valid = -np.ones((batch_size, 1))
+        fake = np.ones((batch_size, 1))
+        dummy = np.zeros((batch_size, 1))
+
+        d_loss = self.gan.critic_graph.train_on_batch([imgs, noise], [valid, fake, dummy])
+        self.assertTrue(np.all(np.isfinite(d_loss)))
+
+        outputs = self.gan.critic_graph.predict_on_batch([imgs, noise])
+        for output in outputs:
+            self.assertEqual(output.shape, (batch_size, 1))
+
+    def test_batch_size_1(self):
+        self.check_critic_graph(1)
+
+    def test_batch_size_64(self):
+        self.check_critic_graph(64)
+
+    def test_batch_size_512(self):
+        self.check_critic_graph(512)
+
+    def test_train_discriminator_batch_size(self):
+        x_train = np.random.uniform(-1, 1, (100,) + tuple(self.gan.img_shape))
+        d_losses = self.gan.train_discriminator(x_train, 64)
+        self.assertEqual(d_losses.shape, (self.gan.n_critic, len(self.gan.critic_graph.metrics_names)))
+        self.assertTrue(np.all(np.isfinite(d_losses)))
+
+    def test_critic_labels_are_reused(self):
+        self.assertIs(self.gan.get_critic_labels(64), self.gan.get_critic_labels(64))
+        self.assertEqual(self.gan.get_critic_labels(16)[0].shape, (16, 1))
+
+    def test_critic_labels_are_cached_labels(self):
+        self.assertIs(self.gan.get_labels((64, 1), -1), self.gan.get_critic_labels(64)[0])
+
+
+class TestWGANGPTrain(TestCase):
+
+    def test_training_continues_from_the_last_epoch(self):
+        gan = WGANGP(verbose=False)
+        gan.train(epochs=3, batch_size=8, sample_interval=0)
+        self.assertEqual(gan.epoch, 3)
+        gan.train(epochs=2, batch_size=8, sample_interval=0)
+        self.assertEqual((gan.epoch, gan.global_step), (5, 5))
+
+
 if __name__ == "__main__":
     main()
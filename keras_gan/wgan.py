@@ -1,9 +1,7 @@
 from __future__ import print_function, division
 
 import keras.backend as K
-import matplotlib.pyplot as plt
 import numpy as np
-from keras.datasets import mnist
 from keras.layers import BatchNormalization, Activation, ZeroPadding2D
 from keras.layers import Input, Dense, Reshape, Flatten, Dropout
 from keras.layers.advanced_activations import LeakyReLU
@@ -11,6 +9,7 @@ from keras.layers.convolutional import UpSampling2D, Conv2D
 from keras.models import Sequential, Model
 from keras.optimizers import RMSprop
 
+from .constraints import WeightClip
 from .gan_base import GANBase
 
 
@@ -81,26 +80,29 @@ class WGAN(GANBase):
 
     def build_critic(self):
 
+        # Clip the critic weights after every update, inside the optimizer's update op
+        clip = WeightClip(self.clip_value)
+
         model = Sequential()
 
-        model.add(Conv2D(16, kernel_size=3, strides=2, input_shape=self.img_shape, padding="same"))
+        model.add(Conv2D(16, kernel_size=3, strides=2, input_shape=self.img_shape, padding="same", **clip.layer_kwargs()))
         model.add(LeakyReLU(alpha=0.2))
         model.add(Dropout(0.25))
-        model.add(Conv2D(32, kernel_size=3, strides=2, padding="same"))
+        model.add(Conv2D(32, kernel_size=3, strides=2, padding="same", **clip.layer_kwargs()))
         model.add(ZeroPadding2D(padding=((0, 1), (0, 1))))
-        model.add(BatchNormalization(momentum=0.8))
+        model.add(BatchNormalization(momentum=0.8, **clip.layer_kwargs(batch_normalization=True)))
         model.add(LeakyReLU(alpha=0.2))
         model.add(Dropout(0.25))
-        model.add(Conv2D(64, kernel_size=3, strides=2, padding="same"))
-        model.add(BatchNormalization(momentum=0.8))
+        model.add(Conv2D(64, kernel_size=3, strides=2, padding="same", **clip.layer_kwargs()))
+        model.add(BatchNormalization(momentum=0.8, **clip.layer_kwargs(batch_normalization=True)))
         model.add(LeakyReLU(alpha=0.2))
         model.add(Dropout(0.25))
-        model.add(Conv2D(128, kernel_size=3, strides=1, padding="same"))
-        model.add(BatchNormalization(momentum=0.8))
+        model.add(Conv2D(128, kernel_size=3, strides=1, padding="same", **clip.layer_kwargs()))
+        model.add(BatchNormalization(momentum=0.8, **clip.layer_kwargs(batch_normalization=True)))
         model.add(LeakyReLU(alpha=0.2))
         model.add(Dropout(0.25))
         model.add(Flatten())
-        model.add(Dense(1))
+        model.add(Dense(1, **clip.layer_kwargs()))
 
         model.summary()
 
@@ -109,60 +111,45 @@ class WGAN(GANBase):
 
         return Model(img, validity)
 
-    def train(self, epochs, batch_size=128, sample_interval=50):
-
-        # Load the dataset
-        (X_train, _), (_, _) = mnist.load_data()
-
-        # Rescale -1 to 1
-        X_train = (X_train.astype(np.float32) - 127.5) / 127.5
-        X_train = np.expand_dims(X_train, axis=3)
+    def setup_training(self, batch_size):
+        # Load the dataset (rescaled -1 to 1)
+        self.X_train, _ = self.load_dataset()
 
         # Adversarial ground truths
-        valid = -np.ones((batch_size, 1))
-        fake = np.ones((batch_size, 1))
+        self.valid = self.get_labels((batch_size, 1), -1)
+        self.fake = self.get_labels((batch_size, 1), 1)
 
-        for epoch in range(epochs):
+    def train_step(self, data, batch_size):
+        for _ in range(self.n_critic):
+            # Sample noise as generator input, the last one is reused by the generator step
+            noise = np.random.normal(0, 1, (batch_size, self.latent_dim))
+            d_loss = self.train_discriminator(noise, batch_size)
 
-            for _ in range(self.n_critic):
+        g_loss = self.train_generator(noise)
+        return {"d_loss": d_loss, "g_loss": g_loss}
 
-                # ---------------------
-                #  Train Discriminator
-                # ---------------------
+    def train_discriminator(self, noise, batch_size):
+        # Select the next batch of images
+        imgs = self.next_batch(batch_size, self.X_train)
 
-                # Select a random batch of images
-                idx = np.random.randint(0, X_train.shape[0], batch_size)
-                imgs = X_train[idx]
-
-                # Sample noise as generator input
-                noise = np.random.normal(0, 1, (batch_size, self.latent_dim))
-
-                # Generate a batch of new images
-                gen_imgs = self.generator.predict(noise)
-
-                # Train the critic
-                d_loss_real = self.critic.train_on_batch(imgs, valid)
-                d_loss_fake = self.critic.train_on_batch(gen_imgs, fake)
-                d_loss = 0.5 * np.add(d_loss_fake, d_loss_real)
-
-                # Clip critic weights
-                for l in self.critic.layers:
-                    weights = l.get_weights()
-                    weights = [np.clip(w, -self.clip_value, self.clip_value) for w in weights]
-                    l.set_weights(weights)
+        # Generate a batch of new images
+        gen_imgs = self.generator.predict(noise)
 
-            # ---------------------
-            #  Train Generator
-            # ---------------------
+        # Train the critic
+        d_loss_real = self.critic.train_on_batch(imgs, self.valid)
+        d_loss_fake = self.critic.train_on_batch(gen_imgs, self.fake)
+        d_loss = 0.5 * np.add(d_loss_fake, d_loss_real)
 
-            g_loss = self.combined.train_on_batch(noise, valid)
+        # The critic weights are clipped by their WeightClip constraints
+        return d_loss
 
-            # Plot the progress
-            print("%d [D loss: %f] [G loss: %f]" % (epoch, 1 - d_loss[0], 1 - g_loss[0]))
+    def train_generator(self, noise):
+        g_loss = self.combined.train_on_batch(noise, self.valid)
+        return g_loss
 
-            # If at save interval => save generated image samples
-            if epoch % sample_interval == 0:
-                self.sample_images(epoch)
+    def format_progress(self, epoch, batch, logs):
+        d_loss, g_loss = logs["d_loss"], logs["g_loss"]
+        return "%d [D loss: %f] [G loss: %f]" % (epoch, 1 - d_loss[0], 1 - g_loss[0])
 
     def sample_images(self, epoch):
         r, c = 5, 5
@@ -172,15 +159,7 @@ class WGAN(GANBase):
         # Rescale images 0 - 1
         gen_imgs = 0.5 * gen_imgs + 1
 
-        fig, axs = plt.subplots(r, c)
-        cnt = 0
-        for i in range(r):
-            for j in range(c):
-                axs[i, j].imshow(gen_imgs[cnt, :, :, 0], cmap='gray')
-                axs[i, j].axis('off')
-                cnt += 1
-        fig.savefig("images/mnist_%d.png" % epoch)
-        plt.close()
+        self.save_grid("images/mnist_%d.png" % epoch, gen_imgs, r, c)
 
 
 if __name__ == '__main__':
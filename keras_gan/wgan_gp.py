@@ -9,7 +9,6 @@ import json
 import os
 
 import keras.backend as K
-import matplotlib.pyplot as plt
 import numpy as np
 from keras.datasets import mnist
 from keras.layers import BatchNormalization, Activation, ZeroPadding2D
@@ -26,7 +25,9 @@ from keras_gan.gan_base import GANBase
 class RandomWeightedAverage(_Merge):
     """Provides a (random) weighted average between real and generated image samples"""
     def _merge_function(self, inputs):
-        alpha = K.random_uniform((32, 1, 1, 1))
+        # One weight per sample, taken from the runtime batch dimension
+        batch_size = K.shape(inputs[0])[0]
+        alpha = K.random_uniform((batch_size,) + (1,) * (K.ndim(inputs[0]) - 1))
         return (alpha * inputs[0]) + ((1 - alpha) * inputs[1])
 
 
@@ -168,6 +169,7 @@ class WGANGP(GANBase):
             dataset=mnist,
             model_name='wgan_mnist',
             model_dir="models",
+            build=True,
             *args,
             **kwargs):
         """
@@ -185,6 +187,7 @@ class WGANGP(GANBase):
         :param dataset:
         :param model_name:
         :param model_dir:
+        :param build: build and compile the models, False leaves them to e.g. load
         :param generator_builder:
         :param args:
         :param kwargs:
@@ -203,14 +206,19 @@ class WGANGP(GANBase):
         self.model_dir = model_dir
 
         self.epoch = 0
+        self.critic_labels = {}
 
         self.generator_builder=WGANGPGeneratorBuilder(input_shape=latent_dim)
         self.critic_builder=WGANGPCriticBuilder(input_shape=img_shape)
 
-        # Build the generator, critic, and computational graph
-        self.generator = self.build_generator()
-        self.critic = self.build_critic()
-        self.critic_graph, self.generator_graph = self.build_computational_graphs()
+        self.generator = None
+        self.critic = None
+        self.critic_graph = self.generator_graph = None
+        if build:
+            # Build the generator, critic, and computational graph
+            self.generator = self.build_generator()
+            self.critic = self.build_critic()
+            self.critic_graph, self.generator_graph = self.build_computational_graphs()
 
     def build_computational_graphs(self):
         return self.build_critic_graph(), self.build_generator_graph()
@@ -227,7 +235,7 @@ class WGANGP(GANBase):
         real_img = Input(shape=self.img_shape)
 
         # Noise input
-        z_disc = Input(shape=(100,))
+        z_disc = Input(shape=(self.latent_dim,))
         # Generate image based of noise (fake sample)
         fake_img = self.generator(z_disc)
 
@@ -388,25 +396,58 @@ class WGANGP(GANBase):
         self.load_generator(generator_path, generator_json_path)
         self.load_critic(critic_path, critic_json_path)
 
-    @staticmethod
-    def load(config_path,
-             generator_path,
-             generator_json_path,
-             critic_path,
-             critic_json_path):
-        gan = WGANGP()
-        gan.load_config(config_path)
-        gan.load_model(generator_path, generator_json_path, critic_path, critic_json_path)
+    @classmethod
+    def load(cls,
+             config_path,
+             generator_path=None,
+             generator_json_path=None,
+             critic_path=None,
+             critic_json_path=None,
+             mode="train",
+             **kwargs):
+        """
+        Restore a saved WGANGP, building only the models a mode needs.
+
+        Example usage:
+            gan = WGANGP.load("models/wgan_mnist_config.json", mode="generator")
+            imgs = gan.generate_batch(16)
+
+        :param config_path:
+        :param generator_path: defaults to the path stored in the config
+        :param generator_json_path: defaults to the path stored in the config
+        :param critic_path: defaults to the path stored in the config
+        :param critic_json_path: defaults to the path stored in the config
+        :param mode: "generator" or "critic" loads that model only, without compiling
+            anything, "train" loads both and compiles the computational graphs
+        :param kwargs: passed on to the constructor, e.g. model_name or dataset
+        :return gan:
+        """
+        if mode not in ("generator", "critic", "train"):
+            raise ValueError("Unknown load mode %r" % (mode,))
+        with open(config_path, "r") as f:
+            config = json.load(f)
+
+        gan = cls(img_shape=config["img_shape"], latent_dim=config["latent_dim"], n_critic=config["n_critic"],
+                  build=False, **kwargs)
+        gan.set_config(config)
+        if mode in ("generator", "train"):
+            gan.load_generator(generator_path or config["generator_path"],
+                               generator_json_path or config["generator_json_path"])
+        if mode in ("critic", "train"):
+            gan.load_critic(critic_path or config["critic_path"],
+                            critic_json_path or config["critic_json_path"])
+        if mode == "train":
+            gan.critic_graph, gan.generator_graph = gan.build_computational_graphs()
         return gan
 
     def build_generator(self):
-        model = self.generator_builder.build()
+        model = self.cached_build("generator", vars(self.generator_builder), self.generator_builder.build)
         if self.verbose:
             model.summary()
         return model
 
     def build_critic(self):
-        model = self.critic_builder.build()
+        model = self.cached_build("critic", vars(self.critic_builder), self.critic_builder.build)
         if self.verbose:
             model.summary()
         return model
@@ -419,27 +460,37 @@ class WGANGP(GANBase):
         noise = self.generate_noise(batch_size)
         return self.generator.predict_on_batch(noise)
 
+    def get_critic_labels(self, batch_size):
+        """
+        Adversarial ground truths of the critic graph, allocated once per batch size
+        :param batch_size:
+        :return [valid, fake, dummy]:
+        """
+        if batch_size not in self.critic_labels:
+            fake = self.get_labels((batch_size, 1), 1)
+            dummy = self.get_labels((batch_size, 1), 0)  # Dummy gt for gradient penalty
+            valid = self.get_labels((batch_size, 1), -1)
+            self.critic_labels[batch_size] = [valid, fake, dummy]
+        return self.critic_labels[batch_size]
+
     def train_discriminator(self, x_train, batch_size):
-        # Adversarial ground truths
-        fake = np.ones((batch_size, 1))
-        dummy = np.zeros((batch_size, 1))  # Dummy gt for gradient penalty
-
-        valid = -np.ones((batch_size, 1))
-        d_losses = []
-        for _ in range(self.n_critic):
-            # ---------------------
-            #  Train Discriminator
-            # ---------------------
-
-            # Select a random batch of images
-            idx = np.random.randint(0, x_train.shape[0], batch_size)
-            imgs = x_train[idx]
-            # Sample generator input
-            noise = self.generate_noise(batch_size)
-            # Train the critic
-            d_loss = self.critic_graph.train_on_batch([imgs, noise],
-                                                      [valid, fake, dummy])
-            d_losses.append(d_loss)
+        """
+        Train the critic for n_critic steps
+        :param x_train:
+        :param batch_size:
+        :return d_losses: array of shape (n_critic, n_losses)
+        """
+        labels = self.get_critic_labels(batch_size)
+
+        # Sample the generator input of all n_critic steps at once
+        noise = self.generate_noise(self.n_critic * batch_size).reshape(
+            (self.n_critic, batch_size, self.latent_dim))
+
+        d_losses = np.empty((self.n_critic, len(self.critic_graph.metrics_names)))
+        for step in range(self.n_critic):
+            # Train the critic on the next batch of an epoch over x_train
+            imgs = self.next_batch(batch_size, x_train)
+            d_losses[step] = self.critic_graph.train_on_batch([imgs, noise[step]], labels)
 
         return d_losses
 
@@ -450,53 +501,45 @@ class WGANGP(GANBase):
         :return g_loss:
         """
 
-        valid = -np.ones((batch_size, 1))
+        valid = self.get_labels((batch_size, 1), -1)
         noise = self.generate_noise(batch_size)
         g_loss = self.generator_graph.train_on_batch(noise, valid)
         return g_loss
 
-    def train(self, epochs, batch_size, sample_interval=50):
-
-        # Load the dataset
-        (_X_train, _), (_, _) = self.dataset.load_data()
-
-        # Rescale -1 to 1
-        _X_train = (_X_train.astype(np.float32) - 127.5) / 127.5
-        _X_train = np.expand_dims(_X_train, axis=3)
+    def train(self, epochs, batch_size, sample_interval=50, **kwargs):
+        # Continue counting from the last trained (or loaded) epoch
+        return super(WGANGP, self).train(epochs, batch_size, sample_interval,
+                                         initial_epoch=self.epoch + 1, **kwargs)
 
-        for self.epoch in range(self.epoch + 1, self.epoch + epochs + 1):
+    def setup_training(self, batch_size):
+        # Load the dataset (rescaled -1 to 1)
+        self.X_train, _ = self.load_dataset(self.dataset)
 
-            d_losses = self.train_discriminator(_X_train, batch_size)
-            g_loss = self.train_generator(batch_size)
+    def train_step(self, data, batch_size):
+        d_losses = self.train_discriminator(self.X_train, batch_size)
+        g_loss = self.train_generator(batch_size)
+        return {"d_loss": d_losses, "g_loss": g_loss}
 
-            if self.verbose:
-                # Plot the progress
-                print("%d [D loss: %f] [G loss: %f]" % (self.epoch, d_losses[0][0], g_loss))
+    def format_progress(self, epoch, batch, logs):
+        return "%d [D loss: %f] [G loss: %f]" % (epoch, logs["d_loss"][0][0], logs["g_loss"])
 
-            if sample_interval and self.epoch % sample_interval == 0:
-                self.sample_images()
+    def save_samples(self, epoch, batch):
+        self.sample_images()
 
     def sample_images(self, sample_image_filepath="./images"):
         r, c = 5, 5
         batch_size = r * c
         gen_imgs = self.generate_batch(batch_size)
-        gen_imgs += np.min(gen_imgs)
+        gen_imgs -= np.min(gen_imgs)
         gen_imgs /= np.max(gen_imgs)
 
-        fig, axs = plt.subplots(r, c)
-        cnt = 0
-        for i in range(r):
-            for j in range(c):
-                axs[i, j].imshow(gen_imgs[cnt, :, :, 0], cmap='gray')
-                axs[i, j].axis('off')
-                cnt += 1
-        fig.savefig(
+        self.save_grid(
             os.path.join(
                 sample_image_filepath,
                 "sample_{:02d}.png".format(self.epoch)
-            )
+            ),
+            gen_imgs, r, c
         )
-        plt.close()
 
 
 if __name__ == '__main__':